@@ -1,8 +1,10 @@
 from django.conf import settings
 from django.core import signing
-from django.core.mail import send_mail
+from django.db import transaction
 from pyotp import TOTP, random_base32
 
+from notifications.outbox import enqueue_email
+
 from .models import OTPCode
 
 
@@ -10,6 +12,7 @@ class EmailOTP:
     """
     This handles generation of OTP codes for email verification and sending of verification links to new users.
     The 'send_email' method is called through a signal when a new user object is saved.
+    The email is queued in the notifications outbox together with the OTP code.
     """
 
     def __init__(self, user):
@@ -39,15 +42,14 @@ class EmailOTP:
         """
         subject = "Email Verification"
         try:
-            mail_status = send_mail(
-                subject=subject,
-                message=html_message,
-                from_email=settings.SENDER_EMAIL,
-                recipient_list=[self.user_email],
-                html_message=html_message,
-                fail_silently=False,
-            )
-            if mail_status == 1:
+            with transaction.atomic():
+                enqueue_email(
+                    subject=subject,
+                    body=html_message,
+                    html_body=html_message,
+                    from_email=settings.SENDER_EMAIL,
+                    recipients=[self.user_email],
+                )
                 OTPCode.objects.create(code=self.code, user=self.user)
                 self.user.is_otp_email_sent = True
                 self.user.save()
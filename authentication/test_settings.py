@@ -10,3 +10,12 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "EXCEPTION_HANDLER": "pynigeriaBackend.exception_handler.pynigeria_exception_handler",
 }
+
+# Deliver outbox emails on commit so tests can inspect mail.outbox
+EMAIL_OUTBOX_EAGER = True
+
+# Flush job view counts explicitly instead of from a background thread
+JOB_VIEW_COUNT_FLUSH_INTERVAL = 0
+
+# Tests build the suggestion index themselves
+JOB_SUGGEST_BUILD_ON_START = False
@@ -0,0 +1,21 @@
+from decimal import Decimal
+
+from rest_framework import serializers
+
+
+class NairaField(serializers.DecimalField):
+    """
+    An amount of money read and written in naira, e.g. "2500.50", and stored
+    as an integer number of kobo.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("max_digits", 17)
+        kwargs.setdefault("decimal_places", 2)
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        return int(super().to_internal_value(data) * 100)
+
+    def to_representation(self, value):
+        return super().to_representation(Decimal(value) / 100)
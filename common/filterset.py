@@ -23,17 +23,10 @@ class JobFilterset(django_filters.FilterSet):
             Override the RangeFilter to convert salary range from naira to kobo.
             """
             if value:
-                # Convert both bounds of the range from naira to kobo
-                salary_min = value.start * 100 if value.start is not None else None
-                salary_max = value.stop * 100 if value.stop is not None else None
-
-                # Apply the range filter using the converted values
-                if salary_min is not None and salary_max is not None:
-                    return qs.filter(**{f"{self.field_name}__gte": salary_min, f"{self.field_name}__lte": salary_max})
-                elif salary_min is not None:
-                    return qs.filter(**{f"{self.field_name}__gte": salary_min})
-                elif salary_max is not None:
-                    return qs.filter(**{f"{self.field_name}__lte": salary_max})
+                if value.start is not None:
+                    qs = qs.filter(**{f"{self.field_name}__gte": int(value.start * 100)})
+                if value.stop is not None:
+                    qs = qs.filter(**{f"{self.field_name}__lte": int(value.stop * 100)})
             return qs
     salary = SalaryRangeFilter(field_name="salary")
 
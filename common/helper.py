@@ -2,17 +2,26 @@ import hashlib
 import random
 import uuid
 from datetime import datetime
-from decimal import Decimal
 
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from job_listing_api.models import Job
 
+from common.loader import UserLoader
+
 
 User = get_user_model()
 
 
 class Helper:
+    date_fields = (
+        "created_at",
+        "application_deadline",
+        "scheduled_publish_at",
+        "published_at",
+        "updated_at",
+    )
+    date_format = "%Y-%m-%d %H:%M:%S"
 
     def generate_slug(self):
         # Generate initial UUID
@@ -35,9 +44,10 @@ class Helper:
                         items["skill"] = {"name": items["skill"]["name"].title()}
                 # data[field] = 
 
-    def _format_posted_by(self, data_field:str, data):
+    def _format_posted_by(self, data_field:str, data, user=None):
         if data_field in data:
-            user = User.objects.filter(id=data[data_field]).first()
+            if user is None:
+                user = UserLoader.for_context(self.context).load(data[data_field])
             data[data_field] = user.email.title() if user else None
 
     # def _format_job_instance(self, data_field, data, request):
@@ -64,23 +74,12 @@ class Helper:
                 data["notes"] = data["notes"].capitalize()
 
     def _format_date_field(self, data):
-        for field in [
-            "created_at",
-            "application_deadline",
-            "scheduled_publish_at",
-            "published_at",
-            "updated_at"
-        ]:
+        for field in self.date_fields:
             if field in data and data[field]:
                 try:
                     data[field] = datetime.fromisoformat(data[field]).strftime(
-                        "%Y-%m-%d %H:%M:%S"
+                        self.date_format
                     )
                 except (ValueError, TypeError):
                     # Fallback to original value if parsing fails
                     pass
-
-    def _format_salary(self, data):
-        salary = Decimal(data.get("salary", 0))
-        if "salary" in data and data["salary"]:
-            data["salary"] = str(salary / 100)
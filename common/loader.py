@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Manager, QuerySet
+from rest_framework import serializers
+
+User = get_user_model()
+
+
+class UserLoader:
+    """
+    Request-scoped identity map for users.
+
+    Ids are collected with `prime` and resolved together with a single
+    `id__in` query the first time one of them is loaded. Resolved users are
+    memoized for the rest of the request.
+    """
+
+    def __init__(self):
+        self._users = {}
+        self._pending = set()
+
+    @classmethod
+    def for_context(cls, context):
+        """
+        Return the loader bound to the request in `context`, creating it on
+        first use. Without a request the loader lives in the context itself.
+        """
+        request = context.get("request")
+        if request is None:
+            return context.setdefault("user_loader", cls())
+
+        loader = getattr(request, "_user_loader", None)
+        if loader is None:
+            loader = cls()
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated:
+                loader.prime([user])
+            request._user_loader = loader
+        return loader
+
+    def prime(self, values):
+        """
+        Queue user ids for the next batch. User instances are memoized as is.
+        """
+        for value in values:
+            if value is None:
+                continue
+            if isinstance(value, User):
+                self._users[value.pk] = value
+                self._pending.discard(value.pk)
+            elif value not in self._users:
+                self._pending.add(value)
+
+    def load(self, user_id):
+        if user_id is None:
+            return None
+        if user_id not in self._users:
+            self._pending.add(user_id)
+            self._flush()
+        return self._users.get(user_id)
+
+    def _flush(self):
+        pending, self._pending = self._pending, set()
+        users = {user.pk: user for user in User.objects.filter(id__in=pending)}
+        for user_id in pending:
+            self._users[user_id] = users.get(user_id)
+
+
+class BatchedListSerializer(serializers.ListSerializer):
+    """
+    Primes the request's UserLoader with every user referenced by the page
+    before the child serializer renders it, so `many=True` serialization
+    resolves all users in one query. The child lists the fields holding user
+    foreign keys in `user_fields`.
+    """
+
+    def to_representation(self, data):
+        if isinstance(data, Manager):
+            data = data.all()
+        if isinstance(data, QuerySet):
+            data = list(data)
+
+        loader = UserLoader.for_context(self.context)
+        for field in getattr(self.child, "user_fields", ()):
+            descriptor = getattr(self.child.Meta.model, field, None)
+            loader.prime(
+                (
+                    getattr(item, field)
+                    if descriptor is not None and descriptor.is_cached(item)
+                    else getattr(item, f"{field}_id")
+                )
+                for item in data
+            )
+        return super().to_representation(data)
@@ -0,0 +1,231 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination with opaque cursors.
+
+    Pages are sliced with a `WHERE (created_at, id) < (...)` style predicate on
+    the last row of the previous page instead of an OFFSET, so every page
+    costs the same and no COUNT(*) is ever run.
+
+    The keyset is the queryset's current ordering, as set by OrderingFilter,
+    followed by `created_at` and the primary key to make it unique. Ordering
+    by anything but concrete fields and annotations, such as a relation
+    path, is rejected with a 400 since the cursor could not follow it.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    tiebreak_field = "-created_at"
+    invalid_cursor_message = "Invalid cursor."
+    invalid_ordering_message = "Cannot paginate results ordered by '{term}'."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_keys(queryset)
+
+        values, reverse = self.decode_cursor(request)
+        keys = [
+            (name, not descending if reverse else descending, nullable, field)
+            for name, descending, nullable, field in self.keys
+        ]
+        queryset = queryset.order_by(*self.get_order_by(keys, nulls_first=reverse))
+        if values is not None:
+            queryset = queryset.filter(self.get_seek_filter(keys, values, reverse))
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.next_values = self.previous_values = None
+        if results:
+            if has_more or reverse:
+                self.next_values = self.get_row_values(results[-1])
+            if (has_more and reverse) or (not reverse and values is not None):
+                self.previous_values = self.get_row_values(results[0])
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_link(self.next_values, reverse=False),
+                "previous": self.get_link(self.previous_values, reverse=True),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_keys(self, queryset):
+        """
+        Return the keyset as (name, descending, nullable, model field) tuples.
+        """
+        opts = queryset.model._meta
+        keys = []
+        for term in queryset.query.order_by or opts.ordering:
+            key = self.get_key(queryset, term)
+            if key is None:
+                raise ParseError(self.invalid_ordering_message.format(term=term))
+            keys.append(key)
+
+        key = self.get_key(queryset, self.tiebreak_field)
+        if key is not None:
+            keys.append(key)
+        # The primary key closes the keyset so that it is unique, scanning in
+        # the same direction as the key before it.
+        keys.append((opts.pk.name, keys[-1][1] if keys else True, False, opts.pk))
+
+        names = set()
+        keys = [key for key in keys if not (key[0] in names or names.add(key[0]))]
+        return keys[: [key[0] for key in keys].index(opts.pk.name) + 1]
+
+    def get_key(self, queryset, term):
+        if not isinstance(term, str):
+            return None
+        descending = term.startswith("-")
+        name = term.lstrip("-")
+        if name == "pk":
+            name = queryset.model._meta.pk.name
+        if name in queryset.query.annotations:
+            return (name, descending, True, None)
+        try:
+            field = queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.many_to_many:
+            return None
+        return (name, descending, field.null, field)
+
+    def get_order_by(self, keys, nulls_first):
+        order_by = []
+        for name, descending, nullable, field in keys:
+            if not nullable:
+                order_by.append(f"-{name}" if descending else name)
+                continue
+            expression = F(name)
+            if descending:
+                expression = expression.desc(
+                    nulls_first=nulls_first or None, nulls_last=not nulls_first or None
+                )
+            else:
+                expression = expression.asc(
+                    nulls_first=nulls_first or None, nulls_last=not nulls_first or None
+                )
+            order_by.append(expression)
+        return order_by
+
+    def get_seek_filter(self, keys, values, nulls_first):
+        """
+        Build the predicate selecting rows strictly after `values` in the
+        lexicographic order described by `keys`.
+        """
+        seek_filter = Q(pk__in=[])
+        equal = Q()
+        for (name, descending, nullable, field), value in zip(keys, values):
+            lookup = "lt" if descending else "gt"
+            if value is None:
+                step = Q(**{f"{name}__isnull": False}) if nulls_first else None
+                same = Q(**{f"{name}__isnull": True})
+            else:
+                step = Q(**{f"{name}__{lookup}": value})
+                if nullable and not nulls_first:
+                    step |= Q(**{f"{name}__isnull": True})
+                same = Q(**{name: value})
+            if step is not None:
+                seek_filter |= equal & step
+            equal &= same
+        return seek_filter
+
+    def get_row_values(self, row):
+        values = []
+        for name, descending, nullable, field in self.keys:
+            attname = field.attname if field else name
+            # Rows are model instances or `.values()` dicts
+            value = row[attname] if isinstance(row, dict) else getattr(row, attname)
+            if isinstance(value, (datetime, date)):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = str(value)
+            values.append(value)
+        return values
+
+    def get_link(self, values, reverse):
+        if values is None:
+            return None
+        cursor = json.dumps({"v": values, "r": reverse}, separators=(",", ":"))
+        encoded = urlsafe_b64encode(cursor.encode()).decode().rstrip("=")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            padding = "=" * (-len(encoded) % 4)
+            cursor = json.loads(urlsafe_b64decode(encoded + padding))
+            values = cursor["v"]
+            reverse = bool(cursor.get("r"))
+            if not isinstance(values, list) or len(values) != len(self.keys):
+                raise ValueError
+            values = [
+                field.to_python(value) if field and value is not None else value
+                for (name, descending, nullable, field), value in zip(self.keys, values)
+            ]
+        except (BinasciiError, KeyError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
@@ -1,4 +1,7 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
+from django.db.models.signals import post_migrate
 
 
 class JobApiConfig(AppConfig):
@@ -8,3 +11,9 @@ class JobApiConfig(AppConfig):
 
     def ready(self) -> None:
         from . import signals
+        from .search import ensure_search_schema
+        from .suggest import build_on_start
+
+        post_migrate.connect(ensure_search_schema, sender=self)
+        if settings.JOB_SUGGEST_BUILD_ON_START:
+            request_started.connect(build_on_start)
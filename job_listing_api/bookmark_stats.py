@@ -0,0 +1,174 @@
+"""
+Maintained bookmark statistics.
+
+Every user has a BookmarkCounter per (folder, status) pair in use, folder
+being None for bookmarks outside any folder. Signals keep them current when a
+bookmark is created, saved with a new status or folder, or deleted, and bulk
+writes that send no signals add their changes explicitly. Folder and
+pipeline summaries then read a handful of counter rows instead of grouping
+every bookmark of the user.
+
+Inside `bookmark_counters.batch()` changes are merged per counter and written
+when the block exits, so a bulk operation touches each counter once.
+`reconcile` recounts from the bookmarks and repairs any drift.
+"""
+
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Bookmark, BookmarkCounter, JobBookmarkStatus
+
+
+class BookmarkCounters:
+    def __init__(self):
+        self._local = threading.local()
+
+    def add(self, user_id, folder_id, status, delta=1):
+        pending = getattr(self._local, "pending", None)
+        if pending is not None:
+            pending[user_id, folder_id, status] += delta
+        else:
+            self.apply({(user_id, folder_id, status): delta})
+
+    def move(self, user_id, old, new):
+        """
+        Record a bookmark moving from one (folder_id, status) pair to another.
+        """
+        if old != new:
+            with self.batch():
+                self.add(user_id, *old, delta=-1)
+                self.add(user_id, *new)
+
+    @contextmanager
+    def batch(self):
+        """
+        Collect the changes made in the block and write them, merged per
+        counter, when it exits. A nested batch joins the outer one.
+        """
+        if getattr(self._local, "pending", None) is not None:
+            yield
+            return
+        self._local.pending = Counter()
+        try:
+            yield
+            pending = self._local.pending
+        finally:
+            self._local.pending = None
+        self.apply(pending)
+
+    def apply(self, deltas):
+        # A stable order keeps concurrent writers from deadlocking
+        items = sorted(
+            ((key, delta) for key, delta in deltas.items() if delta),
+            key=lambda item: (item[0][0], item[0][1] or 0, item[0][2]),
+        )
+        if not items:
+            return
+        with transaction.atomic():
+            for (user_id, folder_id, status), delta in items:
+                counter = BookmarkCounter.objects.filter(
+                    user_id=user_id, folder_id=folder_id, status=status
+                )
+                if counter.update(count=F("count") + delta) or delta < 0:
+                    # A decrement without a counter is drift, left to reconcile
+                    continue
+                try:
+                    with transaction.atomic():
+                        BookmarkCounter.objects.create(
+                            user_id=user_id,
+                            folder_id=folder_id,
+                            status=status,
+                            count=delta,
+                        )
+                except IntegrityError:
+                    # Created concurrently
+                    counter.update(count=F("count") + delta)
+
+    def summary(self, user):
+        """
+        The user's bookmark pipeline: counts per status overall, per folder
+        and outside any folder.
+        """
+        pipeline = dict.fromkeys(JobBookmarkStatus.values, 0)
+        unfiled = dict.fromkeys(JobBookmarkStatus.values, 0)
+        folders = {}
+        for folder_id, folder_name, status, count in (
+            BookmarkCounter.objects.filter(user=user, count__gt=0)
+            .order_by("folder__folder_name", "folder_id")
+            .values_list("folder_id", "folder__folder_name", "status", "count")
+        ):
+            pipeline[status] += count
+            if folder_id is None:
+                unfiled[status] += count
+                continue
+            if folder_id not in folders:
+                folders[folder_id] = {
+                    "folder": folder_id,
+                    "folder_name": folder_name,
+                    "counts": dict.fromkeys(JobBookmarkStatus.values, 0),
+                }
+            folders[folder_id]["counts"][status] += count
+        for entry in folders.values():
+            entry["total"] = sum(entry["counts"].values())
+        return {
+            "total": sum(pipeline.values()),
+            "pipeline": pipeline,
+            "folders": list(folders.values()),
+            "unfiled": {"total": sum(unfiled.values()), "counts": unfiled},
+        }
+
+    def reconcile(self, user_ids):
+        """
+        Recount the bookmarks of `user_ids` and repair the counters that
+        drifted. Returns the number of counters repaired.
+        """
+        with transaction.atomic():
+            # Lock the counters first: writers that change them meanwhile
+            # wait for the repaired values instead of being overwritten
+            stored = {
+                (counter.user_id, counter.folder_id, counter.status): counter
+                for counter in BookmarkCounter.objects.select_for_update().filter(
+                    user_id__in=user_ids
+                )
+            }
+            actual = {
+                (user_id, folder_id, status): count
+                for user_id, folder_id, status, count in Bookmark.objects.filter(
+                    user_id__in=user_ids
+                )
+                .values("user_id", "folder_id", "status")
+                .annotate(count=Count("id"))
+                .values_list("user_id", "folder_id", "status", "count")
+            }
+            changed, missing = [], []
+            for key, count in actual.items():
+                counter = stored.get(key)
+                if counter is None:
+                    user_id, folder_id, status = key
+                    missing.append(
+                        BookmarkCounter(
+                            user_id=user_id,
+                            folder_id=folder_id,
+                            status=status,
+                            count=count,
+                        )
+                    )
+                elif counter.count != count:
+                    counter.count = count
+                    changed.append(counter)
+            stale = [
+                counter.pk
+                for key, counter in stored.items()
+                if key not in actual and counter.count
+            ]
+            BookmarkCounter.objects.bulk_update(changed, ["count"])
+            BookmarkCounter.objects.bulk_create(missing)
+            BookmarkCounter.objects.filter(pk__in=stale).update(count=0)
+        return len(changed) + len(missing) + len(stale)
+
+
+bookmark_counters = BookmarkCounters()
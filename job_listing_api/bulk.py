@@ -0,0 +1,237 @@
+"""
+Set-based helpers for writing jobs and their relations in bulk.
+
+Each helper resolves a whole batch of names with one lookup for the rows
+that already exist and one `bulk_create` for the rest, instead of a
+`get_or_create` per name.
+"""
+
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+from taggit.models import Tag, TaggedItem
+
+from .bookmark_stats import bookmark_counters
+from .models import (
+    Bookmark,
+    BookmarkFolder,
+    Company,
+    Job,
+    JobBookmarkStatus,
+    JobSkill,
+    Skill,
+)
+
+
+def _resolve(model, names, lookup="name"):
+    names = set(names)
+    if not names:
+        return {}
+    existing = {
+        getattr(instance, lookup): instance
+        for instance in model.objects.filter(**{f"{lookup}__in": names})
+    }
+    missing = names - existing.keys()
+    if missing:
+        model.objects.bulk_create(
+            [model(**{lookup: name}) for name in missing], ignore_conflicts=True
+        )
+        existing.update(
+            (getattr(instance, lookup), instance)
+            for instance in model.objects.filter(**{f"{lookup}__in": missing})
+        )
+    return existing
+
+
+def resolve_companies(names):
+    """
+    Return a {name: Company} map, creating the companies that don't exist.
+    """
+    return _resolve(Company, names)
+
+
+def resolve_skills(names):
+    """
+    Return a {name: Skill} map, creating the skills that don't exist.
+    """
+    return _resolve(Skill, names)
+
+
+def resolve_tags(names):
+    """
+    Return a {name: Tag} map, creating the tags that don't exist.
+    """
+    names = set(names)
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = names - tags.keys()
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=Tag().slugify(name)) for name in missing],
+            ignore_conflicts=True,
+        )
+        tags.update((tag.name, tag) for tag in Tag.objects.filter(name__in=missing))
+    # Names whose slug collided with another tag go through taggit's own
+    # slug de-duplication
+    for name in names - tags.keys():
+        tags[name], _ = Tag.objects.get_or_create(name=name)
+    return tags
+
+
+def tag_jobs(job_tags):
+    """
+    Attach tags to jobs from a {job_id: [tag names]} map. Tags a job already
+    has are left alone.
+    """
+    tags = resolve_tags(name for names in job_tags.values() for name in names)
+    content_type = ContentType.objects.get_for_model(Job)
+    TaggedItem.objects.bulk_create(
+        [
+            TaggedItem(content_type=content_type, object_id=job_id, tag=tags[name])
+            for job_id, names in job_tags.items()
+            for name in set(names)
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def add_job_skills(job_skills):
+    """
+    Attach skills to jobs from a {job: {skill name: skill level}} map and tag
+    every job with its skill names, creating the missing skills and tags.
+    """
+    skills = resolve_skills(name for levels in job_skills.values() for name in levels)
+    JobSkill.objects.bulk_create(
+        [
+            JobSkill(job=job, skill=skills[name], skill_level=level)
+            for job, levels in job_skills.items()
+            for name, level in levels.items()
+        ]
+    )
+    tag_jobs({job.id: list(levels) for job, levels in job_skills.items()})
+
+
+def apply_bookmark_changes(user, create=(), update=(), delete=()):
+    """
+    Create, update and delete many of `user`'s bookmarks with set-based
+    queries. Returns a result per item: creates, then updates, then deletes,
+    each in request order.
+
+    `create` items carry a job slug and optional folder id, status and notes,
+    `update` items a bookmark id and the fields to change, and `delete` is a
+    list of bookmark ids. Bookmarks and folders that do not belong to `user`
+    are reported as not found. The user's bookmark counters are updated once
+    per counter. Must run inside a transaction.
+    """
+    folder_ids = {
+        item["folder"] for item in [*create, *update] if item.get("folder") is not None
+    }
+    folders = set(
+        BookmarkFolder.objects.filter(user=user, id__in=folder_ids).values_list(
+            "id", flat=True
+        )
+        if folder_ids
+        else ()
+    )
+    bookmark_ids = {item["id"] for item in update} | set(delete)
+    owned = {
+        bookmark_id: (folder_id, status)
+        for bookmark_id, folder_id, status in (
+            Bookmark.objects.filter(user=user, id__in=bookmark_ids).values_list(
+                "id", "folder_id", "status"
+            )
+            if bookmark_ids
+            else ()
+        )
+    }
+
+    with bookmark_counters.batch():
+        results = _create_bookmarks(user, create, folders) if create else []
+        results.extend(_update_bookmarks(user, update, owned, folders))
+
+        # Deleting sends post_delete, which updates the counters
+        deleted = [bookmark_id for bookmark_id in delete if bookmark_id in owned]
+        if deleted:
+            Bookmark.objects.filter(user=user, id__in=deleted).delete()
+        results.extend(
+            {
+                "bookmark": bookmark_id,
+                "result": "deleted" if bookmark_id in owned else "not_found",
+            }
+            for bookmark_id in delete
+        )
+    return results
+
+
+def _update_bookmarks(user, items, owned, folders):
+    results = []
+
+    groups = defaultdict(list)  # changes -> bookmark ids
+    for item in items:
+        changes = {name: value for name, value in item.items() if name != "id"}
+        if item["id"] not in owned:
+            results.append({"bookmark": item["id"], "result": "not_found"})
+        elif changes.get("folder") is not None and changes["folder"] not in folders:
+            results.append({"bookmark": item["id"], "result": "folder_not_found"})
+        else:
+            groups[tuple(sorted(changes.items()))].append(item["id"])
+            results.append({"bookmark": item["id"], "result": "updated"})
+
+    updated_at = timezone.now()
+    for changes, ids in groups.items():
+        changes = dict(changes)
+        if "folder" in changes:
+            changes["folder_id"] = changes.pop("folder")
+        Bookmark.objects.filter(user=user, id__in=ids).update(
+            **changes, updated_at=updated_at
+        )
+        # QuerySet.update sends no signals
+        for bookmark_id in ids:
+            folder_id, status = owned[bookmark_id]
+            bookmark_counters.move(
+                user.id,
+                (folder_id, status),
+                (changes.get("folder_id", folder_id), changes.get("status", status)),
+            )
+    return results
+
+
+def _create_bookmarks(user, items, folders):
+    jobs = dict(
+        Job.objects.filter(slug__in={item["job"] for item in items}).values_list(
+            "slug", "id"
+        )
+    )
+    existing = dict(
+        Bookmark.objects.filter(user=user, job_id__in=jobs.values()).values_list(
+            "job_id", "id"
+        )
+    )
+    results, bookmarks = [], []
+    for item in items:
+        job_id = jobs.get(item["job"])
+        result = {"job": str(item["job"])}
+        if job_id is None:
+            result["result"] = "job_not_found"
+        elif item.get("folder") is not None and item["folder"] not in folders:
+            result["result"] = "folder_not_found"
+        elif job_id in existing:
+            result.update(bookmark=existing[job_id], result="exists")
+        else:
+            bookmark = Bookmark(
+                user=user,
+                job_id=job_id,
+                folder_id=item.get("folder"),
+                status=item.get("status", JobBookmarkStatus.SAVED),
+                notes=item.get("notes"),
+            )
+            bookmarks.append((bookmark, result))
+            result["result"] = "created"
+        results.append(result)
+
+    Bookmark.objects.bulk_create([bookmark for bookmark, _ in bookmarks])
+    for bookmark, result in bookmarks:
+        result["bookmark"] = bookmark.pk
+        # bulk_create sends no post_save
+        bookmark_counters.add(user.id, bookmark.folder_id, bookmark.status)
+    return results
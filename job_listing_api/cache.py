@@ -0,0 +1,129 @@
+"""
+Response caching for the job board.
+
+Cached entries are never deleted one by one. Every key embeds the current
+generation of its namespace, and any change to jobs, their skills, tags or
+approval bumps that generation once the transaction commits. The stale
+entries then simply stop being read and age out of the cache.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+JOBS_NAMESPACE = "jobs"
+
+
+def _generation_key(namespace):
+    return f"{namespace}:generation"
+
+
+def get_generation(namespace=JOBS_NAMESPACE):
+    generation = cache.get(_generation_key(namespace))
+    if generation is None:
+        cache.add(_generation_key(namespace), 1, timeout=None)
+        generation = cache.get(_generation_key(namespace), 1)
+    return generation
+
+
+def bump_generation(namespace=JOBS_NAMESPACE):
+    try:
+        return cache.incr(_generation_key(namespace))
+    except ValueError:
+        cache.add(_generation_key(namespace), 1, timeout=None)
+        return get_generation(namespace)
+
+
+def schedule_invalidation(namespace=JOBS_NAMESPACE):
+    """
+    Invalidate `namespace` after the current transaction commits, so readers
+    cannot cache the old state under the new generation.
+    """
+    transaction.on_commit(lambda: bump_generation(namespace))
+
+
+class ResponseCache:
+    """
+    Caches response data keyed on the request's host and normalized query
+    parameters within a namespace generation. Hits and misses are counted in
+    the cache so they can be compared across workers.
+    """
+
+    def __init__(self, name, namespace=JOBS_NAMESPACE, timeout=None, ignored_params=()):
+        self.name = name
+        self.namespace = namespace
+        self.timeout = timeout
+        self.ignored_params = set(ignored_params)
+
+    def normalize_params(self, query_params):
+        params = {}
+        for key, values in query_params.lists():
+            if key in self.ignored_params:
+                continue
+            if key == "search":
+                values = [
+                    term.strip().lower()
+                    for value in values
+                    for term in value.split(",")
+                    if term.strip()
+                ]
+            params[key] = sorted(values)
+        return sorted(params.items())
+
+    def get_key(self, request):
+        fingerprint = json.dumps(
+            [
+                request.scheme,
+                request.get_host(),
+                self.normalize_params(request.query_params),
+            ]
+        )
+        digest = hashlib.sha256(fingerprint.encode()).hexdigest()
+        return f"{self.namespace}:{get_generation(self.namespace)}:{self.name}:{digest}"
+
+    def get(self, key):
+        data = cache.get(key)
+        self._count("hits" if data is not None else "misses")
+        return data
+
+    def set(self, key, data):
+        """
+        Store `data` under a key taken *before* computing it, so data computed
+        while the generation moved on is never served as current.
+        """
+        timeout = self.timeout
+        if timeout is None:
+            timeout = settings.JOB_LIST_CACHE_TIMEOUT
+        cache.set(key, data, timeout=timeout)
+
+    def stats(self):
+        hits = cache.get(self._counter_key("hits"), 0)
+        misses = cache.get(self._counter_key("misses"), 0)
+        return {
+            "name": self.name,
+            "generation": get_generation(self.namespace),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+        }
+
+    def _counter_key(self, counter):
+        return f"{self.namespace}:{self.name}:{counter}"
+
+    def _count(self, counter):
+        key = self._counter_key(counter)
+        if not cache.add(key, 1, timeout=None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, 1, timeout=None)
+
+
+job_list_cache = ResponseCache("job_list")
+# Facet counts do not depend on the page or order of the results
+job_facets_cache = ResponseCache(
+    "job_facets", ignored_params=("cursor", "page_size", "ordering")
+)
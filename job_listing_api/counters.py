@@ -0,0 +1,136 @@
+"""
+Buffered job view counting.
+
+Reading a job must not write to the database, so `ViewCounter.record` only
+bumps an in-process counter. Buffered counts are written by `flush` with one
+`CASE` UPDATE per batch of jobs, adding to the stored value with F() so
+concurrent workers never overwrite each other's counts. A daemon thread
+flushes every JOB_VIEW_COUNT_FLUSH_INTERVAL seconds, or sooner once
+JOB_VIEW_COUNT_MAX_PENDING jobs are waiting, and whatever is left is
+flushed when the worker exits.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, PositiveIntegerField, When
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    batch_size = 500
+
+    def __init__(self, flush_interval=None, max_pending=None):
+        self._flush_interval = flush_interval
+        self._max_pending = max_pending
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._thread = None
+        self._wake = threading.Event()
+        self._pid = os.getpid()
+        atexit.register(self.flush)
+
+    @property
+    def flush_interval(self):
+        if self._flush_interval is None:
+            return settings.JOB_VIEW_COUNT_FLUSH_INTERVAL
+        return self._flush_interval
+
+    @property
+    def max_pending(self):
+        if self._max_pending is None:
+            return settings.JOB_VIEW_COUNT_MAX_PENDING
+        return self._max_pending
+
+    def record(self, job_id, count=1):
+        with self._lock:
+            self._check_fork()
+            self._counts[job_id] += count
+            pending = len(self._counts)
+        self._ensure_thread()
+        if pending >= self.max_pending:
+            if self._thread is not None:
+                self._wake.set()
+            else:
+                self.flush()
+
+    def pending(self, job_id=None):
+        with self._lock:
+            if job_id is None:
+                return dict(self._counts)
+            return self._counts.get(job_id, 0)
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+    def flush(self):
+        """
+        Write the buffered counts. Returns the number of jobs updated. Counts
+        that fail to write are put back into the buffer for the next flush.
+        """
+        with self._lock:
+            self._check_fork()
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return 0
+
+        items = list(counts.items())
+        flushed = 0
+        try:
+            for start in range(0, len(items), self.batch_size):
+                batch = items[start : start + self.batch_size]
+                with transaction.atomic():
+                    Job.objects.filter(pk__in=[job_id for job_id, _ in batch]).update(
+                        views_count=Case(
+                            *[
+                                When(pk=job_id, then=F("views_count") + count)
+                                for job_id, count in batch
+                            ],
+                            default=F("views_count"),
+                            output_field=PositiveIntegerField(),
+                        )
+                    )
+                flushed += len(batch)
+        except Exception:
+            logger.exception("Failed to flush job view counts")
+            with self._lock:
+                self._counts.update(dict(items[flushed:]))
+        return flushed
+
+    def _check_fork(self):
+        # A forked worker must not inherit, and later double count, the
+        # parent's buffer or rely on its flush thread.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._counts = Counter()
+            self._thread = None
+            self._wake = threading.Event()
+
+    def _ensure_thread(self):
+        if self._thread is not None or self.flush_interval <= 0:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="job-view-counter", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            close_old_connections()
+
+
+job_view_counter = ViewCounter()
@@ -0,0 +1,190 @@
+"""
+Near-duplicate job detection.
+
+A job's fingerprint is a MinHash signature of the set of words in its title
+and description: PERMUTATIONS minimum hash values, one per hash function.
+The share of equal values between two signatures estimates the Jaccard
+similarity of the two word sets, so a listing reposted with a reworded title
+or an extra sentence keeps almost all of its values. Two jobs are
+near-duplicates when their estimated similarity reaches THRESHOLD.
+
+Signatures are stored in JobFingerprint with BANDS indexed band keys, each a
+hash of ROWS consecutive signature values (locality sensitive hashing).
+Similar jobs almost always share a whole band while unrelated ones almost
+never do, so the candidates for a lookup come from one indexed query on equal
+band keys instead of a scan of every job, and only those are compared value
+by value.
+
+JOB_DUPLICATE_POLICY decides what happens to a new job that duplicates a
+current one: "flag" creates it with `duplicate_of` pointing at the earlier
+job, "reject" refuses it.
+"""
+
+import random
+import re
+import struct
+from collections import defaultdict
+from functools import reduce
+from hashlib import blake2b
+from operator import or_
+
+from django.db.models import Q
+
+from .models import JobFingerprint
+
+BANDS = 8
+ROWS = 4
+PERMUTATIONS = BANDS * ROWS
+THRESHOLD = 0.8
+
+FLAG = "flag"
+REJECT = "reject"
+
+WORD_RE = re.compile(r"\w+")
+
+_PRIME = (1 << 61) - 1
+# Fixed seed: stored signatures must stay comparable across processes
+_random = random.Random(5281)
+_PERMUTATIONS = [
+    (_random.randrange(1, _PRIME), _random.randrange(0, _PRIME))
+    for _ in range(PERMUTATIONS)
+]
+_SIGNATURE = struct.Struct(f">{PERMUTATIONS}Q")
+_BAND_BYTES = ROWS * 8
+
+
+def _word_hash(word):
+    return int.from_bytes(blake2b(word.encode(), digest_size=8).digest(), "big")
+
+
+def minhash(text):
+    """
+    Return the MinHash signature of the words of `text`, a tuple of
+    PERMUTATIONS integers.
+    """
+    hashes = [_word_hash(word) for word in set(WORD_RE.findall(text.lower()))]
+    if not hashes:
+        hashes = [0]
+    return tuple(
+        min((a * value + b) % _PRIME for value in hashes) for a, b in _PERMUTATIONS
+    )
+
+
+def job_signature(job_title, job_description):
+    return minhash(f"{job_title or ''}\n{job_description or ''}")
+
+
+def band_keys(signature):
+    """
+    Hash each band of ROWS signature values to a signed 32 bit key.
+    """
+    packed = _SIGNATURE.pack(*signature)
+    return tuple(
+        int.from_bytes(
+            blake2b(
+                packed[band * _BAND_BYTES : (band + 1) * _BAND_BYTES], digest_size=4
+            ).digest(),
+            "big",
+            signed=True,
+        )
+        for band in range(BANDS)
+    )
+
+
+def similarity(first, second):
+    return sum(a == b for a, b in zip(first, second)) / PERMUTATIONS
+
+
+def fingerprint_rows(pairs):
+    """
+    Build unsaved JobFingerprint rows from (job_id, signature) pairs.
+    """
+    return [
+        JobFingerprint(
+            job_id=job_id,
+            signature=_SIGNATURE.pack(*signature),
+            **{f"band_{band}": key for band, key in enumerate(band_keys(signature))},
+        )
+        for job_id, signature in pairs
+    ]
+
+
+def store_fingerprints(pairs):
+    JobFingerprint.objects.bulk_create(fingerprint_rows(pairs), ignore_conflicts=True)
+
+
+def match_stored(signatures, before=None):
+    """
+    For each signature, return the id of the most similar current job at or
+    above THRESHOLD, or None, with one query for the whole batch. A match
+    that is itself flagged as a duplicate resolves to the job it duplicates.
+
+    `before`, a job id per signature, only lets each signature match jobs
+    with a lower id, so the oldest job of a group stays the original.
+    """
+    if not signatures:
+        return []
+    keys = [band_keys(signature) for signature in signatures]
+    lookup = reduce(
+        or_,
+        (
+            Q(**{f"band_{band}__in": {row[band] for row in keys}})
+            for band in range(BANDS)
+        ),
+    )
+    candidates = defaultdict(list)  # (band, key) -> [(job_id, signature)]
+    for (
+        job_id,
+        signature,
+        duplicate_of_id,
+        *stored_keys,
+    ) in JobFingerprint.objects.filter(lookup, job__is_current=True).values_list(
+        "job_id",
+        "signature",
+        "job__duplicate_of_id",
+        *[f"band_{band}" for band in range(BANDS)],
+    ):
+        entry = (duplicate_of_id or job_id, _SIGNATURE.unpack(bytes(signature)))
+        for band, key in enumerate(stored_keys):
+            candidates[band, key].append(entry)
+
+    matches = []
+    for signature, row, limit in zip(
+        signatures, keys, before or [None] * len(signatures)
+    ):
+        best = None
+        for band, key in enumerate(row):
+            for job_id, stored in candidates.get((band, key), ()):
+                if limit is not None and job_id >= limit:
+                    continue
+                # Most similar first, then the oldest job
+                score = (similarity(signature, stored), -job_id)
+                if score[0] >= THRESHOLD and (best is None or score > best):
+                    best = score
+        matches.append(-best[1] if best else None)
+    return matches
+
+
+def match_within(signatures):
+    """
+    For each signature, return the index of the first earlier signature in
+    the same batch at or above THRESHOLD, or None. Like stored matches, a
+    match on a duplicate resolves to the signature it duplicates.
+    """
+    buckets = defaultdict(list)
+    matches = []
+    for index, signature in enumerate(signatures):
+        keys = list(enumerate(band_keys(signature)))
+        match = None
+        for key in keys:
+            for other in buckets[key]:
+                if similarity(signature, signatures[other]) >= THRESHOLD and (
+                    match is None or other < match
+                ):
+                    match = other
+        if match is not None and matches[match] is not None:
+            match = matches[match]
+        matches.append(match)
+        for key in keys:
+            buckets[key].append(index)
+    return matches
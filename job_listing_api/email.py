@@ -2,9 +2,9 @@ from datetime import datetime
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+
+from notifications.delivery import render_personalized
+from notifications.outbox import enqueue_emails
 
 User = get_user_model()
 
@@ -16,53 +16,107 @@ class JobNotificationEmail:
         """
         self.job_instance = job_instance
 
-    def __send_to_email(self, subject, recipient_list, context):
-        html_message = render_to_string("email.html", context)
-        with open("templates/dump.html", "w") as file:
-            file.write(html_message)
-        plain_message = strip_tags(html_message)
-
-        # Send the email
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=recipient_list,
-            html_message=html_message,
+    def __send_to_email(self, subject, recipients, context):
+        """
+        Queue one personalized email per (email, user_name) in `recipients`,
+        rendering the template only once.
+        """
+        messages = render_personalized(
+            "email.html", context, [user_name for _, user_name in recipients]
+        )
+        enqueue_emails(
+            {
+                "subject": subject,
+                "body": plain_message,
+                "html_body": html_message,
+                "from_email": settings.DEFAULT_FROM_EMAIL,
+                "recipients": [email],
+            }
+            for (email, _), (html_message, plain_message) in zip(recipients, messages)
         )
 
     def send_to_admins(self):
         """
         Send an email notification to all admins when a job is created.
         """
-        admins_email = [
-            admin.email
-            for admin in User.objects.filter(is_staff=True, is_email_verified=True)
-        ]
+        admins_email = list(
+            User.objects.filter(is_staff=True, is_email_verified=True).values_list(
+                "email", flat=True
+            )
+        )
         if not admins_email:
             return
         context = {
             "email_title": "New Job Created",
-            "user_name": "Admin",
             "email_message": f"A new job titled {self.job_instance.job_title.title()} has been created.",
             "job_link": f"{settings.CURRENT_ORIGIN}/admin/job_listing_api/job/{self.job_instance.id}/",
         }
 
-        self.__send_to_email("New Job Created", admins_email, context)
+        self.__send_to_email(
+            "New Job Created", [(email, email) for email in admins_email], context
+        )
 
     def send_to_poster(self, approved=True, message=None):
         job_status = "approved" if approved else "rejected"
         context = {
             "email_title": f"Your Job Has Been {job_status.capitalize()}",
-            "user_name": self.job_instance.posted_by.email,
             "email_message": f"Your job titled {self.job_instance.job_title.title()} has been {job_status}. ",
             "additional_message": message,
             "contact_support": f"to contact support",
             "job_link": f"{settings.CURRENT_ORIGIN}/admin/job_listing_api/job/{self.job_instance.id}/",
             "year": datetime.now().strftime("%Y"),
         }
+        poster_email = self.job_instance.posted_by.email
         self.__send_to_email(
             f"Job {job_status.capitalize()}",
-            [self.job_instance.posted_by.email],
+            [(poster_email, poster_email)],
             context,
         )
+
+    @classmethod
+    def send_decisions_to_posters(cls, decisions):
+        """
+        Queue one email per poster summarizing the approval decisions on
+        their jobs, given as (job_title, poster_email, approved, message)
+        tuples, with a single INSERT.
+        """
+        by_poster = {}
+        for job_title, email, approved, message in decisions:
+            by_poster.setdefault(email, []).append((job_title, approved, message))
+
+        emails = []
+        for email, jobs in by_poster.items():
+            approved = [title.title() for title, is_approved, _ in jobs if is_approved]
+            rejected = [
+                title.title() for title, is_approved, _ in jobs if not is_approved
+            ]
+            summary = []
+            if approved:
+                summary.append(f"Approved: {', '.join(approved)}.")
+            if rejected:
+                summary.append(f"Rejected: {', '.join(rejected)}.")
+            notes = " ".join(
+                f"{title.title()}: {message}" for title, _, message in jobs if message
+            )
+            context = {
+                "email_title": "Your Jobs Have Been Reviewed",
+                "email_message": f"{len(jobs)} of your jobs have been reviewed. "
+                + " ".join(summary),
+                "additional_message": notes or None,
+                "contact_support": "to contact support",
+                "year": datetime.now().strftime("%Y"),
+            }
+            [(html_message, plain_message)] = render_personalized(
+                "email.html", context, [email]
+            )
+            emails.append(
+                {
+                    "subject": "Jobs Reviewed",
+                    "body": plain_message,
+                    "html_body": html_message,
+                    "from_email": settings.DEFAULT_FROM_EMAIL,
+                    "recipients": [email],
+                }
+            )
+        if emails:
+            enqueue_emails(emails)
@@ -0,0 +1,183 @@
+"""
+Streaming export of published jobs as NDJSON or CSV.
+
+Rows are read with `.values().iterator(chunk_size=...)`, so no model
+instances are built and only one chunk of rows is held at a time. The skills
+and tags of each chunk are attached with one batched query each, and the
+rendered lines are yielded as they are produced for a StreamingHttpResponse
+or a file.
+
+CSV rows use the columns the importer reads, skills written as
+`python:Advanced|django:Beginner`, so an export can be imported elsewhere.
+
+Only approved, published, current jobs are exported. With `since`, only
+those changed (`Job.changed_at`) at or after that time are, and `replaces`
+names the revision a row supersedes. An NDJSON export with `since` then ends
+with a `{"slug": ..., "deleted": true}` tombstone for every job that was
+published but has left the export since then: expired, archived, unapproved
+or superseded. CSV exports carry no tombstones, so with `since` they only
+add jobs.
+"""
+
+import csv
+import json
+from datetime import datetime, time
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from taggit.models import TaggedItem
+
+from .models import Job, JobSkill, JobStatus
+
+FIELDS = {
+    "slug": "slug",
+    "job_title": "job_title",
+    "job_description": "job_description",
+    "company_name": "company_name",
+    "employment_type": "employment_type",
+    "salary": "salary",
+    "application_deadline": "application_deadline",
+    "published_at": "published_at",
+    "created_at": "created_at",
+    "version": "version",
+    "replaces": "original_job__slug",
+}
+CSV_COLUMNS = (*FIELDS, "job_skills", "tags")
+VISIBLE = {"status": JobStatus.PUBLISHED, "is_approved": True, "is_current": True}
+
+
+def parse_since(value):
+    """
+    Parse the ISO 8601 date or date and time of a `since` option, a date
+    meaning its midnight. Naive values are in the current time zone. Returns
+    None for invalid values.
+    """
+    try:
+        since = parse_datetime(value)
+        if since is None and parse_date(value) is not None:
+            since = datetime.combine(parse_date(value), time.min)
+    except ValueError:
+        return None
+    if since is not None and timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+class _Echo:
+    # csv.writer target that hands the written line back
+    def write(self, value):
+        return value
+
+
+class JobExporter:
+    formats = ("ndjson", "csv")
+    content_types = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+    def __init__(self, format="ndjson", since=None, chunk_size=2000):
+        if format not in self.formats:
+            raise ValueError(f"Unsupported export format: {format}")
+        self.format = format
+        self.since = since
+        self.chunk_size = chunk_size
+        # Counted as the export is rendered
+        self.exported = self.deleted = 0
+
+    @property
+    def content_type(self):
+        return self.content_types[self.format]
+
+    def queryset(self):
+        queryset = Job.objects.filter(**VISIBLE)
+        if self.since is not None:
+            queryset = queryset.filter(changed_at__gte=self.since)
+        return queryset.order_by("id")
+
+    def removed(self):
+        """
+        Yield the slugs of the jobs that left the export since `since`.
+        """
+        if self.since is None:
+            return iter(())
+        return (
+            Job.objects.filter(changed_at__gte=self.since)
+            .exclude(**VISIBLE)
+            # Never published, so never exported
+            .exclude(status=JobStatus.DRAFT, published_at__isnull=True)
+            .order_by("id")
+            .values_list("slug", flat=True)
+            .iterator(chunk_size=self.chunk_size)
+        )
+
+    def rows(self):
+        """
+        Yield one dict per exported job.
+        """
+        chunk = []
+        for row in (
+            self.queryset()
+            .values("id", *FIELDS.values())
+            .iterator(chunk_size=self.chunk_size)
+        ):
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                yield from self.attach_relations(chunk)
+                chunk = []
+        if chunk:
+            yield from self.attach_relations(chunk)
+
+    def attach_relations(self, chunk):
+        ids = [row["id"] for row in chunk]
+        skills = {job_id: {} for job_id in ids}
+        for job_id, name, level in JobSkill.objects.filter(job_id__in=ids).values_list(
+            "job_id", "skill__name", "skill_level"
+        ):
+            skills[job_id][name] = level
+        tags = {job_id: [] for job_id in ids}
+        for job_id, name in TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(Job), object_id__in=ids
+        ).values_list("object_id", "tag__name"):
+            tags[job_id].append(name)
+
+        for row in chunk:
+            job_id = row.pop("id")
+            row = {name: row[source] for name, source in FIELDS.items()}
+            if row["salary"] is not None:
+                # Naira, as the API renders it
+                row["salary"] = f"{row['salary'] // 100}.{row['salary'] % 100:02d}"
+            row["job_skills"] = [
+                {"skill": name, "skill_level": level}
+                for name, level in sorted(skills[job_id].items())
+            ]
+            row["tags"] = sorted(tags[job_id])
+            yield row
+
+    def render(self):
+        """
+        Yield the export as text, one line at a time.
+        """
+        if self.format == "ndjson":
+            for row in self.rows():
+                self.exported += 1
+                yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+            for slug in self.removed():
+                self.deleted += 1
+                yield json.dumps({"slug": str(slug), "deleted": True}) + "\n"
+            return
+
+        writer = csv.writer(_Echo())
+        yield writer.writerow(CSV_COLUMNS)
+        for row in self.rows():
+            row["job_skills"] = "|".join(
+                f"{skill['skill']}:{skill['skill_level']}"
+                for skill in row["job_skills"]
+            )
+            row["tags"] = "|".join(row["tags"])
+            self.exported += 1
+            yield writer.writerow(
+                [
+                    value.isoformat() if hasattr(value, "isoformat") else value
+                    for value in (row[column] for column in CSV_COLUMNS)
+                ]
+            )
@@ -0,0 +1,61 @@
+"""
+Facet counts for the job board.
+
+`compute_facets` counts the jobs matched by a filtered queryset per
+employment type, tag, skill, skill level and salary band. Each facet is a
+single GROUP BY over the filtered queryset itself (the salary bands and
+the total share one conditional aggregate), so the cost does not depend on
+the number of facet values.
+"""
+
+from django.db.models import Count, Q
+
+# Salary bands in naira, upper bounds are exclusive
+SALARY_BANDS = (
+    (0, 100_000),
+    (100_000, 250_000),
+    (250_000, 500_000),
+    (500_000, 1_000_000),
+    (1_000_000, None),
+)
+
+
+def _counts(queryset, field, limit=None):
+    rows = (
+        queryset.filter(**{f"{field}__isnull": False})
+        .values(field)
+        .annotate(count=Count("pk", distinct=True))
+        .order_by("-count", field)
+    )
+    if limit:
+        rows = rows[:limit]
+    return [{"value": row[field], "count": row["count"]} for row in rows]
+
+
+def compute_facets(queryset, limit=20):
+    """
+    Return the facet counts of the jobs in `queryset`. Tag and skill facets
+    are limited to the `limit` most frequent values.
+    """
+    queryset = queryset.order_by()
+    bands = {
+        f"band_{index}": Count(
+            "pk",
+            distinct=True,
+            filter=Q(salary__gte=low * 100)
+            & (Q(salary__lt=high * 100) if high is not None else Q()),
+        )
+        for index, (low, high) in enumerate(SALARY_BANDS)
+    }
+    totals = queryset.aggregate(total=Count("pk", distinct=True), **bands)
+    return {
+        "total": totals["total"],
+        "employment_type": _counts(queryset, "employment_type"),
+        "tags": _counts(queryset, "tags__name", limit),
+        "skills": _counts(queryset, "job_skills__skill__name", limit),
+        "skill_level": _counts(queryset, "job_skills__skill_level"),
+        "salary": [
+            {"min": low, "max": high, "count": totals[f"band_{index}"]}
+            for index, (low, high) in enumerate(SALARY_BANDS)
+        ],
+    }
@@ -0,0 +1,292 @@
+"""
+Pre-rendered job feeds and sitemap.
+
+The latest approved, published, current jobs are rendered as RSS
+(jobs.rss), Atom (jobs.atom) and JSON Feed (jobs.json), and all of them by
+slug into a sitemap split in files of `sitemap_chunk_size` job ids
+(sitemap-<n>.xml) listed by a sitemap index (sitemap.xml). Every file is
+written atomically to JOB_FEED_ROOT next to a gzipped copy, and served from
+there by `serve_feed` without touching the database.
+
+Requests never write the files. `schedule_feed_update` records the jobs
+whose visibility or feed fields changed, as part of the transaction that
+changed them, and JobScheduler's next run regenerates the feeds and only the
+sitemap files covering those jobs (`FeedWriter.update_pending`). The
+build_job_feeds command rebuilds everything.
+"""
+
+import gzip
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Max
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+
+from .models import Job, JobFeedChange, JobStatus
+
+RSS = "jobs.rss"
+ATOM = "jobs.atom"
+JSON_FEED = "jobs.json"
+SITEMAP_INDEX = "sitemap.xml"
+SITEMAP_CHUNK_RE = re.compile(r"^sitemap-(\d+)\.xml$")
+
+# The fields of a visible job the feeds and sitemap render
+FEED_FIELDS = (
+    "slug",
+    "job_title",
+    "job_description",
+    "company_name",
+    "employment_type",
+    "published_at",
+    "created_at",
+)
+
+
+class FeedWriter:
+    feed_size = 50
+    sitemap_chunk_size = 10000  # Sitemap files are limited to 50,000 URLs
+    delete_batch_size = 500
+
+    title = "PyNigeria Jobs"
+    description = "The latest jobs approved on the PyNigeria job board."
+
+    @property
+    def root(self):
+        return Path(settings.JOB_FEED_ROOT)
+
+    @property
+    def base_url(self):
+        return settings.JOB_FEED_BASE_URL.rstrip("/")
+
+    def path(self, name):
+        return self.root / name
+
+    def job_url(self, slug):
+        return self.base_url + reverse("job-detail", kwargs={"slug": slug})
+
+    def feed_url(self, name):
+        return self.base_url + reverse("job-feed", kwargs={"name": name})
+
+    def visible_jobs(self):
+        return Job.objects.filter(
+            status=JobStatus.PUBLISHED, is_approved=True, is_current=True
+        )
+
+    def write(self, name, content):
+        """
+        Atomically replace `name` and its gzipped copy with `content`. An
+        unchanged file is left alone so its ETag stays valid.
+        """
+        try:
+            if self.path(name).read_bytes() == content:
+                return
+        except FileNotFoundError:
+            pass
+        self.root.mkdir(parents=True, exist_ok=True)
+        # mtime=0 keeps the compressed bytes identical for identical content
+        for target, data in (
+            (name, content),
+            (f"{name}.gz", gzip.compress(content, mtime=0)),
+        ):
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as tmp:
+                    tmp.write(data)
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, self.path(target))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+    def remove(self, name):
+        for target in (name, f"{name}.gz"):
+            try:
+                self.path(target).unlink()
+            except FileNotFoundError:
+                pass
+
+    def update(self, job_ids):
+        """
+        Regenerate the feeds and the sitemap files covering `job_ids`.
+        """
+        self.build_feeds()
+        self.build_sitemap_chunks(
+            {job_id // self.sitemap_chunk_size for job_id in job_ids}
+        )
+        self.build_sitemap_index()
+
+    def update_pending(self):
+        """
+        Regenerate the files of the jobs recorded by `schedule_feed_update`.
+        Returns the number of jobs covered.
+        """
+        changes = list(JobFeedChange.objects.values_list("id", "job_id"))
+        if not changes:
+            return 0
+        job_ids = {job_id for _, job_id in changes}
+        self.update(job_ids)
+        # Only the changes read are consumed: those committed meanwhile are
+        # left for the next run
+        change_ids = [change_id for change_id, _ in changes]
+        for start in range(0, len(change_ids), self.delete_batch_size):
+            JobFeedChange.objects.filter(
+                id__in=change_ids[start : start + self.delete_batch_size]
+            ).delete()
+        return len(job_ids)
+
+    def rebuild(self):
+        last_id = Job.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+        chunks = set(range(last_id // self.sitemap_chunk_size + 1))
+        for chunk in set(self.sitemap_chunks()) - chunks:
+            self.remove(f"sitemap-{chunk}.xml")
+        self.build_feeds()
+        self.build_sitemap_chunks(chunks)
+        self.build_sitemap_index()
+
+    def build_feeds(self):
+        jobs = list(
+            self.visible_jobs()
+            .order_by("-published_at", "-id")
+            .values(
+                "slug",
+                "job_title",
+                "job_description",
+                "company_name",
+                "employment_type",
+                "published_at",
+                "created_at",
+            )[: self.feed_size]
+        )
+        for job in jobs:
+            job["url"] = self.job_url(job["slug"])
+            job["title"] = f"{job['job_title']} at {job['company_name']}"
+            job["date"] = job["published_at"] or job["created_at"]
+
+        for name, feed_class in ((RSS, Rss201rev2Feed), (ATOM, Atom1Feed)):
+            feed = feed_class(
+                title=self.title,
+                link=self.base_url + "/",
+                description=self.description,
+                feed_url=self.feed_url(name),
+                language="en",
+            )
+            for job in jobs:
+                feed.add_item(
+                    title=job["title"],
+                    link=job["url"],
+                    description=job["job_description"],
+                    unique_id=job["url"],
+                    pubdate=job["date"],
+                    categories=[job["employment_type"]],
+                )
+            self.write(name, feed.writeString("utf-8").encode())
+
+        json_feed = {
+            "version": "https://jsonfeed.org/version/1.1",
+            "title": self.title,
+            "home_page_url": self.base_url + "/",
+            "feed_url": self.feed_url(JSON_FEED),
+            "description": self.description,
+            "items": [
+                {
+                    "id": job["url"],
+                    "url": job["url"],
+                    "title": job["title"],
+                    "content_text": job["job_description"],
+                    "date_published": job["date"].isoformat(),
+                    "tags": [job["employment_type"]],
+                }
+                for job in jobs
+            ],
+        }
+        self.write(JSON_FEED, json.dumps(json_feed).encode())
+
+    def sitemap_chunks(self):
+        if not self.root.exists():
+            return []
+        return sorted(
+            int(match.group(1))
+            for match in map(SITEMAP_CHUNK_RE.match, os.listdir(self.root))
+            if match
+        )
+
+    def build_sitemap_chunks(self, chunks):
+        for chunk in chunks:
+            start = chunk * self.sitemap_chunk_size
+            jobs = (
+                self.visible_jobs()
+                .filter(id__gte=start, id__lt=start + self.sitemap_chunk_size)
+                .order_by("id")
+                .values_list("slug", "published_at", "created_at")
+            )
+            urls = [
+                "<url><loc>{}</loc><lastmod>{}</lastmod></url>".format(
+                    escape(self.job_url(slug)),
+                    (published_at or created_at).date().isoformat(),
+                )
+                for slug, published_at, created_at in jobs
+            ]
+            name = f"sitemap-{chunk}.xml"
+            if not urls:
+                self.remove(name)
+                continue
+            self.write(
+                name,
+                (
+                    '<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+                    + "\n".join(urls)
+                    + "\n</urlset>\n"
+                ).encode(),
+            )
+
+    def build_sitemap_index(self):
+        entries = [
+            "<sitemap><loc>{}</loc></sitemap>".format(
+                escape(self.feed_url(f"sitemap-{chunk}.xml"))
+            )
+            for chunk in self.sitemap_chunks()
+        ]
+        self.write(
+            SITEMAP_INDEX,
+            (
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+                + "".join(f"{entry}\n" for entry in entries)
+                + "</sitemapindex>\n"
+            ).encode(),
+        )
+
+
+feed_writer = FeedWriter()
+
+
+def feed_state(job):
+    """
+    What the feeds and sitemap show of `job`: None unless it is visible.
+    Read from __dict__ so deferred fields are not loaded.
+    """
+    values = job.__dict__
+    if not (
+        values.get("status") == JobStatus.PUBLISHED
+        and values.get("is_approved")
+        and values.get("is_current")
+    ):
+        return None
+    return tuple(values.get(name) for name in FEED_FIELDS)
+
+
+def schedule_feed_update(job_ids):
+    """
+    Record that the feeds and the sitemap files of `job_ids` are stale. The
+    record commits or rolls back with the current transaction.
+    """
+    JobFeedChange.objects.bulk_create(
+        JobFeedChange(job_id=job_id) for job_id in set(job_ids)
+    )
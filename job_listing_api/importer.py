@@ -0,0 +1,264 @@
+"""
+Streaming bulk import of jobs from CSV or NDJSON.
+
+Rows are read lazily, validated with the same rules as JobSerializer and
+written one chunk at a time: every chunk is a single transaction that
+resolves companies, skills and tags in bulk and inserts jobs, job skills and
+tagged items with `bulk_create`. A bad row is reported and skipped, it never
+fails the rows around it.
+
+Bulk inserts do not send `post_save`, so imported jobs do not email the
+admins; the search index and the job list cache are refreshed per chunk.
+Rows are checked for near-duplicates of current jobs and of earlier rows of
+their chunk, and flagged or reported according to JOB_DUPLICATE_POLICY.
+
+NDJSON rows use the same shape as the create job API. CSV rows use the
+columns job_title, job_description, company_name, employment_type, salary,
+application_deadline and job_skills, with skills written as
+`python:Advanced|django:Beginner`.
+"""
+
+import csv
+import json
+import os
+import uuid
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .bulk import add_job_skills, resolve_companies
+from .cache import schedule_invalidation
+from .dedup import (
+    REJECT,
+    job_signature,
+    match_stored,
+    match_within,
+    store_fingerprints,
+)
+from .models import Job, SkillLevel
+from .search import schedule_index
+from .serializers import JobSerializer
+
+CSV_COLUMNS = (
+    "job_title",
+    "job_description",
+    "company_name",
+    "employment_type",
+    "salary",
+    "application_deadline",
+)
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)
+    max_errors: int = 100
+
+    def add_error(self, row, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+class JobImporter:
+    formats = ("csv", "ndjson")
+
+    def __init__(self, posted_by, format="csv", chunk_size=1000, max_errors=100):
+        if format not in self.formats:
+            raise ValueError(f"Unsupported import format: {format}")
+        self.posted_by = posted_by
+        self.format = format
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.serializer = JobSerializer()
+
+    @classmethod
+    def guess_format(cls, filename):
+        extension = os.path.splitext(filename or "")[1].lower()
+        return "ndjson" if extension in (".ndjson", ".jsonl", ".json") else "csv"
+
+    def run(self, lines, progress=None):
+        """
+        Import jobs from an iterable of text lines and return an ImportReport.
+        `progress` is called with the report after every chunk.
+        """
+        report = ImportReport(max_errors=self.max_errors)
+        chunk = []
+        for row, payload in self.read_rows(lines):
+            try:
+                chunk.append((row, self.validate(payload)))
+            except ValidationError as e:
+                report.add_error(row, e.detail)
+            if len(chunk) >= self.chunk_size:
+                self.write_chunk(chunk, report)
+                chunk = []
+                if progress:
+                    progress(report)
+        if chunk:
+            self.write_chunk(chunk, report)
+        if progress:
+            progress(report)
+        return report
+
+    def read_rows(self, lines):
+        """
+        Yield (row number, payload) pairs. Rows that cannot be parsed are
+        yielded with a ValidationError as their payload.
+        """
+        if self.format == "csv":
+            for row, record in enumerate(csv.DictReader(lines), start=1):
+                yield row, self.parse_csv_record(record)
+            return
+
+        row = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                payload = json.loads(line)
+            except ValueError as e:
+                payload = ValidationError({"non_field_errors": [f"Invalid JSON: {e}"]})
+            else:
+                if not isinstance(payload, dict):
+                    payload = ValidationError(
+                        {"non_field_errors": ["Each line must be a JSON object."]}
+                    )
+            yield row, payload
+
+    def parse_csv_record(self, record):
+        payload = {
+            column: record[column].strip()
+            for column in CSV_COLUMNS
+            if record.get(column) and record[column].strip()
+        }
+        job_skills = []
+        for entry in (record.get("job_skills") or "").split("|"):
+            if not entry.strip():
+                continue
+            name, _, level = entry.partition(":")
+            job_skills.append(
+                {"skill": {"name": name.strip()}, "skill_level": level.strip()}
+            )
+        payload["job_skills"] = job_skills
+        return payload
+
+    def validate(self, payload):
+        if isinstance(payload, ValidationError):
+            raise payload
+        attrs = self.serializer.run_validation(payload)
+
+        if not attrs.get("company_name"):
+            raise ValidationError({"company_name": ["This field is required."]})
+        for job_skill in attrs["job_skills"]:
+            if job_skill["skill_level"] not in SkillLevel.values:
+                raise ValidationError(
+                    {
+                        "job_skills": [
+                            f"\"{job_skill['skill_level']}\" is not a valid skill level."
+                        ]
+                    }
+                )
+        attrs["job_skills"] = self.serializer._skill_levels(attrs["job_skills"])
+        return attrs
+
+    def check_duplicates(self, chunk, report):
+        """
+        Fingerprint the chunk's rows and return the rows to write, each
+        carrying its signature and the job or earlier row it duplicates.
+        """
+        signatures = [
+            job_signature(attrs.get("job_title"), attrs.get("job_description"))
+            for row, attrs in chunk
+        ]
+        stored = match_stored(signatures)
+        within = match_within(signatures)
+        reject = settings.JOB_DUPLICATE_POLICY == REJECT
+        rows = []
+        for index, (row, attrs) in enumerate(chunk):
+            if within[index] is not None and stored[within[index]]:
+                stored[index] = stored[within[index]]
+                within[index] = None
+            if reject and (stored[index] or within[index] is not None):
+                duplicate = (
+                    f"row {chunk[within[index]][0]}"
+                    if within[index] is not None
+                    else "an existing listing"
+                )
+                report.add_error(
+                    row, {"non_field_errors": [f"This job duplicates {duplicate}."]}
+                )
+                continue
+            attrs["signature"] = signatures[index]
+            attrs["duplicate_of_id"] = stored[index]
+            attrs["duplicate_of_row"] = within[index]
+            rows.append((row, attrs))
+        return rows
+
+    def write_chunk(self, chunk, report):
+        chunk = self.check_duplicates(chunk, report)
+        if not chunk:
+            return
+        try:
+            with transaction.atomic():
+                jobs = self.write(attrs for row, attrs in chunk)
+        except Exception as e:
+            for row, attrs in chunk:
+                report.add_error(row, {"non_field_errors": [str(e)]})
+            return
+        report.created += len(jobs)
+
+    def write(self, rows):
+        """
+        Insert validated rows with a fixed number of queries and return the
+        created jobs. Must run inside a transaction.
+        """
+        rows = list(rows)
+        excluded = ("job_skills", "company", "signature", "duplicate_of_row")
+        companies = resolve_companies(attrs["company_name"] for attrs in rows)
+        jobs = Job.objects.bulk_create(
+            [
+                Job(
+                    **{
+                        name: value
+                        for name, value in attrs.items()
+                        if name not in excluded
+                    },
+                    company=companies[attrs["company_name"]],
+                    posted_by=self.posted_by,
+                    slug=uuid.uuid4(),
+                    published_at=None,
+                )
+                for attrs in rows
+            ]
+        )
+        add_job_skills({job: attrs["job_skills"] for job, attrs in zip(jobs, rows)})
+        store_fingerprints(
+            (job.id, attrs["signature"])
+            for job, attrs in zip(jobs, rows)
+            if "signature" in attrs
+        )
+        # Duplicates of rows of the same chunk only have an id to point to now
+        duplicates = []
+        for job, attrs in zip(jobs, rows):
+            if attrs.get("duplicate_of_row") is not None:
+                job.duplicate_of_id = jobs[attrs["duplicate_of_row"]].id
+                duplicates.append(job)
+        if duplicates:
+            Job.objects.bulk_update(duplicates, ["duplicate_of"])
+
+        schedule_index([job.id for job in jobs])
+        schedule_invalidation()
+        return jobs
@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand
+
+from job_listing_api.cache import bump_generation
+from job_listing_api.dedup import (
+    job_signature,
+    match_stored,
+    match_within,
+    store_fingerprints,
+)
+from job_listing_api.models import Job
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute the near-duplicate fingerprint of jobs that have none and flag "
+        "current jobs that duplicate an earlier one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of jobs fingerprinted per batch.",
+        )
+        parser.add_argument(
+            "--no-flag",
+            action="store_true",
+            help="Only store fingerprints, leave duplicate_of alone.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        flag = not options["no_flag"]
+        last_id = 0
+        fingerprinted = flagged = 0
+        while True:
+            jobs = list(
+                Job.objects.filter(id__gt=last_id, fingerprint__isnull=True)
+                .order_by("id")
+                .only("id", "job_title", "job_description", "is_current")[:chunk_size]
+            )
+            if not jobs:
+                break
+            last_id = jobs[-1].id
+            signatures = {
+                job.id: job_signature(job.job_title, job.job_description)
+                for job in jobs
+            }
+            if flag:
+                # Only current jobs are flagged, matched against older jobs
+                # fingerprinted before them: a newer job that already has a
+                # fingerprint never becomes the original of an older one
+                current = [job for job in jobs if job.is_current]
+                batch = [signatures[job.id] for job in current]
+                stored = match_stored(batch, before=[job.id for job in current])
+                within = match_within(batch)
+                duplicates = []
+                for index, job in enumerate(current):
+                    if within[index] is not None:
+                        duplicate_of_id = (
+                            stored[within[index]] or current[within[index]].id
+                        )
+                    else:
+                        duplicate_of_id = stored[index]
+                    if duplicate_of_id:
+                        job.duplicate_of_id = duplicate_of_id
+                        duplicates.append(job)
+                Job.objects.bulk_update(duplicates, ["duplicate_of"])
+                flagged += len(duplicates)
+            store_fingerprints(signatures.items())
+            fingerprinted += len(jobs)
+
+        if flagged:
+            bump_generation()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Fingerprinted {fingerprinted} jobs, flagged {flagged} duplicates."
+            )
+        )
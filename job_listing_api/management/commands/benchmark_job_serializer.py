@@ -0,0 +1,89 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from job_listing_api.compiled import CompiledJobSerializer
+from job_listing_api.models import Job
+from job_listing_api.views import JobViewset
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the latest current jobs with JobSerializer and with "
+        "CompiledJobSerializer, check that both produce the same bytes and "
+        "report the time each takes per job, queries included."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, default=500, help="Number of jobs rendered."
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of runs; the fastest one is reported.",
+        )
+
+    def handle(self, *args, **options):
+        job_ids = list(
+            Job.objects.filter(is_current=True)
+            .order_by("-created_at", "-id")
+            .values_list("id", flat=True)[: options["rows"]]
+        )
+        if not job_ids:
+            raise CommandError("There are no jobs to render.")
+
+        # Any host the site accepts, so that URLs can be built
+        host = next(
+            (host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"),
+            "localhost",
+        )
+        request = Request(RequestFactory().get("/", SERVER_NAME=host))
+        view = JobViewset(
+            request=request, action="job_list", format_kwarg=None, kwargs={}
+        )
+        context = view.get_serializer_context()
+        queryset = (
+            view.get_queryset().filter(id__in=job_ids).order_by("-created_at", "-id")
+        )
+
+        def render_serializer():
+            return view.get_serializer(queryset.all(), many=True).data
+
+        def render_compiled():
+            serializer = CompiledJobSerializer(context=context)
+            return serializer.render_many(serializer.values(queryset))
+
+        renderer = JSONRenderer()
+        if renderer.render(render_compiled()) != renderer.render(render_serializer()):
+            raise CommandError(
+                "CompiledJobSerializer output differs from JobSerializer."
+            )
+
+        timings = {}
+        for name, render in (
+            ("JobSerializer", render_serializer),
+            ("CompiledJobSerializer", render_compiled),
+        ):
+            best = None
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                render()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best / len(job_ids) * 1e6
+
+        speedup = timings["JobSerializer"] / timings["CompiledJobSerializer"]
+        self.stdout.write(
+            f"Rendered {len(job_ids)} jobs, best of {options['repeat']} runs:"
+        )
+        for name, per_job in timings.items():
+            self.stdout.write(f"  {name:<22} {per_job:9.1f} us/job")
+        self.stdout.write(
+            self.style.SUCCESS(f"Identical output, {speedup:.1f}x faster per job.")
+        )
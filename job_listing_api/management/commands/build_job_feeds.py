@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from job_listing_api.feeds import feed_writer
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the pre-rendered job feeds (RSS, Atom, JSON Feed) and the "
+        "sitemap from scratch."
+    )
+
+    def handle(self, *args, **options):
+        feed_writer.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote the job feeds and {len(feed_writer.sitemap_chunks())} "
+                f"sitemap files to {feed_writer.root}."
+            )
+        )
@@ -0,0 +1,102 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, models
+
+from job_listing_api.models import Company, Job, JobSkill, Skill
+
+
+class Command(BaseCommand):
+    help = (
+        "Convert Job.company and JobSkill.skill from foreign keys on the name "
+        "columns to integer foreign keys, rewriting the stored names as ids. "
+        "Run it once against databases created before the change, before "
+        "migrating. Relations that already use integer keys are skipped."
+    )
+
+    def handle(self, *args, **options):
+        converted = []
+        if self.convert_company():
+            converted.append("Job.company")
+        if self.convert_skill():
+            converted.append("JobSkill.skill")
+        if converted:
+            self.stdout.write(self.style.SUCCESS(f"Converted {', '.join(converted)}."))
+        else:
+            self.stdout.write("Nothing to convert.")
+
+    def uses_names(self, model, field_name):
+        """
+        Whether the column of `field_name` still holds names.
+        """
+        column = model._meta.get_field(field_name).column
+        with connection.cursor() as cursor:
+            description = connection.introspection.get_table_description(
+                cursor, model._meta.db_table
+            )
+        for row in description:
+            if row.name == column:
+                field_type = connection.introspection.get_field_type(row.type_code, row)
+                return field_type in ("CharField", "TextField")
+        return False
+
+    def name_field(self, model, field_name, to, on_delete, **kwargs):
+        """
+        The previous definition of `field_name`, keyed on `to.name`.
+        """
+        field = models.ForeignKey(to, on_delete=on_delete, to_field="name", **kwargs)
+        field.set_attributes_from_name(field_name)
+        field.model = model
+        return field
+
+    def convert_company(self):
+        if not self.uses_names(Job, "company"):
+            return False
+        # Company is nullable, so jobs naming no known company are left
+        # without one
+        self.rewrite_names_as_ids(
+            Job,
+            self.name_field(Job, "company", Company, models.SET_NULL, null=True),
+            null=True,
+        )
+        return True
+
+    def convert_skill(self):
+        if not self.uses_names(JobSkill, "skill"):
+            return False
+        # The skill is required, so rows naming no known skill are deleted
+        self.rewrite_names_as_ids(
+            JobSkill, self.name_field(JobSkill, "skill", Skill, models.CASCADE)
+        )
+        return True
+
+    def rewrite_names_as_ids(self, model, name_field, null=False):
+        """
+        Rewrite the names stored by `name_field` as ids in place: the column
+        drops its foreign key, takes the ids with one UPDATE and is then
+        retyped to the model's current field, without the rows leaving the
+        database.
+        """
+        field = model._meta.get_field(name_field.name)
+        table = connection.ops.quote_name(model._meta.db_table)
+        column = connection.ops.quote_name(field.column)
+        target_table = connection.ops.quote_name(field.related_model._meta.db_table)
+        plain_field = models.CharField(
+            max_length=name_field.target_field.max_length,
+            null=null,
+            db_column=field.column,
+        )
+        plain_field.set_attributes_from_name(name_field.name)
+        plain_field.model = model
+
+        with connection.schema_editor() as editor:
+            editor.alter_field(model, name_field, plain_field)
+            if not null:
+                editor.execute(
+                    f"DELETE FROM {table} WHERE {column} NOT IN "
+                    f"(SELECT name FROM {target_table})"
+                )
+            editor.execute(
+                f"UPDATE {table} SET {column} = (SELECT target.id "
+                f"FROM {target_table} target WHERE target.name = "
+                f"{table}.{column})"
+            )
+            editor.alter_field(model, plain_field, field)
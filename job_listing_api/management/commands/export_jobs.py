@@ -0,0 +1,60 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from job_listing_api.export import JobExporter, parse_since
+
+
+class Command(BaseCommand):
+    help = (
+        "Export published jobs as NDJSON or CSV, streaming them in chunks so "
+        "memory use does not grow with the number of jobs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to write, or - to write stdout.")
+        parser.add_argument(
+            "--format",
+            choices=JobExporter.formats,
+            default="ndjson",
+            help="Output format.",
+        )
+        parser.add_argument(
+            "--since",
+            help="Only export jobs changed since this ISO 8601 date or time, "
+            "followed by tombstones for removed jobs in NDJSON.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Number of jobs read per batch.",
+        )
+
+    def handle(self, *args, **options):
+        since = options["since"]
+        if since:
+            since = parse_since(since)
+            if since is None:
+                raise CommandError("--since must be an ISO 8601 date or time.")
+
+        exporter = JobExporter(
+            format=options["format"], since=since, chunk_size=options["chunk_size"]
+        )
+        path = options["path"]
+        if path == "-":
+            self.write(exporter, sys.stdout)
+        else:
+            try:
+                with open(path, "w", newline="", encoding="utf-8") as output:
+                    self.write(exporter, output)
+            except OSError as e:
+                raise CommandError(str(e))
+        message = f"Exported {exporter.exported} jobs"
+        if exporter.since is not None and exporter.format == "ndjson":
+            message += f" and {exporter.deleted} tombstones"
+        self.stderr.write(self.style.SUCCESS(f"{message}."))
+
+    def write(self, exporter, output):
+        for line in exporter.render():
+            output.write(line)
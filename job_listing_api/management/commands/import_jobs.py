@@ -0,0 +1,80 @@
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from job_listing_api.importer import JobImporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Import jobs from a CSV or NDJSON file, streaming it in chunks that "
+        "are each committed in one transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - to read stdin.")
+        parser.add_argument(
+            "--posted-by",
+            required=True,
+            help="Email of the user the imported jobs are posted by.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=JobImporter.formats,
+            help="Input format. Guessed from the file extension by default.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of rows validated and written per transaction.",
+        )
+        parser.add_argument(
+            "--max-errors",
+            type=int,
+            default=100,
+            help="Number of row errors to report.",
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            posted_by = User.objects.get(email=options["posted_by"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['posted_by']}.")
+
+        path = options["path"]
+        importer = JobImporter(
+            posted_by=posted_by,
+            format=options["format"] or JobImporter.guess_format(path),
+            chunk_size=options["chunk_size"],
+            max_errors=options["max_errors"],
+        )
+
+        def progress(report):
+            self.stdout.write(
+                f"{report.created} jobs imported, {report.failed} rows failed."
+            )
+
+        if path == "-":
+            report = importer.run(sys.stdin, progress=progress)
+        else:
+            try:
+                with open(path, newline="", encoding="utf-8-sig") as lines:
+                    report = importer.run(lines, progress=progress)
+            except OSError as e:
+                raise CommandError(str(e))
+
+        for error in report.errors:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+        if report.failed > len(report.errors):
+            self.stderr.write(
+                f"{report.failed - len(report.errors)} more row errors not shown."
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report.created} jobs, {report.failed} rows failed."
+            )
+        )
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, Max, OuterRef
+
+from job_listing_api.cache import bump_generation
+from job_listing_api.models import Job
+from job_listing_api.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill Job.is_current: a job is current unless a newer revision "
+        "was created from it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Number of job ids updated per statement.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        last_id = Job.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+        updated = 0
+        for start in range(0, last_id, chunk_size):
+            updated += Job.objects.filter(
+                id__gt=start, id__lte=start + chunk_size
+            ).update(
+                is_current=~Exists(Job.objects.filter(original_job=OuterRef("pk")))
+            )
+
+        get_search_backend().rebuild()
+        bump_generation()
+        self.stdout.write(
+            self.style.SUCCESS(f"Marked the current revision of {updated} jobs.")
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from job_listing_api.cache import bump_generation
+from job_listing_api.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Create the job search index if needed and rebuild it from the Job table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of jobs indexed per batch.",
+        )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.ensure_schema()
+        backend.rebuild(chunk_size=options["chunk_size"])
+        bump_generation()
+        self.stdout.write(self.style.SUCCESS("Job search index rebuilt."))
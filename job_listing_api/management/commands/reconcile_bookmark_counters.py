@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from job_listing_api.bookmark_stats import bookmark_counters
+
+
+class Command(BaseCommand):
+    help = "Recount users' bookmarks and repair drifted bookmark counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            dest="emails",
+            action="append",
+            default=[],
+            help="Email of a user to reconcile. Repeat for more; all by default.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of users reconciled per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.order_by("id")
+        if options["emails"]:
+            users = users.filter(email__in=options["emails"])
+        last_id = ""
+        repaired = 0
+        while True:
+            user_ids = list(
+                users.filter(id__gt=last_id).values_list("id", flat=True)[
+                    : options["chunk_size"]
+                ]
+            )
+            if not user_ids:
+                break
+            repaired += bookmark_counters.reconcile(user_ids)
+            last_id = user_ids[-1]
+        self.stdout.write(self.style.SUCCESS(f"Repaired {repaired} bookmark counters."))
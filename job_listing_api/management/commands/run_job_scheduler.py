@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+
+from job_listing_api.scheduler import JobScheduler
+
+
+class Command(BaseCommand):
+    help = (
+        "Publish approved jobs whose scheduled publish time has passed and "
+        "expire jobs past their application deadline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of jobs moved per UPDATE.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="Seconds to sleep between batches.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=60,
+            help="Seconds to sleep between runs.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the transitions once and exit instead of looping.",
+        )
+
+    def handle(self, *args, **options):
+        scheduler = JobScheduler(
+            batch_size=options["batch_size"], pause=options["pause"]
+        )
+        if options["once"]:
+            counts = scheduler.run(once=True)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Published {counts['published']} jobs, "
+                    f"expired {counts['expired']} jobs."
+                )
+            )
+            return
+        self.stdout.write("Job scheduler started.")
+        try:
+            scheduler.run(interval=options["interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS("Job scheduler stopped."))
@@ -42,9 +42,6 @@ class JobBookmarkStatus(models.TextChoices):
     ARCHIVED = "Archived"
 
 
-
-
-
 class Company(models.Model):
     name = models.CharField(max_length=255, unique=True)
     location = models.CharField(max_length=255, null=True)
@@ -54,15 +51,16 @@ class Company(models.Model):
     def __str__(self) -> str:
         return self.name
 
+
 class Skill(models.Model):
     name = models.CharField(max_length=255, unique=True)
 
     def __str__(self) -> str:
         return self.name
+
+
 class Job(models.Model):
-    company = models.ForeignKey(
-        Company, on_delete=models.SET_NULL, null=True, to_field="name"
-    )
+    company = models.ForeignKey(Company, on_delete=models.SET_NULL, null=True)
     company_name = models.CharField(max_length=255)
     job_title = models.CharField(max_length=255)
     job_description = models.TextField()
@@ -84,13 +82,14 @@ class Job(models.Model):
 
     # Scheduling and expiry
     published_at = models.DateTimeField(null=True, blank=True)
+    scheduled_publish_at = models.DateTimeField(null=True, blank=True)
     application_deadline = models.DateTimeField(null=True)
 
     employment_type = models.CharField(
         max_length=255, choices=JobTypeChoice.choices, default=JobTypeChoice.FULL_TIME
     )
 
-    salary = models.DecimalField(max_digits=17, decimal_places=2, null=True)
+    salary = models.BigIntegerField(null=True)  # In kobo
 
     # Tracking and metrics
     posted_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -107,8 +106,32 @@ class Job(models.Model):
         db_index=True,
     )
     version = models.IntegerField(default=1)
+    # Only the latest revision of a job is current, see JobSerializer.update
+    is_current = models.BooleanField(default=True)
+    # Set when the job was posted as a near-duplicate, see job_listing_api.dedup
+    duplicate_of = models.ForeignKey(
+        "self",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="duplicates",
+    )
+    # Moderation queue lease, see job_listing_api.moderation
+    claimed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="claimed_jobs",
+    )
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    # When a moderator approved or rejected the job; decided jobs leave the queue
+    moderated_at = models.DateTimeField(null=True, blank=True)
     # existing fields
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Last change to what the job shows or whether it is listed. Writes through
+    # QuerySet.update set it themselves; incremental exports filter on it.
+    changed_at = models.DateTimeField(auto_now=True, db_index=True)
     slug = models.UUIDField(unique=True, db_index=True)
 
     is_approved = models.BooleanField(default=False)
@@ -124,14 +147,79 @@ class Job(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=["original_job", "version"]),  # Composite index
+            # Keyset pagination over current revisions only
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(is_current=True),
+                name="job_current_created_idx",
+            ),
+            # Salary range filters and keyset pagination by salary
+            models.Index(
+                fields=["salary", "created_at", "id"],
+                condition=models.Q(is_current=True),
+                name="job_current_salary_idx",
+            ),
+            # JobScheduler transitions
+            models.Index(
+                fields=["status", "scheduled_publish_at"],
+                name="job_status_publish_idx",
+            ),
+            models.Index(
+                fields=["status", "application_deadline"],
+                name="job_status_deadline_idx",
+            ),
+            # Moderation queue, oldest unapproved job first
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(
+                    is_approved=False, is_current=True, moderated_at__isnull=True
+                ),
+                name="job_moderation_queue_idx",
+            ),
         ]
 
 
+class JobFingerprint(models.Model):
+    """
+    MinHash signature of a job's title and description and its LSH band
+    keys, for near-duplicate lookups. See job_listing_api.dedup.
+    """
+
+    job = models.OneToOneField(
+        Job, on_delete=models.CASCADE, primary_key=True, related_name="fingerprint"
+    )
+    signature = models.BinaryField()
+    band_0 = models.IntegerField(db_index=True)
+    band_1 = models.IntegerField(db_index=True)
+    band_2 = models.IntegerField(db_index=True)
+    band_3 = models.IntegerField(db_index=True)
+    band_4 = models.IntegerField(db_index=True)
+    band_5 = models.IntegerField(db_index=True)
+    band_6 = models.IntegerField(db_index=True)
+    band_7 = models.IntegerField(db_index=True)
+
+    def __str__(self):
+        return f"Fingerprint of job {self.job_id}"
+
+
+class JobFeedChange(models.Model):
+    """
+    A job whose feed and sitemap entries are stale, recorded in the
+    transaction that changed it and consumed by JobScheduler. See
+    job_listing_api.feeds.
+    """
+
+    # Not a foreign key: a deleted job must still leave the sitemap
+    job_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Feed change of job {self.job_id}"
+
+
 class JobSkill(models.Model):
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="job_skills")
-    skill = models.ForeignKey(
-        Skill, on_delete=models.CASCADE, to_field="name"
-    )  # References the `name` field of Skill
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE)
     skill_level = models.CharField(
         max_length=255, choices=SkillLevel.choices, default=SkillLevel.BEGINNER
     )
@@ -196,7 +284,48 @@ class Bookmark(models.Model):
         indexes = [
             models.Index(fields=["user", "status"]),
             models.Index(fields=["created_at"]),
+            models.Index(fields=["user", "created_at", "id"]),  # Keyset pagination
         ]
 
     def __str__(self):
         return f"{self.user.email} bookmarked this job"
+
+
+class BookmarkCounter(models.Model):
+    """
+    Number of a user's bookmarks in a folder (or in no folder) with a status,
+    maintained by job_listing_api.bookmark_stats.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="bookmark_counters",
+    )
+    folder = models.ForeignKey(
+        BookmarkFolder,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="counters",
+    )
+    status = models.CharField(max_length=20, choices=JobBookmarkStatus.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "folder", "status"],
+                condition=models.Q(folder__isnull=False),
+                name="bookmark_counter_folder_uniq",
+            ),
+            # NULL folders are never equal to each other in a unique index
+            models.UniqueConstraint(
+                fields=["user", "status"],
+                condition=models.Q(folder__isnull=True),
+                name="bookmark_counter_unfiled_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.folder_id} {self.status}: {self.count}"
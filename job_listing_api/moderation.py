@@ -0,0 +1,91 @@
+"""
+Moderation work queue.
+
+Current jobs no moderator has decided on yet are handed out to moderators
+in batches, oldest first. Claiming a batch sets `claimed_by` and a
+`claimed_until` lease of JOB_MODERATION_LEASE seconds on its jobs: until the
+lease runs out no other moderator is handed them or may decide on them, and
+once it does they are back in the queue, so an abandoned batch is not lost.
+Deciding on a job releases its claim and sets `moderated_at`, which takes it
+out of the queue for good, rejected or not.
+
+Where the database supports it the candidate rows are locked with
+SELECT ... FOR UPDATE SKIP LOCKED, so concurrent claims pass over each
+other's rows instead of waiting for them. SQLite has neither row locks nor
+SKIP LOCKED but runs one writer at a time: there the claim is a single
+UPDATE of the first `batch_size` unclaimed rows, read back by their lease.
+Either way a claim walks job_moderation_queue_idx and touches about
+`batch_size` rows, not the whole queue.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+
+
+class ModerationQueue:
+    @property
+    def lease(self):
+        return timedelta(seconds=settings.JOB_MODERATION_LEASE)
+
+    def pending(self):
+        return Job.objects.filter(
+            is_approved=False, is_current=True, moderated_at__isnull=True
+        )
+
+    def available(self, now):
+        return (
+            self.pending()
+            .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lte=now))
+            .order_by("created_at", "id")
+        )
+
+    def claim(self, user, batch_size):
+        """
+        Claim up to `batch_size` jobs nobody else holds for `user` and return
+        them, oldest first.
+        """
+        now = timezone.now()
+        claimed_until = now + self.lease
+        candidates = self.available(now)
+        with transaction.atomic():
+            if connection.features.has_select_for_update_skip_locked:
+                job_ids = list(
+                    candidates.select_for_update(skip_locked=True).values_list(
+                        "id", flat=True
+                    )[:batch_size]
+                )
+                claimed = Job.objects.filter(id__in=job_ids)
+            else:
+                # A single statement, run under SQLite's database write lock
+                claimed = Job.objects.filter(
+                    id__in=candidates.values("id")[:batch_size]
+                )
+            claimed.update(claimed_by=user, claimed_until=claimed_until)
+        return Job.objects.filter(
+            claimed_by=user, claimed_until=claimed_until
+        ).order_by("created_at", "id")
+
+    def held_by_other(self, user, claimed_by_id, claimed_until, now):
+        """
+        Whether a job with this claim is held by a moderator other than `user`.
+        """
+        return claimed_by_id not in (None, user.pk) and claimed_until > now
+
+    def release(self, user, slugs=None):
+        """
+        Give back the jobs `user` holds, or only those in `slugs`. Returns the
+        number of jobs released.
+        """
+        claimed = Job.objects.filter(claimed_by=user)
+        if slugs is not None:
+            claimed = claimed.filter(slug__in=slugs)
+        return claimed.update(claimed_by=None, claimed_until=None)
+
+
+moderation_queue = ModerationQueue()
@@ -0,0 +1,199 @@
+"""
+"Recommended for you" job scoring.
+
+Every current published job is a sparse row of skill weights (the job's
+skill levels, L2 normalized). `SkillMatrix` keeps those rows and their
+transpose, a posting list per skill, in memory. A user's profile is the
+normalized sum of the rows of the jobs they bookmarked, weighted by how far
+they took each bookmark, and all jobs are scored against it with one sparse
+matrix-vector product over the postings of the profile's skills.
+
+The matrix is built on first use and then kept in sync incrementally: when
+the jobs cache generation moves (jobs are published, expire or are edited),
+only the rows of jobs that entered or left the published set are loaded or
+dropped, and only the posting lists of their skills are copied. The check
+runs at most once every `refresh_interval` seconds.
+"""
+
+import heapq
+import math
+import threading
+import time
+from collections import defaultdict
+
+from .cache import get_generation
+from .models import (
+    Bookmark,
+    Job,
+    JobBookmarkStatus,
+    JobSkill,
+    JobStatus,
+    SkillLevel,
+)
+
+SKILL_LEVEL_WEIGHTS = {
+    SkillLevel.BEGINNER: 1.0,
+    SkillLevel.INTERMIDIATE: 2.0,
+    SkillLevel.ADVANCED: 3.0,
+}
+
+BOOKMARK_STATUS_WEIGHTS = {
+    JobBookmarkStatus.SAVED: 1.0,
+    JobBookmarkStatus.APPLIED: 2.0,
+    JobBookmarkStatus.INTERVIEWING: 3.0,
+    JobBookmarkStatus.OFFERED: 3.0,
+    JobBookmarkStatus.REJECTED: 0.5,
+    JobBookmarkStatus.ARCHIVED: 0.0,
+}
+
+
+def skill_vectors(job_skills):
+    """
+    Build normalized {job_id: {skill_id: weight}} rows from (job_id,
+    skill_id, skill_level) tuples.
+    """
+    rows = defaultdict(dict)
+    for job_id, skill_id, skill_level in job_skills:
+        rows[job_id][skill_id] = SKILL_LEVEL_WEIGHTS.get(skill_level, 1.0)
+    for row in rows.values():
+        norm = math.sqrt(sum(weight * weight for weight in row.values()))
+        for skill_id in row:
+            row[skill_id] /= norm
+    return rows
+
+
+class SkillMatrix:
+    refresh_interval = 30
+
+    def __init__(self):
+        self._rows = {}  # job_id -> {skill_id: weight}
+        self._postings = {}  # skill_id -> {job_id: weight}
+        self._generation = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def published_jobs(self):
+        return Job.objects.filter(status=JobStatus.PUBLISHED, is_current=True)
+
+    def refresh(self, force=False):
+        """
+        Bring the matrix in line with the published jobs if the jobs changed
+        since the last check.
+        """
+        if not (force or self._check_due()):
+            return
+        with self._lock:
+            if not (force or self._check_due()):
+                return
+            generation = get_generation()
+            if force or generation != self._generation:
+                self._sync()
+                self._generation = generation
+            self._checked_at = time.monotonic()
+
+    def _check_due(self):
+        return (
+            self._checked_at is None
+            or time.monotonic() - self._checked_at >= self.refresh_interval
+        )
+
+    def _sync(self):
+        published = set(self.published_jobs().values_list("id", flat=True))
+        rows = self._rows
+        removed = rows.keys() - published
+        added = published - rows.keys()
+        if not (removed or added):
+            return
+        new_rows = {}
+        if added:
+            new_rows = skill_vectors(
+                JobSkill.objects.filter(job_id__in=added).values_list(
+                    "job_id", "skill_id", "skill_level"
+                )
+            )
+
+        # Readers may be iterating the current posting lists, so each one this
+        # sync touches is copied once and the untouched ones are shared
+        postings = dict(self._postings)
+        copied = set()
+
+        def posting(skill_id):
+            if skill_id not in copied:
+                copied.add(skill_id)
+                postings[skill_id] = dict(postings.get(skill_id, ()))
+            return postings[skill_id]
+
+        for job_id in removed:
+            for skill_id in rows[job_id]:
+                posting(skill_id).pop(job_id, None)
+        for job_id in added:
+            for skill_id, weight in new_rows.get(job_id, {}).items():
+                posting(skill_id)[job_id] = weight
+        for skill_id in copied:
+            if not postings[skill_id]:
+                del postings[skill_id]
+
+        # Readers keep using the previous postings until the new ones are
+        # complete. Rows are only read under the lock and are updated in place.
+        self._postings = postings
+        for job_id in removed:
+            del rows[job_id]
+        for job_id in added:
+            # Jobs without skills keep an empty row so they are not loaded
+            # again on every sync
+            rows[job_id] = new_rows.get(job_id, {})
+
+    def reset(self):
+        with self._lock:
+            self._rows, self._postings = {}, {}
+            self._generation = self._checked_at = None
+
+    def profile(self, user):
+        """
+        The user's normalized {skill_id: weight} profile, from their bookmarks.
+        """
+        statuses = dict(
+            Bookmark.objects.filter(user=user).values_list("job_id", "status")
+        )
+        if not statuses:
+            return {}, statuses
+        rows = skill_vectors(
+            JobSkill.objects.filter(job_id__in=statuses).values_list(
+                "job_id", "skill_id", "skill_level"
+            )
+        )
+        profile = defaultdict(float)
+        for job_id, row in rows.items():
+            weight = BOOKMARK_STATUS_WEIGHTS.get(statuses[job_id], 1.0)
+            for skill_id, value in row.items():
+                profile[skill_id] += weight * value
+        norm = math.sqrt(sum(value * value for value in profile.values()))
+        if not norm:
+            return {}, statuses
+        profile = {skill_id: value / norm for skill_id, value in profile.items()}
+        return profile, statuses
+
+    def recommend(self, user, limit=10):
+        """
+        Return up to `limit` (job_id, score) pairs, best first, leaving out
+        jobs the user already bookmarked.
+        """
+        self.refresh()
+        profile, bookmarked = self.profile(user)
+        postings = self._postings
+        scores = defaultdict(float)
+        for skill_id, weight in profile.items():
+            for job_id, value in postings.get(skill_id, {}).items():
+                scores[job_id] += weight * value
+        for job_id in bookmarked:
+            scores.pop(job_id, None)
+        # Newer jobs (higher ids) win ties
+        return heapq.nlargest(
+            limit, scores.items(), key=lambda item: (item[1], item[0])
+        )
+
+
+skill_matrix = SkillMatrix()
@@ -0,0 +1,118 @@
+"""
+Time based job status transitions.
+
+`JobScheduler` publishes approved drafts whose `scheduled_publish_at` has
+passed and expires published jobs whose `application_deadline` has passed.
+Both transitions select a bounded batch of ids through the
+(status, scheduled_publish_at) and (status, application_deadline) indexes and
+move them with one UPDATE that re-checks the transition's predicate, so each
+statement holds its locks briefly and never touches rows that stopped
+matching in the meantime. Each run then regenerates the job feeds and the
+sitemap files of the jobs changed since the previous run, so requests never
+wait on them.
+"""
+
+import logging
+import time
+
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import schedule_invalidation
+from .feeds import feed_writer, schedule_feed_update
+from .models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+
+class JobScheduler:
+    def __init__(self, batch_size=500, pause=0):
+        self.batch_size = batch_size
+        self.pause = pause
+
+    def due_for_publishing(self, now):
+        return Job.objects.filter(
+            status=JobStatus.DRAFT,
+            scheduled_publish_at__lte=now,
+            is_approved=True,
+            is_current=True,
+        )
+
+    def past_deadline(self, now):
+        return Job.objects.filter(
+            status=JobStatus.PUBLISHED, application_deadline__lt=now
+        )
+
+    def publish_due(self, now=None):
+        """
+        Publish approved drafts whose publish time has come. Returns the
+        number of jobs published.
+        """
+        now = now or timezone.now()
+        return self._transition(
+            self.due_for_publishing(now),
+            "scheduled_publish_at",
+            status=JobStatus.PUBLISHED,
+            published_at=F("scheduled_publish_at"),
+        )
+
+    def expire_past_deadline(self, now=None):
+        """
+        Expire published jobs past their application deadline. Returns the
+        number of jobs expired.
+        """
+        now = now or timezone.now()
+        return self._transition(
+            self.past_deadline(now), "application_deadline", status=JobStatus.EXPIRED
+        )
+
+    def run_once(self, now=None):
+        now = now or timezone.now()
+        counts = {
+            "published": self.publish_due(now),
+            "expired": self.expire_past_deadline(now),
+        }
+        try:
+            counts["feeds"] = feed_writer.update_pending()
+        except Exception:
+            # The changes stay recorded and are retried on the next run
+            logger.exception("Failed to update the job feeds")
+            counts["feeds"] = 0
+        return counts
+
+    def run(self, interval=60, once=False):
+        while True:
+            counts = self.run_once()
+            if any(counts.values()):
+                logger.info(
+                    "Published %(published)s jobs, expired %(expired)s jobs, "
+                    "updated the feeds of %(feeds)s jobs",
+                    counts,
+                )
+            if once:
+                return counts
+            close_old_connections()
+            time.sleep(interval)
+
+    def _transition(self, queryset, order_field, **changes):
+        total = 0
+        while True:
+            with transaction.atomic():
+                job_ids = list(
+                    queryset.order_by(order_field, "id").values_list("id", flat=True)[
+                        : self.batch_size
+                    ]
+                )
+                if not job_ids:
+                    return total
+                moved = queryset.filter(id__in=job_ids).update(
+                    changed_at=timezone.now(), **changes
+                )
+                schedule_invalidation()
+                schedule_feed_update(job_ids)
+            total += moved
+            if len(job_ids) < self.batch_size:
+                return total
+            if self.pause:
+                time.sleep(self.pause)
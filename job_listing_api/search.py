@@ -0,0 +1,302 @@
+"""
+Full-text search over jobs.
+
+Each job is flattened into a search document (title, employment type,
+company, tags and skills with their levels) kept in a side table next to
+the Job table. SQLite stores it in an FTS5 virtual table and Postgres in a
+tsvector column behind a GIN index. Other databases fall back to the old
+chained `icontains` lookups.
+
+Documents are refreshed after the transaction that changed a job commits,
+see `schedule_index`.
+"""
+
+import abc
+import re
+import threading
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import F, FloatField, Func, Q, Value
+from django.db.models.expressions import RawSQL
+from taggit.models import TaggedItem
+
+from .models import Job, JobSkill
+
+SEARCH_TABLE = "job_listing_api_job_search"
+
+_pending = threading.local()
+
+
+def tokenize(term):
+    return re.findall(r"\w+", term.lower())
+
+
+class SearchRank(Func):
+    """
+    Correlated subquery ranking each job against the search table. `sql`
+    refers to the outer job's id as `{job_id}`, so the column stays correct
+    when the queryset is relabeled as a subquery.
+    """
+
+    output_field = FloatField()
+
+    def __init__(self, sql, params):
+        super().__init__(F("pk"))
+        self.sql, self.params = sql, params
+
+    def as_sql(self, compiler, connection, **extra_context):
+        job_id, job_id_params = compiler.compile(self.get_source_expressions()[0])
+        return self.sql.format(job_id=job_id), [*self.params, *job_id_params]
+
+
+def build_documents(job_ids):
+    """
+    Return a search document per current job in `job_ids`. Superseded
+    revisions have no document, so indexing them drops them from the index.
+    """
+    documents = {
+        job["id"]: {
+            "job_title": job["job_title"],
+            "employment_type": job["employment_type"],
+            "company_name": job["company_name"] or "",
+            "tags": [],
+            "skills": [],
+        }
+        for job in Job.objects.filter(id__in=job_ids, is_current=True).values(
+            "id", "job_title", "employment_type", "company_name"
+        )
+    }
+    if not documents:
+        return documents
+
+    for job_id, name, level in JobSkill.objects.filter(
+        job_id__in=documents
+    ).values_list("job_id", "skill__name", "skill_level"):
+        documents[job_id]["skills"].extend([name, level])
+
+    for job_id, name in TaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(Job),
+        object_id__in=documents,
+    ).values_list("object_id", "tag__name"):
+        documents[job_id]["tags"].append(name)
+
+    for document in documents.values():
+        document["tags"] = " ".join(document["tags"])
+        document["skills"] = " ".join(document["skills"])
+    return documents
+
+
+class BaseSearchBackend(abc.ABC):
+    columns = ("job_title", "employment_type", "company_name", "tags", "skills")
+
+    def ensure_schema(self):
+        pass
+
+    def index(self, job_ids):
+        pass
+
+    def rebuild(self, chunk_size=1000):
+        job_ids = (
+            Job.objects.filter(is_current=True)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        self.clear()
+        chunk = []
+        for job_id in job_ids.iterator(chunk_size=chunk_size):
+            chunk.append(job_id)
+            if len(chunk) == chunk_size:
+                self.index(chunk)
+                chunk = []
+        if chunk:
+            self.index(chunk)
+
+    def clear(self):
+        pass
+
+    @abc.abstractmethod
+    def filter(self, queryset, terms):
+        """
+        Restrict `queryset` to jobs matching any of `terms` and annotate each
+        job with a `search_rank`, higher is better.
+        """
+
+
+class IContainsSearchBackend(BaseSearchBackend):
+    def filter(self, queryset, terms):
+        search_filter = Q()
+        for term in terms:
+            search_filter |= (
+                Q(job_title__icontains=term)
+                | Q(employment_type__icontains=term)
+                | Q(tags__name__icontains=term)
+                | Q(job_skills__skill_level__icontains=term)
+            )
+        return (
+            queryset.filter(search_filter)
+            .distinct()
+            .annotate(search_rank=Value(0.0, output_field=FloatField()))
+        )
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    # Relative bm25 weight of each column, in the order of `columns`
+    weights = (10.0, 2.0, 2.0, 5.0, 5.0)
+
+    def ensure_schema(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+                f"{', '.join(self.columns)}, tokenize='unicode61')"
+            )
+
+    def index(self, job_ids):
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+        documents = build_documents(job_ids)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN "
+                f"({', '.join(['%s'] * len(job_ids))})",
+                job_ids,
+            )
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(self.columns)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(self.columns))})",
+                [
+                    [job_id, *(document[column] for column in self.columns)]
+                    for job_id, document in documents.items()
+                ],
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+
+    def build_query(self, terms):
+        """
+        Comma separated terms are ORed, words within a term are ANDed and
+        matched as prefixes, e.g. `py dev, remote` -> `("py"* AND "dev"*) OR ("remote"*)`.
+        """
+        clauses = [
+            "(" + " AND ".join(f'"{token}"*' for token in tokenize(term)) + ")"
+            for term in terms
+            if tokenize(term)
+        ]
+        return " OR ".join(clauses)
+
+    def filter(self, queryset, terms):
+        match = self.build_query(terms)
+        if not match:
+            return queryset.none()
+        weights = ", ".join(str(weight) for weight in self.weights)
+        matching = f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s"
+        return queryset.filter(id__in=RawSQL(matching, [match])).annotate(
+            search_rank=SearchRank(
+                f"(SELECT -bm25({SEARCH_TABLE}, {weights}) FROM {SEARCH_TABLE} "
+                f"WHERE {SEARCH_TABLE} MATCH %s AND {SEARCH_TABLE}.rowid = {{job_id}})",
+                [match],
+            )
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    config = "simple"
+    # tsvector weight of each column, in the order of `columns`
+    weights = ("A", "C", "C", "B", "B")
+
+    def ensure_schema(self):
+        job_table = connection.ops.quote_name(Job._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+                f"job_id bigint PRIMARY KEY REFERENCES {job_table} (id) "
+                "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_gin "
+                f"ON {SEARCH_TABLE} USING gin (document)"
+            )
+
+    def index(self, job_ids):
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+        documents = build_documents(job_ids)
+        vector = " || ".join(
+            f"setweight(to_tsvector('{self.config}', %s), '{weight}')"
+            for weight in self.weights
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {SEARCH_TABLE} WHERE job_id = ANY(%s)", [job_ids]
+            )
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (job_id, document) VALUES (%s, {vector})",
+                [
+                    [job_id, *(document[column] for column in self.columns)]
+                    for job_id, document in documents.items()
+                ],
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {SEARCH_TABLE}")
+
+    def build_query(self, terms):
+        clauses = [
+            "(" + " & ".join(f"{token}:*" for token in tokenize(term)) + ")"
+            for term in terms
+            if tokenize(term)
+        ]
+        return " | ".join(clauses)
+
+    def filter(self, queryset, terms):
+        query = self.build_query(terms)
+        if not query:
+            return queryset.none()
+        tsquery = f"to_tsquery('{self.config}', %s)"
+        matching = f"SELECT job_id FROM {SEARCH_TABLE} WHERE document @@ {tsquery}"
+        return queryset.filter(id__in=RawSQL(matching, [query])).annotate(
+            search_rank=SearchRank(
+                f"(SELECT ts_rank(document, {tsquery}) FROM {SEARCH_TABLE} "
+                f"WHERE job_id = {{job_id}})",
+                [query],
+            )
+        )
+
+
+_backends = defaultdict(
+    lambda: IContainsSearchBackend,
+    {"sqlite": SQLiteSearchBackend, "postgresql": PostgresSearchBackend},
+)
+
+
+def get_search_backend():
+    return _backends[connection.vendor]()
+
+
+def schedule_index(job_ids):
+    """
+    Refresh the search documents of `job_ids` once the current transaction
+    commits. Ids scheduled during the same transaction are indexed together.
+    """
+    pending = getattr(_pending, "job_ids", None)
+    if pending is None:
+        pending = _pending.job_ids = set()
+    pending.update(job_ids)
+    transaction.on_commit(_index_pending)
+
+
+def _index_pending():
+    job_ids, _pending.job_ids = getattr(_pending, "job_ids", None), set()
+    if job_ids:
+        get_search_backend().index(job_ids)
+
+
+def ensure_search_schema(**kwargs):
+    get_search_backend().ensure_schema()
@@ -1,23 +1,41 @@
 from datetime import datetime
 from decimal import Decimal
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.db import transaction
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Value, When
 from django.utils.timezone import now
 from rest_framework import serializers
 from taggit.serializers import TaggitSerializer, TagListSerializerField
 
+from common.fields import NairaField
 from common.helper import Helper
+from common.loader import BatchedListSerializer
+from job_listing_api.bulk import add_job_skills, apply_bookmark_changes
+from job_listing_api.cache import schedule_invalidation
+from job_listing_api.dedup import (
+    REJECT,
+    job_signature,
+    match_stored,
+    store_fingerprints,
+)
+from job_listing_api.email import JobNotificationEmail
 from job_listing_api.models import (
     Bookmark,
     BookmarkFolder,
     Company,
     Job,
+    JobBookmarkStatus,
     JobSkill,
+    JobStatus,
     JobTypeChoice,
     Skill,
 )
+from job_listing_api.feeds import feed_state, schedule_feed_update
+from job_listing_api.moderation import moderation_queue
+from job_listing_api.search import schedule_index
 
 User = get_user_model()
 
@@ -56,14 +74,37 @@ class JobSerializer(TaggitSerializer, serializers.ModelSerializer, Helper):
     job_skills = JobSkillSerializer(many=True, required=True)
     tags = TagListSerializerField(read_only=True)
     employment_type = serializers.ChoiceField(choices=JobTypeChoice.choices)
+    company = serializers.SlugRelatedField(
+        slug_field="name",
+        queryset=Company.objects.all(),
+        required=False,
+        allow_null=True,
+    )
     company_name = serializers.CharField(required=False)
+    salary = NairaField(required=False, allow_null=True, min_value=0)
     original_job = serializers.HyperlinkedRelatedField(
         view_name="job-detail", lookup_field="slug", read_only=True
     )
+    duplicate_of = serializers.HyperlinkedRelatedField(
+        view_name="job-detail", lookup_field="slug", read_only=True
+    )
+
+    user_fields = ("posted_by",)
+    # Rendered by the model serializer but left out of the output
+    hidden_fields = ("id", "skills")
 
     class Meta:
         model = Job
-        exclude = ("slug",)
+        # Moderation queue state stays internal
+        exclude = (
+            "slug",
+            "skills",
+            "claimed_by",
+            "claimed_until",
+            "moderated_at",
+            "changed_at",
+        )
+        list_serializer_class = BatchedListSerializer
         read_only_fields = [
             "posted_by",
             "created_at",
@@ -72,9 +113,10 @@ class JobSerializer(TaggitSerializer, serializers.ModelSerializer, Helper):
             "applications_count",
             "original_job",
             "status",
-            "scheduled_publish_at",
             "is_approved",
             "version",
+            "is_current",
+            "duplicate_of",
             # "tags",
         ]
 
@@ -87,23 +129,20 @@ class JobSerializer(TaggitSerializer, serializers.ModelSerializer, Helper):
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
-        data.pop("id", None)
-        data.pop("skills", None)
+        for field in self.hidden_fields:
+            data.pop(field, None)
         # self._format_text_field(data)
         # self._format_list_fields(data)
-        self._format_posted_by("posted_by", data)
+        self._format_posted_by("posted_by", data, user=instance.posted_by)
         self._format_date_field(data)
-        self._format_salary(data)
 
         return data
 
     def validate(self, attrs):
-        if "salary" in attrs:
-            attrs["salary"] = attrs["salary"] * 100
-
         for date_field in [
             "application_deadline",
             "published_at",
+            "scheduled_publish_at",
         ]:
             if date_field in attrs:
                 date_value = attrs[date_field]
@@ -157,37 +196,57 @@ class JobSerializer(TaggitSerializer, serializers.ModelSerializer, Helper):
             validated_data["published_at"] = None
 
         with transaction.atomic():
-            job_instance = Job.objects.create(**validated_data)
-
-            for data in skills_data:
-                skill_data = data["skill"]
-                skill_instance, created = Skill.objects.get_or_create(
-                    name=skill_data["name"].strip().lower()
+            signature = job_signature(
+                validated_data.get("job_title"), validated_data.get("job_description")
+            )
+            [duplicate_of_id] = match_stored([signature])
+            if duplicate_of_id and settings.JOB_DUPLICATE_POLICY == REJECT:
+                raise serializers.ValidationError(
+                    {
+                        "job": "This job duplicates an existing listing: "
+                        f"{Job.objects.get(pk=duplicate_of_id).slug}."
+                    }
                 )
+            validated_data["duplicate_of_id"] = duplicate_of_id
 
-                # Create JobSkill instance and associate with Job
-                JobSkill.objects.create(
-                    job=job_instance,
-                    skill=skill_instance,
-                    skill_level=data["skill_level"],
-                )
+            job_instance = Job.objects.create(**validated_data)
+            store_fingerprints([(job_instance.pk, signature)])
             if skills_data is not None:
-                job_instance.tags.add(
-                    *[data["skill"]["name"].strip().lower() for data in skills_data]
-                )
+                add_job_skills({job_instance: self._skill_levels(skills_data)})
 
         return job_instance
 
+    def _skill_levels(self, skills_data):
+        """
+        Map each skill name to its level. A skill listed twice keeps the last
+        level given.
+        """
+        return {
+            data["skill"]["name"].strip().lower(): data["skill_level"]
+            for data in skills_data
+        }
+
     def update(self, instance, validated_data):
         # Extract related fields from the validated data
         skills_data = validated_data.pop("job_skills", None)
         tags_data = validated_data.pop("tags", "[]")
 
-        # Create a new instance as a copy of the current instance
+        # Create a new instance as a copy of the current instance. The new
+        # revision starts without a moderation decision or claim of its own.
         new_job_data = {
             field.name: getattr(instance, field.name)
             for field in instance._meta.fields
-            if field.name not in ["id", "slug", "created_at"]
+            if field.name
+            not in [
+                "id",
+                "slug",
+                "created_at",
+                "is_current",
+                "duplicate_of",
+                "moderated_at",
+                "claimed_by",
+                "claimed_until",
+            ]
         }
 
         # Update new_job_data with validated_data
@@ -200,31 +259,34 @@ class JobSerializer(TaggitSerializer, serializers.ModelSerializer, Helper):
 
         # Create the new job instance
         with transaction.atomic():
+            # Supersede the edited revision. The conditional UPDATE makes
+            # sure only one edit of a revision can ever win.
+            superseded = Job.objects.filter(pk=instance.pk, is_current=True).update(
+                is_current=False, changed_at=now()
+            )
+            if not superseded:
+                raise serializers.ValidationError(
+                    {"job": "Only the current version of a job can be edited."}
+                )
+            if feed_state(instance) is not None:
+                schedule_feed_update([instance.pk])
+            instance.is_current = False
+            schedule_index([instance.pk])
+
+            # Edits are flagged but never rejected as duplicates
+            signature = job_signature(
+                new_job_data.get("job_title"), new_job_data.get("job_description")
+            )
+            [duplicate_of_id] = match_stored([signature])
+            if duplicate_of_id in (instance.pk, instance.original_job_id):
+                # A duplicate of an earlier revision of this very job
+                duplicate_of_id = None
+            new_job_data["duplicate_of_id"] = duplicate_of_id
 
             new_instance = Job.objects.create(**new_job_data)
-
-            # Update Many-to-Many fields (skills and tags)
-            if skills_data is not None:
-                skills_instances = []
-                for items in skills_data:
-                    if "skill" in items and items["skill"] is not None:
-                        skill_instance, _ = Skill.objects.get_or_create(
-                            name=items["skill"]["name"].strip().lower()
-                        )
-                    JobSkill.objects.get_or_create(
-                        job=new_instance,
-                        skill=skill_instance,
-                        skill_level=items["skill_level"],
-                    )
-                    skills_instances.append(skill_instance)
-                new_instance.skills.set(skills_instances)
-
+            store_fingerprints([(new_instance.pk, signature)])
             if skills_data is not None:
-                new_instance.tags.add(
-                    *[data["skill"]["name"].strip().lower() for data in skills_data]
-                )
-
-            new_instance.save()
+                add_job_skills({new_instance: self._skill_levels(skills_data)})
 
         return new_instance
 
@@ -233,20 +295,166 @@ class JobApproveSerializer(serializers.Serializer):
     is_approved = serializers.BooleanField()
     message = serializers.CharField(required=False)
 
-    def save(self, job_instance, **kwargs):
+    def save(self, job_instance, user, **kwargs):
+        current_time = now()
+        if moderation_queue.held_by_other(
+            user, job_instance.claimed_by_id, job_instance.claimed_until, current_time
+        ):
+            raise serializers.ValidationError(
+                {"job": "Another moderator has claimed this job."}
+            )
         job_instance.is_approved = self.validated_data["is_approved"]
+        job_instance.claimed_by = job_instance.claimed_until = None
+        job_instance.moderated_at = current_time
+        if (
+            job_instance.is_approved
+            and job_instance.status == JobStatus.DRAFT
+            and job_instance.scheduled_publish_at is None
+        ):
+            # Only scheduled jobs are published by JobScheduler
+            job_instance.status = JobStatus.PUBLISHED
+            job_instance.published_at = job_instance.moderated_at
         job_instance.save()
         return job_instance
 
 
+class JobBulkApproveItemSerializer(serializers.Serializer):
+    slug = serializers.UUIDField()
+    is_approved = serializers.BooleanField()
+    message = serializers.CharField(required=False, allow_blank=True)
+
+
+class JobBulkApproveSerializer(serializers.Serializer):
+    max_items = 500
+
+    decisions = JobBulkApproveItemSerializer(many=True, allow_empty=False)
+
+    def validate_decisions(self, decisions):
+        if len(decisions) > self.max_items:
+            raise serializers.ValidationError(
+                f"At most {self.max_items} decisions per request."
+            )
+        slugs = [decision["slug"] for decision in decisions]
+        if len(set(slugs)) != len(slugs):
+            raise serializers.ValidationError("Each job can only be decided once.")
+        return decisions
+
+    def save(self, user):
+        """
+        Apply every decision with one UPDATE, queue one email per poster and
+        return the outcome of each slug, in request order. Jobs another
+        moderator holds a claim on are left to them.
+        """
+        decisions = {
+            decision["slug"]: decision for decision in self.validated_data["decisions"]
+        }
+        current_time = now()
+        with transaction.atomic():
+            jobs, claimed = {}, set()
+            for (
+                job_id,
+                slug,
+                job_title,
+                email,
+                claimed_by_id,
+                claimed_until,
+            ) in Job.objects.filter(slug__in=decisions).values_list(
+                "id",
+                "slug",
+                "job_title",
+                "posted_by__email",
+                "claimed_by_id",
+                "claimed_until",
+            ):
+                if moderation_queue.held_by_other(
+                    user, claimed_by_id, claimed_until, current_time
+                ):
+                    claimed.add(slug)
+                else:
+                    jobs[slug] = (job_id, job_title, email)
+            if jobs:
+                # Approved unscheduled drafts are published, as by JobApproveSerializer
+                publish = Q(
+                    id__in=[
+                        job_id
+                        for slug, (job_id, _, _) in jobs.items()
+                        if decisions[slug]["is_approved"]
+                    ],
+                    status=JobStatus.DRAFT,
+                    scheduled_publish_at__isnull=True,
+                )
+                Job.objects.filter(id__in=[job[0] for job in jobs.values()]).update(
+                    is_approved=Case(
+                        *[
+                            When(id=job_id, then=decisions[slug]["is_approved"])
+                            for slug, (job_id, _, _) in jobs.items()
+                        ],
+                        output_field=models.BooleanField(),
+                    ),
+                    claimed_by=None,
+                    claimed_until=None,
+                    moderated_at=current_time,
+                    changed_at=current_time,
+                    status=Case(
+                        When(publish, then=Value(JobStatus.PUBLISHED)),
+                        default=F("status"),
+                    ),
+                    published_at=Case(
+                        When(publish, then=Value(current_time)),
+                        default=F("published_at"),
+                    ),
+                )
+                # QuerySet.update sends no post_save
+                schedule_invalidation()
+                schedule_feed_update([job[0] for job in jobs.values()])
+                JobNotificationEmail.send_decisions_to_posters(
+                    (
+                        job_title,
+                        email,
+                        decisions[slug]["is_approved"],
+                        decisions[slug].get("message"),
+                    )
+                    for slug, (_, job_title, email) in jobs.items()
+                )
+
+        return [
+            {
+                "slug": str(slug),
+                "result": (
+                    "claimed"
+                    if slug in claimed
+                    else (
+                        "not_found"
+                        if slug not in jobs
+                        else "approved" if decision["is_approved"] else "rejected"
+                    )
+                ),
+            }
+            for slug, decision in decisions.items()
+        ]
+
+
+class JobClaimSerializer(serializers.Serializer):
+    batch_size = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class JobReleaseSerializer(serializers.Serializer):
+    # All of the moderator's claims when omitted
+    slugs = serializers.ListField(child=serializers.UUIDField(), required=False)
+
+
 class BookmarkFolderSerializer(serializers.ModelSerializer, Helper):
     folder_instance = serializers.HyperlinkedIdentityField(
         view_name="bookmarkfolder-detail"
     )
+    bookmark_counts = serializers.SerializerMethodField()
+
+    user_fields = ("user",)
 
     class Meta:
         model = BookmarkFolder
         exclude = ["created_at", "updated_at"]
+        list_serializer_class = BatchedListSerializer
         read_only_fields = ["user"]
 
     def validate(self, attrs):
@@ -256,6 +464,13 @@ class BookmarkFolderSerializer(serializers.ModelSerializer, Helper):
             attrs["folder_description"] = attrs["folder_description"].strip().lower()
         return super().validate(attrs)
 
+    def get_bookmark_counts(self, instance):
+        # From the maintained counters, prefetched by BookmarkFolderViewset
+        counts = dict.fromkeys(JobBookmarkStatus.values, 0)
+        for counter in instance.counters.all():
+            counts[counter.status] += counter.count
+        return {"total": sum(counts.values()), **counts}
+
     def to_representation(self, instance):
         data = super().to_representation(instance)
         data.pop("id", None)
@@ -276,7 +491,7 @@ class BookmarkFolderSerializer(serializers.ModelSerializer, Helper):
             )
         return folder_instance
 
-    def update(self, instance, validated_data:dict):
+    def update(self, instance, validated_data: dict):
         with transaction.atomic():
             for attrs, value in validated_data.items():
                 setattr(instance, attrs, value)
@@ -305,9 +520,12 @@ class BookmarkSerializer(serializers.ModelSerializer, Helper):
         read_only=True,
     )
 
+    user_fields = ("user",)
+
     class Meta:
         model = Bookmark
         exclude = ["created_at", "updated_at"]
+        list_serializer_class = BatchedListSerializer
         read_only_fields = ["user"]
 
     def validate(self, attrs):
@@ -326,8 +544,8 @@ class BookmarkSerializer(serializers.ModelSerializer, Helper):
                 **validated_data
             )
         return bookmark_instance
-    
-    def update(self, instance, validated_data:dict):
+
+    def update(self, instance, validated_data: dict):
         with transaction.atomic():
             for attrs, value in validated_data.items():
                 setattr(instance, attrs, value)
@@ -351,6 +569,77 @@ class BookmarkSerializer(serializers.ModelSerializer, Helper):
         return super().to_internal_value(data)
 
 
+class BookmarkStatusField(serializers.ChoiceField):
+    def __init__(self, **kwargs):
+        super().__init__(choices=JobBookmarkStatus.choices, **kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = data.title()
+        return super().to_internal_value(data)
+
+
+class BookmarkBulkCreateSerializer(serializers.Serializer):
+    job = serializers.UUIDField()
+    folder = serializers.IntegerField(required=False, allow_null=True)
+    status = BookmarkStatusField(required=False)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+
+class BookmarkBulkUpdateSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    folder = serializers.IntegerField(required=False, allow_null=True)
+    status = BookmarkStatusField(required=False)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+    def validate(self, attrs):
+        if len(attrs) == 1:
+            raise serializers.ValidationError(
+                "Give at least one of folder, status or notes to change."
+            )
+        return attrs
+
+
+class BookmarkBulkSerializer(serializers.Serializer):
+    max_items = 500
+
+    create = BookmarkBulkCreateSerializer(many=True, required=False)
+    update = BookmarkBulkUpdateSerializer(many=True, required=False)
+    delete = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    def validate(self, attrs):
+        create = attrs.get("create", [])
+        update = attrs.get("update", [])
+        delete = attrs.get("delete", [])
+        if not (create or update or delete):
+            raise serializers.ValidationError("No bookmark operations given.")
+        if len(create) + len(update) + len(delete) > self.max_items:
+            raise serializers.ValidationError(
+                f"At most {self.max_items} bookmark operations per request."
+            )
+        jobs = [item["job"] for item in create]
+        if len(set(jobs)) != len(jobs):
+            raise serializers.ValidationError({"create": "Jobs must be unique."})
+        bookmarks = [item["id"] for item in update] + delete
+        if len(set(bookmarks)) != len(bookmarks):
+            raise serializers.ValidationError(
+                "A bookmark can only appear once across update and delete."
+            )
+        for item in [*create, *update]:
+            if item.get("notes"):
+                item["notes"] = item["notes"].strip().lower()
+        return attrs
+
+    def save(self, user):
+        with transaction.atomic():
+            return apply_bookmark_changes(
+                user,
+                create=self.validated_data.get("create", []),
+                update=self.validated_data.get("update", []),
+                delete=self.validated_data.get("delete", []),
+            )
+
+
 class CompanySerializer(serializers.ModelSerializer):
     name = serializers.CharField(validators=[])
 
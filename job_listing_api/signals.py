@@ -1,8 +1,32 @@
-from django.db.models.signals import post_save
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+)
 from django.dispatch import receiver
+from taggit.models import Tag
 
+from .bookmark_stats import bookmark_counters
+from .cache import schedule_invalidation
 from .email import JobNotificationEmail
-from .models import Job
+from .feeds import feed_state, schedule_feed_update
+from .models import (
+    Bookmark,
+    BookmarkCounter,
+    BookmarkFolder,
+    Company,
+    Job,
+    JobSkill,
+    Skill,
+)
+from .search import schedule_index
+from .suggest import COMPANY, SKILL, TAG, suggester
+
 
 @receiver(post_save, sender=Job)
 def send_notification(sender, instance, created, **kwargs):
@@ -14,3 +38,99 @@ def send_notification(sender, instance, created, **kwargs):
             JobNotificationEmail(instance).send_to_admins()
         except Exception as e:
             raise Exception(str(e))
+
+
+@receiver(post_init, sender=Job)
+def remember_feed_state(sender, instance, **kwargs):
+    instance._feed_state = feed_state(instance)
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def job_changed(sender, instance, signal, created=False, **kwargs):
+    schedule_index([instance.id])
+    schedule_invalidation()
+    # Only saves that change what the feeds show of the job make them stale
+    previous = None if created else instance._feed_state
+    state = None if signal is post_delete else feed_state(instance)
+    if state != previous:
+        schedule_feed_update([instance.id])
+    instance._feed_state = state
+
+
+@receiver(post_save, sender=JobSkill)
+@receiver(post_delete, sender=JobSkill)
+def job_skill_changed(sender, instance, **kwargs):
+    schedule_index([instance.job_id])
+    schedule_invalidation()
+
+
+@receiver(m2m_changed, sender=Job.tags.through)
+def job_tags_changed(sender, instance, action, **kwargs):
+    if isinstance(instance, Job) and action.startswith("post_"):
+        schedule_index([instance.id])
+        schedule_invalidation()
+
+
+SUGGESTION_KINDS = {Skill: SKILL, Tag: TAG, Company: COMPANY}
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Company)
+def suggestion_added(sender, instance, created, **kwargs):
+    if created:
+        name = instance.name
+        transaction.on_commit(lambda: suggester.add(SUGGESTION_KINDS[sender], name))
+
+
+@receiver(post_delete, sender=Skill)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Company)
+def suggestion_removed(sender, instance, **kwargs):
+    name = instance.name
+    transaction.on_commit(lambda: suggester.remove(SUGGESTION_KINDS[sender], name))
+
+
+def _deleted_with_user(origin):
+    # The user's counters are deleted along with them
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, get_user_model())
+
+
+@receiver(post_init, sender=Bookmark)
+def remember_bookmark_counter(sender, instance, **kwargs):
+    # Read from __dict__ so deferred fields are not loaded
+    instance._counter_key = (
+        instance.__dict__.get("folder_id"),
+        instance.__dict__.get("status"),
+    )
+
+
+@receiver(post_save, sender=Bookmark)
+def bookmark_saved(sender, instance, created, **kwargs):
+    key = (instance.folder_id, instance.status)
+    if created:
+        bookmark_counters.add(instance.user_id, *key)
+    else:
+        bookmark_counters.move(instance.user_id, instance._counter_key, key)
+    instance._counter_key = key
+
+
+@receiver(post_delete, sender=Bookmark)
+def bookmark_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_user(origin):
+        bookmark_counters.add(instance.user_id, *instance._counter_key, delta=-1)
+
+
+@receiver(pre_delete, sender=BookmarkFolder)
+def bookmark_folder_deleted(sender, instance, origin=None, **kwargs):
+    # The folder's bookmarks are kept without a folder (SET_NULL, which sends
+    # no signals) while its counters are deleted with it
+    if _deleted_with_user(origin):
+        return
+    with bookmark_counters.batch():
+        for status, count in BookmarkCounter.objects.filter(
+            folder=instance
+        ).values_list("status", "count"):
+            bookmark_counters.add(instance.user_id, None, status, delta=count)
@@ -0,0 +1,253 @@
+"""
+Autocomplete suggestions for the job search box.
+
+Skill, tag and company names live in an in-memory `PrefixIndex`: a sorted
+list of lowercased keys searched with `bisect`, so a lookup never touches
+the database. Every word of a name is a key, so "inc" finds "tech inc".
+Suggestions are ranked by the number of current jobs using them.
+
+The index is built in the background when a worker starts serving requests
+(JOB_SUGGEST_BUILD_ON_START), and only a lookup that finds no index at all
+waits for a build. New and deleted names are applied incrementally as their
+transaction commits. When the jobs cache generation has moved on, which a
+lookup checks at most once every `refresh_interval` seconds, the job
+frequencies are recounted by rebuilding the index in a background thread,
+and the new index replaces the old one in one step once complete; lookups
+keep using the old one meanwhile. That also picks up changes made by other
+worker processes and by bulk writes, which send no signals.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.signals import request_started
+from django.db import close_old_connections
+from django.db.models import Count, Q
+from taggit.models import Tag, TaggedItem
+
+from .cache import get_generation
+from .models import Company, Job, Skill
+
+SKILL = "skill"
+TAG = "tag"
+COMPANY = "company"
+
+logger = logging.getLogger(__name__)
+
+
+class PrefixIndex:
+    # Results for prefixes up to this length are memoized between changes,
+    # they match the most names and are typed the most
+    memo_prefix_length = 2
+
+    def __init__(self):
+        self._keys = []  # sorted (key, kind, name)
+        self._weights = {}  # (kind, name) -> weight
+        self._memo = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._weights)
+
+    @staticmethod
+    def keys_for(name):
+        words = name.lower().split()
+        return {" ".join(words[index:]) for index in range(len(words))}
+
+    def add(self, kind, name, weight=0):
+        """
+        Insert `name` unless it is already indexed.
+        """
+        with self._lock:
+            if (kind, name) in self._weights:
+                return
+            for key in self.keys_for(name):
+                insort(self._keys, (key, kind, name))
+            self._weights[kind, name] = weight
+            self._memo.clear()
+
+    def remove(self, kind, name):
+        with self._lock:
+            if self._weights.pop((kind, name), None) is None:
+                return
+            for key in self.keys_for(name):
+                index = bisect_left(self._keys, (key, kind, name))
+                if index < len(self._keys) and self._keys[index] == (key, kind, name):
+                    del self._keys[index]
+            self._memo.clear()
+
+    def replace(self, entries):
+        """
+        Replace the whole index with `entries` of (kind, name, weight).
+        """
+        keys = []
+        weights = {}
+        for kind, name, weight in entries:
+            weights[kind, name] = weight
+            keys.extend((key, kind, name) for key in self.keys_for(name))
+        keys.sort()
+        with self._lock:
+            self._keys, self._weights, self._memo = keys, weights, {}
+
+    def search(self, prefix, limit=10):
+        """
+        Return up to `limit` (kind, name, weight) entries with a word starting
+        with `prefix`, heaviest first.
+        """
+        prefix = " ".join(prefix.lower().split())
+        if not prefix:
+            return []
+        memoize = len(prefix) <= self.memo_prefix_length
+        with self._lock:
+            if memoize and (prefix, limit) in self._memo:
+                return self._memo[prefix, limit]
+            keys, weights = self._keys, self._weights
+            matches = set()
+            index = bisect_left(keys, (prefix,))
+            while index < len(keys) and keys[index][0].startswith(prefix):
+                matches.add(keys[index][1:])
+                index += 1
+            results = [
+                (kind, name, weights[kind, name])
+                for kind, name in heapq.nsmallest(
+                    limit,
+                    matches,
+                    key=lambda entry: (-weights[entry], entry[1], entry[0]),
+                )
+            ]
+            if memoize:
+                self._memo[prefix, limit] = results
+        return results
+
+
+class Suggester:
+    refresh_interval = 30
+
+    def __init__(self):
+        self.index = PrefixIndex()
+        self._generation = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._built = threading.Event()
+        self._thread = None
+
+    def load_entries(self):
+        """
+        Every skill, tag and company name with the number of current jobs
+        using it.
+        """
+        for name, weight in Skill.objects.annotate(
+            weight=Count("jobskill", filter=Q(jobskill__job__is_current=True))
+        ).values_list("name", "weight"):
+            yield SKILL, name, weight
+        for name, weight in Company.objects.annotate(
+            weight=Count("job", filter=Q(job__is_current=True))
+        ).values_list("name", "weight"):
+            yield COMPANY, name, weight
+
+        tag_weights = dict(
+            TaggedItem.objects.filter(
+                content_type=ContentType.objects.get_for_model(Job),
+                object_id__in=Job.objects.filter(is_current=True).values("id"),
+            )
+            .values("tag__name")
+            .annotate(weight=Count("id"))
+            .values_list("tag__name", "weight")
+        )
+        for name in Tag.objects.values_list("name", flat=True):
+            yield TAG, name, tag_weights.get(name, 0)
+
+    def build(self, if_missing=False):
+        """
+        Load every entry and swap the new index in.
+        """
+        with self._build_lock:
+            if if_missing and self._built.is_set():
+                return
+            generation = get_generation()
+            self.index.replace(self.load_entries())
+            self._generation = generation
+            self._checked_at = time.monotonic()
+            self._built.set()
+
+    def build_in_background(self):
+        if self._build_lock.locked():
+            return
+        self._thread = threading.Thread(
+            target=self._build_quietly, name="job-suggester", daemon=True
+        )
+        self._thread.start()
+
+    def _build_quietly(self):
+        try:
+            self.build()
+        except Exception:
+            logger.exception("Failed to build the job suggestion index")
+        finally:
+            close_old_connections()
+
+    def refresh(self, force=False):
+        """
+        Build the index if it was never built, and rebuild it in the
+        background if the jobs changed since it was, checking at most once
+        every `refresh_interval` seconds.
+        """
+        if force:
+            self.build()
+            return
+        if not self._built.is_set():
+            self.build(if_missing=True)
+            return
+        if not self._check_due():
+            return
+        with self._lock:
+            if not self._check_due():
+                return
+            self._checked_at = time.monotonic()
+            if get_generation() == self._generation:
+                return
+        self.build_in_background()
+
+    def _check_due(self):
+        return (
+            self._checked_at is None
+            or time.monotonic() - self._checked_at >= self.refresh_interval
+        )
+
+    def suggest(self, prefix, limit=10):
+        self.refresh()
+        return [
+            {"value": name, "type": kind, "weight": weight}
+            for kind, name, weight in self.index.search(prefix, limit)
+        ]
+
+    def add(self, kind, name):
+        if self._built.is_set():
+            self.index.add(kind, name)
+
+    def remove(self, kind, name):
+        if self._built.is_set():
+            self.index.remove(kind, name)
+
+    def reset(self):
+        with self._build_lock:
+            self.index.replace([])
+            self._generation = self._checked_at = None
+            self._built.clear()
+
+
+suggester = Suggester()
+
+
+def build_on_start(sender, **kwargs):
+    """
+    Start building the index as soon as the worker starts serving, so no
+    lookup waits for it. Management commands never build it.
+    """
+    request_started.disconnect(build_on_start)
+    suggester.build_in_background()
@@ -1,10 +1,219 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core import mail
+from django.core.exceptions import ImproperlyConfigured
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, models
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from rest_framework.test import APITransactionTestCase
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITransactionTestCase
 from rest_framework_simplejwt.tokens import AccessToken
 
 from authentication.models import User
 
-from .models import Job
+from common.loader import UserLoader
+
+from .bookmark_stats import bookmark_counters
+from .compiled import CompiledJobSerializer, compile_plan
+from .counters import ViewCounter, job_view_counter
+from .dedup import job_signature, match_within, similarity, store_fingerprints
+from .export import JobExporter
+from .feeds import feed_writer
+from .importer import JobImporter
+from .management.commands.convert_name_foreign_keys import (
+    Command as ConvertNameForeignKeys,
+)
+from .models import (
+    Bookmark,
+    BookmarkCounter,
+    BookmarkFolder,
+    Company,
+    Job,
+    JobBookmarkStatus,
+    JobFeedChange,
+    JobFingerprint,
+    JobSkill,
+    JobStatus,
+    Skill,
+)
+from .moderation import moderation_queue
+from .recommend import skill_matrix
+from .scheduler import JobScheduler
+from .search import get_search_backend
+from .serializers import BookmarkSerializer, JobSerializer
+from .suggest import PrefixIndex, build_on_start, suggester
+from .views import JobViewset
+
+
+def create_job(posted_by, title="software developer", skills=None, **kwargs):
+    """
+    Create a job with its skills and tags the same way JobSerializer does.
+    """
+    company, _ = Company.objects.get_or_create(name=kwargs.pop("company", "tech inc"))
+    kwargs.setdefault("salary", 20000000)
+    job = Job.objects.create(
+        company=company,
+        company_name=company.name,
+        job_title=title,
+        job_description=kwargs.pop("job_description", f"we are hiring a {title}"),
+        posted_by=posted_by,
+        slug=uuid.uuid4(),
+        **kwargs,
+    )
+    skills = (
+        skills if skills is not None else {"python": "Beginner", "django": "Advanced"}
+    )
+    for name, level in skills.items():
+        skill, _ = Skill.objects.get_or_create(name=name)
+        JobSkill.objects.create(job=job, skill=skill, skill_level=level)
+    job.tags.add(*skills.keys())
+    return job
+
+
+class JobTestCase(APITransactionTestCase):
+    def setUp(self):
+        # Cached responses and generations must not leak between tests
+        cache.clear()
+        job_view_counter.clear()
+
+    def tearDown(self):
+        job_view_counter.clear()
+
+    def use_feed_root(self):
+        """
+        Write the generated job feeds to a directory removed after the test.
+        """
+        root = tempfile.mkdtemp(prefix="job-feeds-")
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings_override = override_settings(JOB_FEED_ROOT=root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        return root
+
+
+class QueryBudgetTestCase(JobTestCase):
+    """
+    Every job endpoint declares the number of queries it is allowed to run.
+    The budget must hold no matter how many jobs are rendered.
+    """
+
+    query_budgets = {
+        "job-job-list": 3,
+        "job-facets": 5,
+        "job-detail": 4,
+        "bookmark-list": 2,
+        "bookmarkfolder-list": 3,
+        "bookmark-summary": 1,
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email="budget@gmail.com", password="password123", is_test_user=True
+        )
+        self.token = str(AccessToken.for_user(self.user))
+
+    def assertWithinBudget(self, url_name, path, **extra):
+        budget = self.query_budgets[url_name]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, **extra)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(
+            len(queries),
+            budget,
+            f"{url_name} ran {len(queries)} queries, budget is {budget}:\n"
+            + "\n".join(query["sql"] for query in queries.captured_queries),
+        )
+        return response
+
+    def test_job_list_within_budget(self):
+        path = reverse("job-job-list")
+        create_job(self.user)
+        self.assertWithinBudget("job-job-list", path)
+
+        parent = create_job(self.user, title="backend engineer")
+        for index in range(10):
+            create_job(
+                self.user,
+                title=f"engineer {index}",
+                skills={f"skill {index}": "Advanced", "python": "Beginner"},
+                original_job=parent,
+            )
+        self.assertWithinBudget("job-job-list", path)
+
+    def test_job_detail_within_budget(self):
+        job = create_job(self.user, original_job=create_job(self.user))
+        self.assertWithinBudget(
+            "job-detail",
+            reverse("job-detail", kwargs={"slug": job.slug}),
+            HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+
+    def test_bookmark_lists_within_budget(self):
+        for index in range(5):
+            folder = BookmarkFolder.objects.create(
+                folder_name=f"folder {index}", user=self.user
+            )
+            Bookmark.objects.create(
+                user=self.user, job=create_job(self.user), folder=folder
+            )
+        self.client.force_authenticate(self.user)
+        for url_name in ["bookmark-list", "bookmarkfolder-list", "bookmark-summary"]:
+            self.assertWithinBudget(url_name, reverse(url_name))
+
+
+class UserLoaderTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.users = [
+            User.objects.create_user(
+                email=f"loader{index}@gmail.com", is_test_user=True
+            )
+            for index in range(3)
+        ]
+
+    def test_many_serialization_resolves_users_in_one_query(self):
+        poster = self.users[0]
+        for user in self.users:
+            Bookmark.objects.create(user=user, job=create_job(poster))
+        bookmarks = Bookmark.objects.select_related("job").order_by("id")
+        context = {"request": Request(APIRequestFactory().get("/"))}
+
+        with CaptureQueriesContext(connection) as queries:
+            data = BookmarkSerializer(
+                bookmarks, many=True, context=context
+            ).to_representation(list(bookmarks))
+        # One query for the bookmarks, one for all of their users
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(
+            [item["user"] for item in data],
+            [user.email.title() for user in self.users],
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            loader = UserLoader.for_context(context)
+            self.assertEqual(loader.load(self.users[1].pk), self.users[1])
+        self.assertEqual(len(queries), 0)
 
 
 class JobAddingTestCase(APITransactionTestCase):
@@ -163,3 +372,1944 @@ class JobAddingTestCase(APITransactionTestCase):
 #         )
 #         for field in {"id", "title", "slug"}:
 #             self.assertTrue(field in response.data)
+
+
+class JobSearchTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email="search@gmail.com", password="password123", is_test_user=True
+        )
+        self.list_path = reverse("job-job-list")
+        self.python_job = create_job(
+            self.user, title="python developer", skills={"django": "Advanced"}
+        )
+        self.go_job = create_job(
+            self.user,
+            title="go developer",
+            skills={"kubernetes": "Beginner"},
+            employment_type="Contract",
+        )
+
+    def search(self, term, **params):
+        response = self.client.get(self.list_path, {"search": term, **params})
+        self.assertEqual(response.status_code, 200)
+        return [job["job_title"] for job in response.data["results"]]
+
+    def test_search_matches_title_tags_and_skill_level(self):
+        self.assertEqual(self.search("python"), ["python developer"])
+        self.assertEqual(self.search("kube"), ["go developer"])
+        self.assertEqual(self.search("contract"), ["go developer"])
+        self.assertEqual(self.search("advanced"), ["python developer"])
+        self.assertEqual(self.search("rust"), [])
+
+    def test_comma_separated_terms_are_ored_and_ranked(self):
+        results = self.search("python developer, go")
+        self.assertEqual(len(results), 2)
+        self.assertEqual(
+            self.search("go developer, kubernetes", ordering="job_title"),
+            ["go developer"],
+        )
+
+    def test_filter_composes_with_values_and_subqueries(self):
+        matches = get_search_backend().filter(Job.objects.all(), ["developer"])
+        self.assertEqual(
+            sorted(matches.values_list("job_title", flat=True).distinct()),
+            ["go developer", "python developer"],
+        )
+        self.assertEqual(
+            list(
+                Job.objects.filter(id__in=matches.filter(job_title__startswith="go"))
+                .order_by()
+                .values_list("job_title", flat=True)
+            ),
+            ["go developer"],
+        )
+        ranked = matches.order_by("-search_rank").values("job_title", "search_rank")
+        self.assertTrue(all(row["search_rank"] > 0 for row in ranked))
+
+        response = self.client.get(reverse("job-facets"), {"search": "kubernetes"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total"], 1)
+
+    def test_index_follows_skill_and_tag_changes(self):
+        JobSkill.objects.filter(job=self.go_job).delete()
+        self.go_job.tags.clear()
+        self.assertEqual(self.search("kubernetes"), [])
+
+        self.go_job.tags.add("rust")
+        self.assertEqual(self.search("rust"), ["go developer"])
+
+        self.go_job.delete()
+        self.assertEqual(self.search("rust"), [])
+
+    def test_rebuild_command(self):
+        get_search_backend().clear()
+        self.assertEqual(self.search("python"), [])
+        call_command("rebuild_job_search_index", stdout=StringIO())
+        self.assertEqual(self.search("python"), ["python developer"])
+
+
+class KeysetPaginationTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email="pages@gmail.com", password="password123", is_test_user=True
+        )
+        self.jobs = [
+            create_job(self.user, title=f"job {index}", salary=index % 3 + 1)
+            for index in range(7)
+        ]
+
+    def collect(self, path, **params):
+        titles, links = [], []
+        response = self.client.get(path, {"page_size": 3, **params})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            titles.extend(job["job_title"] for job in response.data["results"])
+            links.append(response.data)
+            if not response.data["next"]:
+                return titles, links
+            response = self.client.get(response.data["next"])
+
+    def test_pages_walk_newest_first_without_counting(self):
+        with CaptureQueriesContext(connection) as queries:
+            titles, pages = self.collect(reverse("job-job-list"))
+        self.assertEqual(titles, [f"job {index}" for index in reversed(range(7))])
+        self.assertIsNone(pages[0]["previous"])
+        self.assertFalse(
+            any("COUNT(" in query["sql"].upper() for query in queries.captured_queries)
+        )
+
+        response = self.client.get(pages[-1]["previous"])
+        self.assertEqual(
+            [job["job_title"] for job in response.data["results"]],
+            ["job 3", "job 2", "job 1"],
+        )
+
+    def test_pages_follow_requested_ordering_with_ties(self):
+        titles, _ = self.collect(reverse("job-job-list"), ordering="-salary")
+        self.assertEqual(len(set(titles)), 7)
+        salaries = {job.job_title: job.salary for job in self.jobs}
+        ordered = [salaries[title] for title in titles]
+        self.assertEqual(ordered, sorted(ordered, reverse=True))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("job-job-list"), {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_orderings_without_a_keyset_are_rejected(self):
+        self.jobs[0].tags.add("remote")
+        with mock.patch.object(
+            JobViewset, "ordering_fields", [*JobViewset.ordering_fields, "tags__name"]
+        ):
+            response = self.client.get(
+                reverse("job-job-list"), {"ordering": "tags__name"}
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("tags__name", response.data["detail"])
+
+        # Relation paths are not offered as orderings
+        titles, _ = self.collect(reverse("job-job-list"), ordering="tags__name")
+        self.assertEqual(titles, [f"job {index}" for index in reversed(range(7))])
+
+
+class JobListCacheTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email="cache@gmail.com", password="password123", is_test_user=True
+        )
+        self.admin = User.objects.create_superuser(
+            email="admin@gmail.com", password="password123"
+        )
+        self.list_path = reverse("job-job-list")
+        self.job = create_job(self.user, title="python developer")
+
+    def get(self, **params):
+        response = self.client.get(self.list_path, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_repeated_requests_are_served_from_cache(self):
+        self.assertEqual(self.get(search="python,go")["X-Cache"], "MISS")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(search=" Go , python")
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response.data["results"][0]["job_title"], "python developer")
+
+    def test_changes_invalidate_cached_pages(self):
+        self.get()
+        create_job(self.user, title="go developer")
+        response = self.get()
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.data["results"]), 2)
+
+        self.job.tags.add("remote")
+        self.assertEqual(self.get()["X-Cache"], "MISS")
+        self.get()
+
+        self.job.is_approved = True
+        self.job.save()
+        self.assertEqual(self.get()["X-Cache"], "MISS")
+
+    def test_stats_are_admin_only(self):
+        self.get()
+        self.get()
+        stats_path = reverse("job-cache-stats")
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(stats_path).status_code, 403)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(stats_path)
+        self.assertEqual((response.data["hits"], response.data["misses"]), (1, 1))
+        self.assertEqual(response.data["hit_ratio"], 0.5)
+
+
+class JobNotificationTestCase(JobTestCase):
+    def test_admins_get_one_personalized_email_each(self):
+        admins = [
+            User.objects.create_superuser(email=f"admin{index}@gmail.com", password="x")
+            for index in range(3)
+        ]
+        mail.outbox.clear()
+        create_job(admins[0], title="python developer")
+
+        self.assertEqual(
+            sorted(email.to for email in mail.outbox),
+            [[admin.email] for admin in admins],
+        )
+        for email in mail.outbox:
+            self.assertIn(f"Hello, {email.to[0]}!", email.alternatives[0][0])
+            self.assertIn("Python Developer", email.body)
+        self.assertFalse(os.path.exists(settings.BASE_DIR / "templates" / "dump.html"))
+
+
+class JobImportTestCase(JobTestCase):
+    csv_rows = (
+        "job_title,job_description,company_name,employment_type,salary,job_skills\n"
+        "Python Developer,Build APIs,Tech Inc,full time,250000,python:advanced|django:beginner\n"
+        "Go Developer,Build services,Go Corp,contract,,go:Intermidiate\n"
+        ",Missing title,Tech Inc,full time,1000,python:advanced\n"
+        "Rust Developer,Systems work,Tech Inc,full time,1000,\n"
+    )
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser(
+            email="import@gmail.com", password="password123"
+        )
+        create_job(self.admin, title="existing job")
+        mail.outbox.clear()
+
+    def test_csv_import_writes_valid_rows_and_reports_the_rest(self):
+        out, err = StringIO(), StringIO()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "jobs.csv")
+            with open(path, "w") as f:
+                f.write(self.csv_rows)
+            call_command(
+                "import_jobs", path, posted_by=self.admin.email, stdout=out, stderr=err
+            )
+
+        self.assertIn("Imported 2 jobs, 2 rows failed.", out.getvalue())
+        self.assertIn("Row 3:", err.getvalue())
+        self.assertIn("Row 4:", err.getvalue())
+
+        job = Job.objects.get(job_title="python developer")
+        self.assertEqual(job.company.name, "tech inc")
+        self.assertEqual(job.employment_type, "Full Time")
+        self.assertEqual(job.salary, 25000000)
+        self.assertEqual(
+            dict(job.job_skills.values_list("skill__name", "skill_level")),
+            {"python": "Advanced", "django": "Beginner"},
+        )
+        self.assertEqual(sorted(job.tags.names()), ["django", "python"])
+        self.assertEqual(Company.objects.filter(name="go corp").count(), 1)
+        self.assertEqual(Skill.objects.filter(name="python").count(), 1)
+        self.assertEqual(
+            [
+                job.job_title
+                for job in get_search_backend().filter(Job.objects.all(), ["go"])
+            ],
+            ["go developer"],
+        )
+        # Bulk inserts bypass the per-job admin notification
+        self.assertEqual(mail.outbox, [])
+
+    def test_rows_are_written_in_chunks_with_constant_queries(self):
+        def ndjson(count, batch=""):
+            # Every batch brings new companies and skills to create
+            return [
+                json.dumps(
+                    {
+                        "job_title": f"developer {index}",
+                        "job_description": "remote role",
+                        "company_name": f"company {batch}{index % 3}",
+                        "employment_type": "Full Time",
+                        "job_skills": [
+                            {
+                                "skill": {"name": f"skill {batch}{index % 5}"},
+                                "skill_level": "Advanced",
+                            }
+                        ],
+                    }
+                )
+                + "\n"
+                for index in range(count)
+            ]
+
+        counts = []
+        for count in (5, 30):
+            importer = JobImporter(
+                posted_by=self.admin, format="ndjson", chunk_size=100
+            )
+            with CaptureQueriesContext(connection) as queries:
+                report = importer.run(ndjson(count, batch=count))
+            self.assertEqual((report.created, report.failed), (count, 0))
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+        report = JobImporter(posted_by=self.admin, format="ndjson", chunk_size=4).run(
+            ndjson(10) + ["not json\n"]
+        )
+        self.assertEqual((report.created, report.failed), (10, 1))
+        self.assertEqual(report.errors[0]["row"], 11)
+
+    def test_bulk_import_endpoint_is_admin_only(self):
+        path = reverse("job-bulk-import")
+        upload = SimpleUploadedFile("jobs.csv", self.csv_rows.encode())
+        user = User.objects.create_user(
+            email="poster@gmail.com", password="password123", is_test_user=True
+        )
+        self.client.force_authenticate(user)
+        self.assertEqual(
+            self.client.post(path, {"file": upload}, format="multipart").status_code,
+            403,
+        )
+
+        self.client.force_authenticate(self.admin)
+        upload.seek(0)
+        response = self.client.post(path, {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["created"], response.data["failed"]), (2, 2))
+        self.assertEqual([error["row"] for error in response.data["errors"]], [3, 4])
+        self.assertEqual(
+            self.client.post(path, {}, format="multipart").status_code, 400
+        )
+
+
+class JobSkillWriteTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email="writer@gmail.com", password="password123", is_test_user=True
+        )
+
+    def payload(self, skill_count):
+        return {
+            "job_title": "Backend Developer",
+            "job_description": "Build things",
+            "company_name": "Tech Inc",
+            "employment_type": "Full Time",
+            "job_skills": [
+                {"skill": {"name": f"Skill {index}"}, "skill_level": "Advanced"}
+                for index in range(skill_count)
+            ],
+        }
+
+    def create(self, skill_count):
+        serializer = JobSerializer(
+            data=self.payload(skill_count),
+            context={"slug": uuid.uuid4(), "posted_by": self.user},
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer.create(serializer.validated_data)
+
+    def test_create_runs_constant_queries(self):
+        Skill.objects.create(name="skill 0")
+        ContentType.objects.get_for_model(Job)
+        counts = []
+        for skill_count in (2, 15):
+            with CaptureQueriesContext(connection) as queries:
+                job = self.create(skill_count)
+            counts.append(len(queries))
+            self.assertEqual(job.job_skills.count(), skill_count)
+            self.assertEqual(len(job.tags.names()), skill_count)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_update_writes_skills_on_the_new_version(self):
+        job = self.create(2)
+        data = self.payload(3)
+        data["job_skills"].append(
+            {"skill": {"name": "skill 0"}, "skill_level": "Beginner"}
+        )
+        serializer = JobSerializer(job, data=data)
+        serializer.is_valid(raise_exception=True)
+        new_job = serializer.update(job, serializer.validated_data)
+
+        self.assertEqual(new_job.version, 2)
+        self.assertEqual(
+            dict(new_job.job_skills.values_list("skill__name", "skill_level")),
+            {"skill 0": "Beginner", "skill 1": "Advanced", "skill 2": "Advanced"},
+        )
+        self.assertEqual(
+            sorted(new_job.tags.names()), ["skill 0", "skill 1", "skill 2"]
+        )
+        self.assertEqual(job.job_skills.count(), 2)
+
+
+class CurrentVersionTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email="versions@gmail.com", password="password123", is_test_user=True
+        )
+        self.job = create_job(self.user, title="python developer")
+
+    def edit(self, job, title):
+        data = JobSerializer(
+            job, context={"request": Request(APIRequestFactory().get("/"))}
+        ).data
+        serializer = JobSerializer(
+            job,
+            data={
+                "job_title": title,
+                "job_description": data["job_description"],
+                "company_name": data["company_name"],
+                "employment_type": data["employment_type"],
+                "job_skills": [
+                    {"skill": {"name": "python"}, "skill_level": "Advanced"}
+                ],
+            },
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer.update(job, serializer.validated_data)
+
+    def test_listings_and_search_only_see_the_latest_revision(self):
+        second = self.edit(self.job, "python engineer")
+        third = self.edit(second, "senior python engineer")
+
+        self.assertEqual(list(Job.objects.filter(is_current=True)), [third])
+        for params in ({}, {"search": "python"}, {"job_title": "python"}):
+            response = self.client.get(reverse("job-job-list"), params)
+            self.assertEqual(
+                [job["job_title"] for job in response.data["results"]],
+                ["senior python engineer"],
+            )
+        # History stays reachable by slug
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse("job-detail", args=[self.job.slug]))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data["is_current"])
+
+    def test_superseded_revision_cannot_be_edited(self):
+        self.edit(self.job, "python engineer")
+        with self.assertRaises(ValidationError):
+            self.edit(self.job, "forked title")
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_backfill_command(self):
+        second = self.edit(self.job, "python engineer")
+        Job.objects.update(is_current=True)
+        call_command("mark_current_job_versions", chunk_size=1, stdout=StringIO())
+        self.assertEqual(list(Job.objects.filter(is_current=True)), [second])
+
+
+class ViewCounterTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email="views@gmail.com", password="password123", is_test_user=True
+        )
+        self.jobs = [create_job(self.user, title=f"job {index}") for index in range(3)]
+
+    def test_reads_are_buffered_and_flushed_in_one_update(self):
+        self.client.force_authenticate(self.user)
+        path = reverse("job-detail", args=[self.jobs[0].slug])
+        for _ in range(3):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(path).status_code, 200)
+            self.assertFalse(
+                [query for query in queries if query["sql"].startswith("UPDATE")]
+            )
+        job_view_counter.record(self.jobs[1].pk)
+
+        self.assertEqual(job_view_counter.pending(self.jobs[0].pk), 3)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(job_view_counter.flush(), 2)
+        self.assertEqual(
+            len(
+                [
+                    query
+                    for query in queries
+                    if query["sql"].startswith('UPDATE "job_listing_api_job"')
+                ]
+            ),
+            1,
+        )
+        self.assertEqual(
+            list(Job.objects.order_by("id").values_list("views_count", flat=True)),
+            [3, 1, 0],
+        )
+        self.assertEqual(job_view_counter.pending(), {})
+
+    def test_counts_from_several_workers_add_up(self):
+        workers = [ViewCounter(flush_interval=0) for _ in range(2)]
+        for worker in workers:
+            worker.record(self.jobs[2].pk, count=5)
+        Job.objects.filter(pk=self.jobs[2].pk).update(views_count=10)
+        for worker in workers:
+            worker.flush()
+        self.jobs[2].refresh_from_db()
+        self.assertEqual(self.jobs[2].views_count, 20)
+
+    def test_full_buffer_is_flushed_without_waiting(self):
+        counter = ViewCounter(flush_interval=0, max_pending=2)
+        counter.record(self.jobs[0].pk)
+        counter.record(self.jobs[1].pk)
+        self.assertEqual(counter.pending(), {})
+        self.assertEqual(
+            list(Job.objects.order_by("id").values_list("views_count", flat=True)),
+            [1, 1, 0],
+        )
+
+
+class JobSchedulerTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email="scheduler@gmail.com", password="password123", is_test_user=True
+        )
+        self.now = timezone.now()
+        self.use_feed_root()
+
+    def test_due_jobs_are_published_in_batches(self):
+        due = [
+            create_job(
+                self.user,
+                title=f"due {index}",
+                is_approved=True,
+                scheduled_publish_at=self.now - timedelta(minutes=index + 1),
+            )
+            for index in range(5)
+        ]
+        later = create_job(
+            self.user,
+            title="later",
+            is_approved=True,
+            scheduled_publish_at=self.now + timedelta(hours=1),
+        )
+        unapproved = create_job(
+            self.user, title="unapproved", scheduled_publish_at=self.now
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            published = JobScheduler(batch_size=2).publish_due(self.now)
+        self.assertEqual(published, 5)
+        self.assertEqual(
+            len([query for query in queries if query["sql"].startswith("UPDATE")]), 3
+        )
+        for job in due:
+            job.refresh_from_db()
+            self.assertEqual(job.status, JobStatus.PUBLISHED)
+            self.assertEqual(job.published_at, job.scheduled_publish_at)
+        for job in (later, unapproved):
+            job.refresh_from_db()
+            self.assertEqual(job.status, JobStatus.DRAFT)
+
+    def test_jobs_past_deadline_expire(self):
+        past = create_job(
+            self.user,
+            title="past",
+            status=JobStatus.PUBLISHED,
+            application_deadline=self.now - timedelta(days=1),
+        )
+        open_job = create_job(
+            self.user,
+            title="open",
+            status=JobStatus.PUBLISHED,
+            application_deadline=self.now + timedelta(days=1),
+        )
+        draft = create_job(
+            self.user, title="draft", application_deadline=self.now - timedelta(days=1)
+        )
+        out = StringIO()
+        call_command("run_job_scheduler", once=True, stdout=out)
+        self.assertIn("Published 0 jobs, expired 1 jobs.", out.getvalue())
+
+        statuses = dict(Job.objects.values_list("job_title", "status"))
+        self.assertEqual(
+            statuses,
+            {
+                past.job_title: JobStatus.EXPIRED,
+                open_job.job_title: JobStatus.PUBLISHED,
+                draft.job_title: JobStatus.DRAFT,
+            },
+        )
+
+    def test_transitions_invalidate_cached_listings(self):
+        create_job(
+            self.user,
+            title="due",
+            is_approved=True,
+            scheduled_publish_at=self.now - timedelta(minutes=1),
+        )
+        path = reverse("job-job-list")
+        self.client.get(path)
+        self.assertEqual(self.client.get(path)["X-Cache"], "HIT")
+        JobScheduler().run_once(self.now)
+        response = self.client.get(path)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["status"], JobStatus.PUBLISHED)
+
+
+class SalaryTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email="salary@gmail.com", password="password123", is_test_user=True
+        )
+
+    def test_salary_is_stored_in_kobo_and_rendered_in_naira(self):
+        serializer = JobSerializer(
+            data={
+                "job_title": "Backend Developer",
+                "job_description": "Build things",
+                "company_name": "Tech Inc",
+                "employment_type": "Full Time",
+                "salary": "2500.55",
+                "job_skills": [
+                    {"skill": {"name": "python"}, "skill_level": "Advanced"}
+                ],
+            },
+            context={"slug": uuid.uuid4(), "posted_by": self.user},
+        )
+        serializer.is_valid(raise_exception=True)
+        job = serializer.create(serializer.validated_data)
+        job.refresh_from_db()
+        self.assertEqual(job.salary, 250055)
+
+        create_job(self.user, title="unpaid", salary=None)
+        response = self.client.get(reverse("job-job-list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {job["job_title"]: job["salary"] for job in response.data["results"]},
+            {"backend developer": "2500.55", "unpaid": None},
+        )
+
+    def test_salary_range_filter_takes_naira(self):
+        for naira in (1000, 2000, 3000):
+            create_job(self.user, title=f"job {naira}", salary=naira * 100)
+        response = self.client.get(
+            reverse("job-job-list"),
+            {"salary_min": "1500", "salary_max": "3000", "ordering": "salary"},
+        )
+        self.assertEqual(
+            [job["job_title"] for job in response.data["results"]],
+            ["job 2000", "job 3000"],
+        )
+
+
+class JobFacetsTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email="facets@gmail.com", password="password123", is_test_user=True
+        )
+        create_job(self.user, title="python developer", salary=50_000 * 100)
+        create_job(
+            self.user,
+            title="django developer",
+            employment_type="Contract",
+            salary=300_000 * 100,
+            skills={"python": "Advanced", "aws": "Beginner"},
+        )
+        create_job(
+            self.user, title="go developer", salary=None, skills={"go": "Advanced"}
+        )
+        self.path = reverse("job-facets")
+
+    def test_counts_follow_the_filters(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.path, {"search": "python"})
+        self.assertLessEqual(
+            len(queries), QueryBudgetTestCase.query_budgets["job-facets"]
+        )
+        data = response.data
+        self.assertEqual(data["total"], 2)
+        self.assertEqual(
+            data["employment_type"],
+            [{"value": "Contract", "count": 1}, {"value": "Full Time", "count": 1}],
+        )
+        self.assertEqual(
+            data["skills"],
+            [
+                {"value": "python", "count": 2},
+                {"value": "aws", "count": 1},
+                {"value": "django", "count": 1},
+            ],
+        )
+        self.assertEqual(data["tags"], data["skills"])
+        self.assertEqual(
+            data["skill_level"],
+            [{"value": "Advanced", "count": 2}, {"value": "Beginner", "count": 2}],
+        )
+        self.assertEqual([band["count"] for band in data["salary"]], [1, 0, 1, 0, 0])
+        self.assertEqual(self.client.get(self.path)["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(self.path).data["total"], 3)
+
+    def test_facets_are_cached_until_jobs_change(self):
+        self.assertEqual(self.client.get(self.path)["X-Cache"], "MISS")
+        response = self.client.get(self.path, {"cursor": "x", "ordering": "salary"})
+        self.assertEqual(response["X-Cache"], "HIT")
+
+        job = Job.objects.get(job_title="go developer")
+        job.tags.add("remote")
+        response = self.client.get(self.path)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertIn({"value": "remote", "count": 1}, response.data["tags"])
+
+
+class SuggestTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        suggester.reset()
+        self.user = User.objects.create_user(
+            email="suggest@gmail.com", password="password123", is_test_user=True
+        )
+        create_job(
+            self.user,
+            title="a",
+            company="pyramid labs",
+            skills={"python": "Advanced"},
+        )
+        create_job(
+            self.user, title="b", skills={"python": "Beginner", "pytest": "Beginner"}
+        )
+        self.path = reverse("job-suggest")
+
+    def tearDown(self):
+        suggester.reset()
+        super().tearDown()
+
+    def suggest(self, q, **params):
+        response = self.client.get(self.path, {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [
+            (row["type"], row["value"], row["weight"])
+            for row in response.data["results"]
+        ]
+
+    def test_suggestions_are_ranked_by_job_frequency(self):
+        self.assertEqual(
+            self.suggest("py"),
+            [
+                ("skill", "python", 2),
+                ("tag", "python", 2),
+                ("company", "pyramid labs", 1),
+                ("skill", "pytest", 1),
+                ("tag", "pytest", 1),
+            ],
+        )
+        self.assertEqual(self.suggest("LAB"), [("company", "pyramid labs", 1)])
+        self.assertEqual(self.suggest("py", limit=1), [("skill", "python", 2)])
+        with CaptureQueriesContext(connection) as queries:
+            self.suggest("pyt")
+        self.assertEqual(len(queries), 0)
+
+    def test_new_and_deleted_names_are_applied_incrementally(self):
+        self.suggest("py")
+        Skill.objects.create(name="pydantic")
+        Company.objects.get(name="pyramid labs").delete()
+        with CaptureQueriesContext(connection) as queries:
+            results = self.suggest("pyd")
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(results, [("skill", "pydantic", 0)])
+        self.assertEqual(self.suggest("pyr"), [])
+
+    def test_frequencies_are_recounted_after_job_changes(self):
+        self.suggest("py")
+        create_job(self.user, title="c", skills={"pytest": "Advanced"})
+        suggester._checked_at -= suggester.refresh_interval
+        # The lookup is answered from the current index while a background
+        # thread rebuilds it
+        with CaptureQueriesContext(connection) as queries:
+            results = self.suggest("pyte")
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(results, [("skill", "pytest", 1), ("tag", "pytest", 1)])
+        suggester._thread.join()
+        self.assertEqual(
+            self.suggest("pyte"), [("skill", "pytest", 2), ("tag", "pytest", 2)]
+        )
+
+    def test_index_is_built_when_the_worker_starts_serving(self):
+        build_on_start(sender=None)
+        suggester._thread.join()
+        with CaptureQueriesContext(connection) as queries:
+            results = self.suggest("pyr")
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(results, [("company", "pyramid labs", 1)])
+
+
+class PrefixIndexTestCase(TestCase):
+    def test_lookups_stay_fast_on_a_large_vocabulary(self):
+        index = PrefixIndex()
+        index.replace(
+            ("skill", f"skill {number:05d} {word}", number % 97)
+            for number, word in enumerate(["python", "django", "golang", "rust"] * 5000)
+        )
+        for prefix in ("p", "py", "skill 0", "go", "d"):
+            self.assertEqual(len(index.search(prefix, 10)), 10)
+
+        index.add("skill", "pyo3")
+        self.assertIn(("skill", "pyo3", 0), index.search("pyo"))
+        index.remove("skill", "pyo3")
+        self.assertEqual(index.search("pyo"), [])
+
+        timings = []
+        for number in range(1000):
+            started = time.perf_counter()
+            index.search(f"skill {number:03d}", 10)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        self.assertLess(timings[int(len(timings) * 0.99)], 0.005)
+
+
+class ConvertNameForeignKeysTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email="convert@gmail.com", password="password123", is_test_user=True
+        )
+        self.command = ConvertNameForeignKeys()
+
+    def revert_to_name_keys(self):
+        with connection.schema_editor() as editor:
+            editor.alter_field(
+                Job,
+                Job._meta.get_field("company"),
+                self.command.name_field(
+                    Job, "company", Company, models.SET_NULL, null=True
+                ),
+            )
+            editor.alter_field(
+                JobSkill,
+                JobSkill._meta.get_field("skill"),
+                self.command.name_field(JobSkill, "skill", Skill, models.CASCADE),
+            )
+
+    def test_names_are_rewritten_as_ids(self):
+        self.revert_to_name_keys()
+        self.assertTrue(self.command.uses_names(Job, "company"))
+        company = Company.objects.create(name="tech inc")
+        Skill.objects.create(name="django")
+        python = Skill.objects.create(name="python")
+        job_table = Job._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {job_table} (company_id, company_name, job_title, "
+                "job_description, status, visibility, employment_type, "
+                "posted_by_id, views_count, applications_count, version, "
+                "is_current, created_at, changed_at, slug, is_approved) VALUES "
+                "('tech inc', 'tech inc', 'developer', 'd', 'Draft', 'Private', "
+                f"'Full Time', %s, 0, 0, 1, 1, %s, %s, %s, 0)",
+                [self.user.pk, timezone.now(), timezone.now(), uuid.uuid4().hex],
+            )
+            cursor.execute(
+                f"INSERT INTO {JobSkill._meta.db_table} (job_id, skill_id, "
+                f"skill_level) SELECT id, 'python', 'Advanced' FROM {job_table}"
+            )
+            cursor.execute(f"SELECT id FROM {JobSkill._meta.db_table}")
+            [(job_skill_id,)] = cursor.fetchall()
+
+        out = StringIO()
+        call_command("convert_name_foreign_keys", stdout=out)
+        self.assertIn("Converted Job.company, JobSkill.skill.", out.getvalue())
+        self.assertFalse(self.command.uses_names(Job, "company"))
+        self.assertFalse(self.command.uses_names(JobSkill, "skill"))
+
+        job = Job.objects.get()
+        self.assertEqual(job.company_id, company.pk)
+        job_skill = job.job_skills.get()
+        self.assertEqual((job_skill.id, job_skill.skill_id), (job_skill_id, python.pk))
+
+        out = StringIO()
+        call_command("convert_name_foreign_keys", stdout=out)
+        self.assertIn("Nothing to convert.", out.getvalue())
+
+    def test_api_keeps_accepting_company_names(self):
+        Company.objects.create(name="tech inc")
+        serializer = JobSerializer(
+            data={
+                "job_title": "Backend Developer",
+                "job_description": "Build things",
+                "company": "tech inc",
+                "employment_type": "Full Time",
+                "job_skills": [
+                    {"skill": {"name": "python"}, "skill_level": "Advanced"}
+                ],
+            },
+            context={"slug": uuid.uuid4(), "posted_by": self.user},
+        )
+        serializer.is_valid(raise_exception=True)
+        job = serializer.create(serializer.validated_data)
+        self.assertIsInstance(job.company_id, int)
+
+        data = JobSerializer(
+            job, context={"request": Request(APIRequestFactory().get("/"))}
+        ).data
+        self.assertEqual(data["company"], "tech inc")
+        self.assertEqual(
+            data["job_skills"],
+            [{"skill": {"name": "python"}, "skill_level": "Advanced"}],
+        )
+
+
+class RecommendationTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        skill_matrix.reset()
+        self.user = User.objects.create_user(
+            email="recommend@gmail.com", password="password123", is_test_user=True
+        )
+        self.poster = User.objects.create_user(
+            email="poster@gmail.com", password="password123", is_test_user=True
+        )
+        published = {"status": JobStatus.PUBLISHED, "is_approved": True}
+        self.bookmarked = create_job(
+            self.poster,
+            title="bookmarked",
+            skills={"python": "Advanced", "django": "Advanced"},
+            **published,
+        )
+        self.close = create_job(
+            self.poster,
+            title="close match",
+            skills={"python": "Advanced", "django": "Intermidiate"},
+            **published,
+        )
+        self.partial = create_job(
+            self.poster,
+            title="partial match",
+            skills={"python": "Beginner", "go": "Advanced"},
+            **published,
+        )
+        create_job(
+            self.poster, title="no match", skills={"rust": "Advanced"}, **published
+        )
+        create_job(self.poster, title="draft", skills={"python": "Advanced"})
+        Bookmark.objects.create(user=self.user, job=self.bookmarked)
+        self.path = reverse("job-recommended")
+
+    def tearDown(self):
+        skill_matrix.reset()
+        super().tearDown()
+
+    def recommended(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.path)
+        self.assertEqual(response.status_code, 200)
+        return [job["job_title"] for job in response.data["results"]]
+
+    def test_published_jobs_are_ranked_against_bookmarked_skills(self):
+        self.assertEqual(self.recommended(), ["close match", "partial match"])
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.path).status_code, 403)
+
+    def test_matrix_follows_publishing_and_expiry_incrementally(self):
+        self.recommended()
+        self.assertEqual(len(skill_matrix), 4)
+        skill_ids = dict(Skill.objects.values_list("name", "id"))
+        previous = dict(skill_matrix._postings)
+        previous_django = dict(previous[skill_ids["django"]])
+
+        self.close.status = JobStatus.EXPIRED
+        self.close.save()
+        newcomer = create_job(
+            self.poster,
+            title="newcomer",
+            skills={"django": "Advanced"},
+            status=JobStatus.PUBLISHED,
+        )
+        skill_matrix._checked_at -= skill_matrix.refresh_interval
+        with CaptureQueriesContext(connection) as queries:
+            skill_matrix.refresh()
+        # One query for the published ids, one for the newcomer's skills
+        self.assertEqual(len(queries), 2)
+        self.assertIn(str(newcomer.id), queries[1]["sql"])
+        self.assertEqual(self.recommended(), ["newcomer", "partial match"])
+
+        # Only the posting lists of the skills involved were copied
+        postings = skill_matrix._postings
+        self.assertIs(postings[skill_ids["rust"]], previous[skill_ids["rust"]])
+        self.assertIsNot(postings[skill_ids["django"]], previous[skill_ids["django"]])
+        self.assertEqual(previous[skill_ids["django"]], previous_django)
+
+
+class DuplicateDetectionTestCase(JobTestCase):
+    description = (
+        "we are looking for an experienced backend engineer to build and maintain "
+        "our payments platform using python django postgres and redis. you will "
+        "work with product and design to ship features, review code, mentor junior "
+        "engineers and keep our services reliable and fast."
+    )
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email="dedup@gmail.com", password="password123", is_test_user=True
+        )
+
+    def create(self, title, description=None):
+        serializer = JobSerializer(
+            data={
+                "job_title": title,
+                "job_description": description or self.description,
+                "company_name": "Tech Inc",
+                "employment_type": "Full Time",
+                "job_skills": [
+                    {"skill": {"name": "python"}, "skill_level": "Advanced"}
+                ],
+            },
+            context={"slug": uuid.uuid4(), "posted_by": self.user},
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer.create(serializer.validated_data)
+
+    def test_signatures_separate_reposts_from_other_jobs(self):
+        original = job_signature("senior python developer", self.description)
+        repost = job_signature(
+            "Snr. Python Developer!", self.description + " apply now"
+        )
+        other = job_signature(
+            "frontend react engineer",
+            "build user interfaces with react typescript and css for our store",
+        )
+        self.assertGreaterEqual(similarity(original, repost), 0.8)
+        self.assertLess(similarity(original, other), 0.5)
+        self.assertEqual(match_within([original, other, repost]), [None, None, 0])
+
+    def test_reposts_are_flagged(self):
+        original = self.create("senior python developer")
+        repost = self.create("python developer (senior)")
+        other = self.create(
+            "frontend react engineer",
+            "build user interfaces with react typescript and css for our store",
+        )
+        again = self.create("senior python developer", self.description + " apply now")
+
+        self.assertIsNone(original.duplicate_of_id)
+        self.assertEqual(repost.duplicate_of_id, original.id)
+        self.assertIsNone(other.duplicate_of_id)
+        # Duplicates of duplicates point at the first listing
+        self.assertEqual(again.duplicate_of_id, original.id)
+        self.assertEqual(JobFingerprint.objects.count(), 4)
+
+    def test_reposts_are_rejected_by_policy(self):
+        original = self.create("senior python developer")
+        with self.settings(JOB_DUPLICATE_POLICY="reject"):
+            with self.assertRaises(ValidationError) as error:
+                self.create("python developer (senior)")
+        self.assertIn(str(original.slug), str(error.exception.detail))
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_editing_a_job_does_not_flag_it_as_its_own_duplicate(self):
+        job = self.create("senior python developer")
+        serializer = JobSerializer(
+            job,
+            data={
+                "job_title": "lead python developer",
+                "company_name": "Tech Inc",
+                "job_skills": [
+                    {"skill": {"name": "python"}, "skill_level": "Advanced"}
+                ],
+            },
+            partial=True,
+        )
+        serializer.is_valid(raise_exception=True)
+        revision = serializer.save()
+        self.assertIsNone(revision.duplicate_of_id)
+
+    def test_import_flags_duplicates_within_and_across_chunks(self):
+        self.create("senior python developer")
+        rows = [
+            {"job_title": "senior python developer"},
+            {"job_title": "data analyst", "job_description": "sql dashboards"},
+            {"job_title": "data analyst", "job_description": "sql dashboards!"},
+        ]
+        lines = [
+            json.dumps(
+                {
+                    "job_description": self.description,
+                    "company_name": "Tech Inc",
+                    "employment_type": "Full Time",
+                    "job_skills": [
+                        {"skill": {"name": "python"}, "skill_level": "Advanced"}
+                    ],
+                    **row,
+                }
+            )
+            + "\n"
+            for row in rows
+        ]
+        report = JobImporter(posted_by=self.user, format="ndjson").run(lines)
+        self.assertEqual(report.created, 3)
+        original, imported, analyst, repost = Job.objects.order_by("id")
+        self.assertEqual(imported.duplicate_of_id, original.id)
+        self.assertIsNone(analyst.duplicate_of_id)
+        self.assertEqual(repost.duplicate_of_id, analyst.id)
+
+        with self.settings(JOB_DUPLICATE_POLICY="reject"):
+            report = JobImporter(posted_by=self.user, format="ndjson").run(lines)
+        self.assertEqual((report.created, report.failed), (0, 3))
+
+    def test_backfill_fingerprints_and_flags_existing_jobs(self):
+        first = create_job(
+            self.user, "python developer", job_description=self.description
+        )
+        second = create_job(
+            self.user, "python developer", job_description=self.description + " now"
+        )
+        create_job(self.user, "rust developer")
+        out = StringIO()
+        call_command("backfill_job_fingerprints", chunk_size=2, stdout=out)
+        self.assertIn("Fingerprinted 3 jobs, flagged 1 duplicates.", out.getvalue())
+        second.refresh_from_db()
+        self.assertEqual(second.duplicate_of_id, first.id)
+
+        call_command("backfill_job_fingerprints", stdout=out)
+        self.assertIn("Fingerprinted 0 jobs, flagged 0 duplicates.", out.getvalue())
+
+    def test_backfill_keeps_older_jobs_as_originals(self):
+        older = create_job(
+            self.user, "python developer", job_description=self.description
+        )
+        newer = create_job(
+            self.user, "python developer", job_description=self.description + " now"
+        )
+        store_fingerprints(
+            [(newer.id, job_signature(newer.job_title, newer.job_description))]
+        )
+        out = StringIO()
+        call_command("backfill_job_fingerprints", stdout=out)
+        self.assertIn("Fingerprinted 1 jobs, flagged 0 duplicates.", out.getvalue())
+        older.refresh_from_db()
+        self.assertIsNone(older.duplicate_of_id)
+
+
+class BookmarkBulkTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email="bulk@gmail.com", password="password123", is_test_user=True
+        )
+        self.other = User.objects.create_user(
+            email="other@gmail.com", password="password123", is_test_user=True
+        )
+        self.jobs = [create_job(self.other, title=f"job {index}") for index in range(6)]
+        self.folder = BookmarkFolder.objects.create(user=self.user, folder_name="todo")
+        self.foreign_folder = BookmarkFolder.objects.create(
+            user=self.other, folder_name="theirs"
+        )
+        self.path = reverse("bookmark-bulk")
+        self.client.force_authenticate(self.user)
+
+    def bulk(self, payload):
+        return self.client.post(self.path, payload, format="json")
+
+    def test_creates_moves_updates_and_deletes_in_one_request(self):
+        kept, moved, deleted = [
+            Bookmark.objects.create(user=self.user, job=job) for job in self.jobs[:3]
+        ]
+        foreign = Bookmark.objects.create(user=self.other, job=self.jobs[0])
+
+        response = self.bulk(
+            {
+                "create": [
+                    {"job": str(self.jobs[3].slug), "status": "applied"},
+                    {"job": str(self.jobs[4].slug), "folder": self.folder.id},
+                    {"job": str(self.jobs[0].slug)},
+                    {"job": str(uuid.uuid4())},
+                    {"job": str(self.jobs[5].slug), "folder": self.foreign_folder.id},
+                ],
+                "update": [
+                    {"id": moved.id, "folder": self.folder.id, "status": "Applied"},
+                    {"id": kept.id, "folder": self.foreign_folder.id},
+                    {"id": foreign.id, "status": "Archived"},
+                ],
+                "delete": [deleted.id, foreign.id + 1000],
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        results = [item["result"] for item in response.data["results"]]
+        self.assertEqual(
+            results,
+            [
+                "created",
+                "created",
+                "exists",
+                "job_not_found",
+                "folder_not_found",
+                "updated",
+                "folder_not_found",
+                "not_found",
+                "deleted",
+                "not_found",
+            ],
+        )
+
+        created = Bookmark.objects.get(user=self.user, job=self.jobs[3])
+        self.assertEqual(response.data["results"][0]["bookmark"], created.id)
+        self.assertEqual(created.status, JobBookmarkStatus.APPLIED)
+        moved.refresh_from_db()
+        self.assertEqual((moved.folder_id, moved.status), (self.folder.id, "Applied"))
+        kept.refresh_from_db()
+        self.assertIsNone(kept.folder_id)
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.status, JobBookmarkStatus.SAVED)
+        self.assertFalse(Bookmark.objects.filter(id=deleted.id).exists())
+
+    def test_runs_constant_queries(self):
+        # Counters that do not exist yet take extra queries to create
+        BookmarkCounter.objects.create(
+            user=self.user, folder=self.folder, status=JobBookmarkStatus.SAVED
+        )
+        counts = []
+        for jobs in (self.jobs[:2], self.jobs[2:]):
+            bookmarks = [
+                Bookmark.objects.create(user=self.user, job=job) for job in jobs
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.bulk(
+                    {
+                        "update": [
+                            {"id": bookmark.id, "folder": self.folder.id}
+                            for bookmark in bookmarks
+                        ],
+                        "delete": [bookmark.id + 1000 for bookmark in bookmarks],
+                    }
+                )
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+            Bookmark.objects.filter(user=self.user).delete()
+        self.assertEqual(counts[0], counts[1])
+
+    def test_rejects_invalid_batches(self):
+        bookmark = Bookmark.objects.create(user=self.user, job=self.jobs[0])
+        for payload in [
+            {},
+            {"update": [{"id": bookmark.id}]},
+            {"update": [{"id": bookmark.id, "status": "Lost"}]},
+            {"update": [{"id": bookmark.id, "notes": "x"}], "delete": [bookmark.id]},
+            {"create": [{"job": str(self.jobs[1].slug)}] * 2},
+        ]:
+            self.assertEqual(self.bulk(payload).status_code, 400, payload)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.bulk({"delete": [bookmark.id]}).status_code, 403)
+
+
+class BookmarkCounterTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email="counter@gmail.com", password="password123", is_test_user=True
+        )
+        self.jobs = [create_job(self.user, title=f"job {index}") for index in range(4)]
+        self.folder = BookmarkFolder.objects.create(user=self.user, folder_name="todo")
+
+    def counters(self):
+        return {
+            (counter.folder_id, counter.status): counter.count
+            for counter in BookmarkCounter.objects.filter(user=self.user)
+            if counter.count
+        }
+
+    def actual(self):
+        return {
+            (folder_id, status): count
+            for folder_id, status, count in Bookmark.objects.filter(user=self.user)
+            .values("folder_id", "status")
+            .annotate(count=models.Count("id"))
+            .values_list("folder_id", "status", "count")
+        }
+
+    def test_counters_follow_bookmark_changes(self):
+        saved = Bookmark.objects.create(user=self.user, job=self.jobs[0])
+        filed = Bookmark.objects.create(
+            user=self.user, job=self.jobs[1], folder=self.folder
+        )
+        self.assertEqual(
+            self.counters(), {(None, "Saved"): 1, (self.folder.id, "Saved"): 1}
+        )
+
+        saved.status = JobBookmarkStatus.APPLIED
+        saved.folder = self.folder
+        saved.save()
+        filed.delete()
+        self.assertEqual(self.counters(), {(self.folder.id, "Applied"): 1})
+
+        self.client.force_authenticate(self.user)
+        self.client.post(
+            reverse("bookmark-bulk"),
+            {
+                "create": [
+                    {"job": str(self.jobs[2].slug), "status": "Interviewing"},
+                    {"job": str(self.jobs[3].slug), "folder": self.folder.id},
+                ],
+                "update": [{"id": saved.id, "status": "Offered", "folder": None}],
+            },
+            format="json",
+        )
+        self.assertEqual(self.counters(), self.actual())
+
+        bookmark = Bookmark.objects.get(job=self.jobs[3])
+        self.client.post(
+            reverse("bookmark-bulk"), {"delete": [bookmark.id]}, format="json"
+        )
+        self.folder.delete()
+        self.assertEqual(self.counters(), self.actual())
+        self.assertEqual(
+            self.counters(), {(None, "Interviewing"): 1, (None, "Offered"): 1}
+        )
+
+    def test_summary_and_folder_counts(self):
+        Bookmark.objects.create(user=self.user, job=self.jobs[0])
+        Bookmark.objects.create(
+            user=self.user,
+            job=self.jobs[1],
+            folder=self.folder,
+            status=JobBookmarkStatus.APPLIED,
+        )
+        Bookmark.objects.create(
+            user=self.user,
+            job=self.jobs[2],
+            folder=self.folder,
+            status=JobBookmarkStatus.APPLIED,
+        )
+        self.client.force_authenticate(self.user)
+
+        summary = self.client.get(reverse("bookmark-summary")).data
+        self.assertEqual(summary["total"], 3)
+        self.assertEqual(summary["pipeline"]["Saved"], 1)
+        self.assertEqual(summary["pipeline"]["Applied"], 2)
+        self.assertEqual(summary["unfiled"]["total"], 1)
+        self.assertEqual(
+            [(entry["folder_name"], entry["total"]) for entry in summary["folders"]],
+            [("todo", 2)],
+        )
+
+        folders = self.client.get(reverse("bookmarkfolder-list")).data
+        self.assertEqual(folders[0]["bookmark_counts"]["total"], 2)
+        self.assertEqual(folders[0]["bookmark_counts"]["Applied"], 2)
+
+    def test_failed_batch_writes_nothing(self):
+        with self.assertRaises(RuntimeError):
+            with bookmark_counters.batch():
+                bookmark_counters.add(self.user.id, None, JobBookmarkStatus.SAVED)
+                raise RuntimeError
+        self.assertEqual(self.counters(), {})
+
+    def test_reconcile_repairs_drift(self):
+        Bookmark.objects.create(user=self.user, job=self.jobs[0])
+        Bookmark.objects.create(user=self.user, job=self.jobs[1], folder=self.folder)
+        # Writes that bypass the counters
+        Bookmark.objects.filter(job=self.jobs[0]).update(
+            status=JobBookmarkStatus.APPLIED
+        )
+        BookmarkCounter.objects.filter(folder=self.folder).delete()
+        BookmarkCounter.objects.create(
+            user=self.user, status=JobBookmarkStatus.OFFERED, count=4
+        )
+
+        out = StringIO()
+        call_command("reconcile_bookmark_counters", stdout=out)
+        self.assertIn("Repaired 4 bookmark counters.", out.getvalue())
+        self.assertEqual(self.counters(), self.actual())
+
+        call_command("reconcile_bookmark_counters", user=[self.user.email], stdout=out)
+        self.assertIn("Repaired 0 bookmark counters.", out.getvalue())
+
+
+class JobExportTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email="export@gmail.com", password="password123", is_test_user=True
+        )
+        self.published = {"status": JobStatus.PUBLISHED, "is_approved": True}
+        self.job = create_job(
+            self.user,
+            title="python developer",
+            job_description='builds "apis",\nmostly',
+            **self.published,
+        )
+        create_job(self.user, title="draft job")
+        self.path = reverse("job-export")
+
+    def export(self, **params):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.path, params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_export_streams_published_jobs(self):
+        rows = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["slug"], str(self.job.slug))
+        self.assertEqual(rows[0]["salary"], "200000.00")
+        self.assertEqual(
+            rows[0]["job_skills"],
+            [
+                {"skill": "django", "skill_level": "Advanced"},
+                {"skill": "python", "skill_level": "Beginner"},
+            ],
+        )
+        self.assertEqual(rows[0]["tags"], ["django", "python"])
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.path).status_code, 403)
+
+    def test_csv_export_can_be_imported(self):
+        lines = self.export(output="csv").splitlines(keepends=True)
+        report = JobImporter(posted_by=self.user, format="csv").run(lines)
+        self.assertEqual((report.created, report.failed), (1, 0))
+        imported = Job.objects.latest("id")
+        self.assertEqual(imported.job_description, self.job.job_description)
+        self.assertEqual(imported.salary, self.job.salary)
+        self.assertEqual(
+            dict(imported.job_skills.values_list("skill__name", "skill_level")),
+            {"python": "Beginner", "django": "Advanced"},
+        )
+
+    def test_since_exports_changes_and_tombstones(self):
+        old = timezone.now() - timedelta(days=3)
+        scheduled = create_job(
+            self.user, title="scheduled job", is_approved=True, scheduled_publish_at=old
+        )
+        create_job(self.user, title="unapproved job", status=JobStatus.PUBLISHED)
+        Job.objects.update(changed_at=old)
+        newer = create_job(self.user, title="newer job", **self.published)
+        # Published with published_at in the past
+        JobScheduler().publish_due()
+        Job.objects.filter(pk=self.job.pk).update(
+            application_deadline=timezone.now() - timedelta(days=1)
+        )
+        JobScheduler().expire_past_deadline()
+
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        rows = [json.loads(line) for line in self.export(since=since).splitlines()]
+        self.assertEqual(
+            [row["slug"] for row in rows[:-1]], [str(scheduled.slug), str(newer.slug)]
+        )
+        self.assertEqual(rows[-1], {"slug": str(self.job.slug), "deleted": True})
+        self.assertNotIn("deleted", self.export(since=since, output="csv"))
+
+        err = StringIO()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "jobs.ndjson")
+            call_command(
+                "export_jobs", path, since=since, stdout=StringIO(), stderr=err
+            )
+        self.assertIn("Exported 2 jobs and 1 tombstones.", err.getvalue())
+        with self.assertRaises(CommandError):
+            call_command("export_jobs", path, since="yesterday")
+
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.path, {"since": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(self.path, {"output": "xml"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_queries_per_chunk_not_per_job(self):
+        for index in range(9):
+            create_job(self.user, title=f"job {index}", **self.published)
+        ContentType.objects.get_for_model(Job)
+        counts = []
+        for chunk_size in (10, 5):
+            with CaptureQueriesContext(connection) as queries:
+                rows = list(JobExporter(chunk_size=chunk_size).rows())
+            self.assertEqual(len(rows), 10)
+            counts.append(len(queries))
+        # One batch of skills and one of tags per chunk
+        self.assertEqual(counts[1] - counts[0], 2)
+
+    def test_export_command_writes_a_file(self):
+        out, err = StringIO(), StringIO()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "jobs.csv")
+            call_command("export_jobs", path, format="csv", stdout=out, stderr=err)
+            with open(path, newline="") as f:
+                content = f.read()
+        self.assertIn("Exported 1 jobs.", err.getvalue())
+        self.assertTrue(content.startswith("slug,job_title,"))
+
+
+class JobFeedTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.use_feed_root()
+        self.user = User.objects.create_user(
+            email="feeds@gmail.com", password="password123", is_test_user=True
+        )
+        self.job = create_job(
+            self.user, title="python developer", status=JobStatus.PUBLISHED
+        )
+
+    def fetch(self, name, **headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("job-feed", kwargs={"name": name}), headers=headers
+            )
+        self.assertEqual(len(queries), 0)
+        return response
+
+    def content(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_approval_and_expiry_update_the_feeds(self):
+        self.assertEqual(self.fetch("jobs.rss").status_code, 404)
+
+        self.job.is_approved = True
+        self.job.save()
+        # Nothing is written until the scheduler runs
+        self.assertEqual(self.fetch("jobs.rss").status_code, 404)
+        JobScheduler().run_once()
+        for name in ("jobs.rss", "jobs.atom", "jobs.json", "sitemap-0.xml"):
+            response = self.fetch(name)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(str(self.job.slug), self.content(response))
+        items = json.loads(self.content(self.fetch("jobs.json")))["items"]
+        self.assertEqual(items[0]["title"], "python developer at tech inc")
+        self.assertIn("sitemap-0.xml", self.content(self.fetch("sitemap.xml")))
+
+        Job.objects.filter(pk=self.job.pk).update(
+            application_deadline=timezone.now() - timedelta(days=1)
+        )
+        JobScheduler().run_once()
+        self.assertNotIn(str(self.job.slug), self.content(self.fetch("jobs.rss")))
+        self.assertEqual(self.fetch("sitemap-0.xml").status_code, 404)
+        self.assertNotIn("sitemap-0.xml", self.content(self.fetch("sitemap.xml")))
+
+    def test_approving_unscheduled_jobs_publishes_them(self):
+        admin = User.objects.create_superuser(
+            email="feeds.admin@gmail.com", password="password123"
+        )
+        drafts = [create_job(self.user, title=f"draft {index}") for index in range(2)]
+        scheduled = create_job(
+            self.user,
+            title="scheduled",
+            scheduled_publish_at=timezone.now() + timedelta(days=1),
+        )
+        self.client.force_authenticate(admin)
+        self.client.post(
+            reverse("job-approve", kwargs={"slug": drafts[0].slug}),
+            {"is_approved": True},
+            format="json",
+        )
+        self.client.post(
+            reverse("job-bulk-approve"),
+            {
+                "decisions": [
+                    {"slug": str(job.slug), "is_approved": True}
+                    for job in (drafts[1], scheduled)
+                ]
+            },
+            format="json",
+        )
+        feed_writer.update_pending()
+
+        rss = self.content(self.fetch("jobs.rss"))
+        sitemap = self.content(self.fetch("sitemap-0.xml"))
+        for job in drafts:
+            self.assertIn(str(job.slug), rss)
+            self.assertIn(str(job.slug), sitemap)
+        self.assertNotIn(str(scheduled.slug), rss)
+        self.assertEqual(Job.objects.get(pk=scheduled.pk).status, JobStatus.DRAFT)
+        self.assertIsNotNone(Job.objects.get(pk=drafts[1].pk).published_at)
+
+    def test_only_changes_to_visible_jobs_are_recorded(self):
+        self.job.job_title = "draft edit"
+        self.job.save()
+        self.assertFalse(JobFeedChange.objects.exists())
+
+        self.job.is_approved = True
+        self.job.save()
+        self.job.salary = 1000
+        self.job.save()
+        self.assertEqual(JobFeedChange.objects.count(), 1)
+
+        self.job.job_title = "senior python developer"
+        self.job.save()
+        self.assertEqual(JobFeedChange.objects.count(), 2)
+        self.assertEqual(feed_writer.update_pending(), 1)
+        self.assertFalse(JobFeedChange.objects.exists())
+        self.assertIn("senior python developer", self.content(self.fetch("jobs.rss")))
+
+        Job.objects.get(pk=self.job.pk).delete()
+        self.assertEqual(feed_writer.update_pending(), 1)
+        self.assertEqual(self.fetch("sitemap-0.xml").status_code, 404)
+
+    def test_conditional_and_gzipped_requests(self):
+        self.job.is_approved = True
+        self.job.save()
+        feed_writer.update_pending()
+        response = self.fetch("jobs.atom")
+        etag = response["ETag"]
+        self.assertEqual(
+            response["Content-Type"], "application/atom+xml; charset=utf-8"
+        )
+        self.assertEqual(self.fetch("jobs.atom", if_none_match=etag).status_code, 304)
+        self.assertEqual(
+            self.fetch(
+                "jobs.atom", if_modified_since=response["Last-Modified"]
+            ).status_code,
+            304,
+        )
+
+        compressed = self.fetch("jobs.atom", accept_encoding="gzip, br")
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertNotEqual(compressed["ETag"], etag)
+        self.assertIn(
+            str(self.job.slug),
+            gzip.decompress(b"".join(compressed.streaming_content)).decode(),
+        )
+
+        # Regenerating identical content keeps the ETag valid
+        feed_writer.rebuild()
+        self.assertEqual(self.fetch("jobs.atom", if_none_match=etag).status_code, 304)
+
+    def test_update_only_rebuilds_the_sitemap_files_of_changed_jobs(self):
+        jobs = [
+            create_job(
+                self.user,
+                title=f"job {index}",
+                status=JobStatus.PUBLISHED,
+                is_approved=True,
+            )
+            for index in range(4)
+        ]
+        with mock.patch.object(feed_writer, "sitemap_chunk_size", 2):
+            feed_writer.rebuild()
+            self.assertEqual(
+                feed_writer.sitemap_chunks(), sorted({job.id // 2 for job in jobs})
+            )
+            with CaptureQueriesContext(connection) as queries:
+                feed_writer.update([jobs[0].id])
+            # The feeds and a single sitemap file
+            self.assertEqual(len(queries), 2)
+
+        out = StringIO()
+        call_command("build_job_feeds", stdout=out)
+        self.assertIn("1 sitemap files", out.getvalue())
+
+
+class JobBulkApproveTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser(
+            email="admin@gmail.com", password="password123"
+        )
+        self.posters = [
+            User.objects.create_user(
+                email=f"poster{index}@gmail.com",
+                password="password123",
+                is_test_user=True,
+            )
+            for index in range(2)
+        ]
+        self.jobs = [
+            create_job(self.posters[index % 2], title=f"job {index}")
+            for index in range(4)
+        ]
+        self.path = reverse("job-bulk-approve")
+        self.client.force_authenticate(self.admin)
+        mail.outbox.clear()
+
+    def decide(self, decisions):
+        return self.client.post(self.path, {"decisions": decisions}, format="json")
+
+    def test_applies_decisions_and_groups_emails_per_poster(self):
+        missing = str(uuid.uuid4())
+        decisions = [
+            {"slug": str(job.slug), "is_approved": index != 2}
+            for index, job in enumerate(self.jobs)
+        ]
+        decisions[2]["message"] = "Please add a salary range."
+        decisions.append({"slug": missing, "is_approved": True})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.decide(decisions)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result["result"] for result in response.data["results"]],
+            ["approved", "approved", "rejected", "approved", "not_found"],
+        )
+        self.assertEqual(response.data["results"][4]["slug"], missing)
+        self.assertEqual(
+            len(
+                [
+                    query
+                    for query in queries
+                    if query["sql"].startswith('UPDATE "job_listing_api_job"')
+                ]
+            ),
+            1,
+        )
+        self.assertEqual(
+            dict(Job.objects.values_list("job_title", "is_approved")),
+            {"job 0": True, "job 1": True, "job 2": False, "job 3": True},
+        )
+
+        self.assertEqual(
+            sorted(email.to for email in mail.outbox),
+            [[poster.email] for poster in self.posters],
+        )
+        first = next(
+            email for email in mail.outbox if email.to == [self.posters[0].email]
+        )
+        self.assertIn("Approved: Job 0.", first.body)
+        self.assertIn("Rejected: Job 2.", first.body)
+        self.assertIn("Please add a salary range.", first.body)
+
+    def test_validation_and_permissions(self):
+        slug = str(self.jobs[0].slug)
+        response = self.decide(
+            [{"slug": slug, "is_approved": True}, {"slug": slug, "is_approved": False}]
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.decide([]).status_code, 400)
+
+        self.client.force_authenticate(self.posters[0])
+        self.assertEqual(
+            self.decide([{"slug": slug, "is_approved": True}]).status_code, 403
+        )
+        self.assertFalse(Job.objects.filter(is_approved=True).exists())
+        self.assertEqual(mail.outbox, [])
+
+
+class ModerationQueueTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.moderators = [
+            User.objects.create_superuser(
+                email=f"moderator{index}@gmail.com", password="password123"
+            )
+            for index in range(2)
+        ]
+        self.poster = User.objects.create_user(
+            email="poster@gmail.com", password="password123", is_test_user=True
+        )
+        self.jobs = [
+            create_job(self.poster, title=f"job {index}") for index in range(5)
+        ]
+        create_job(self.poster, title="approved job", is_approved=True)
+        self.claim_path = reverse("job-moderation-claim")
+
+    def claim(self, moderator, batch_size):
+        self.client.force_authenticate(moderator)
+        response = self.client.post(
+            self.claim_path, {"batch_size": batch_size}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        return [result["job_title"] for result in response.data["results"]]
+
+    def test_concurrent_claims_never_overlap(self):
+        self.assertEqual(self.claim(self.moderators[0], 2), ["job 0", "job 1"])
+        self.assertEqual(self.claim(self.moderators[1], 2), ["job 2", "job 3"])
+        self.assertEqual(self.claim(self.moderators[0], 10), ["job 4"])
+        self.assertEqual(self.claim(self.moderators[1], 10), [])
+        self.assertEqual(Job.objects.filter(claimed_by=self.moderators[0]).count(), 3)
+
+    def test_claims_are_bounded_by_the_batch(self):
+        with CaptureQueriesContext(connection) as queries:
+            moderation_queue.claim(self.moderators[0], 2)
+        sql = " ".join(query["sql"] for query in queries)
+        self.assertIn("LIMIT 2", sql)
+
+    def test_expired_and_released_claims_return_to_the_queue(self):
+        self.claim(self.moderators[0], 2)
+        Job.objects.filter(slug=self.jobs[0].slug).update(
+            claimed_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(self.claim(self.moderators[1], 1), ["job 0"])
+
+        response = self.client.post(
+            reverse("job-moderation-release"), {}, format="json"
+        )
+        self.assertEqual(response.data["released"], 1)
+        self.assertEqual(self.claim(self.moderators[1], 1), ["job 0"])
+
+    def test_decisions_respect_and_release_claims(self):
+        self.claim(self.moderators[0], 2)
+        self.client.force_authenticate(self.moderators[1])
+        response = self.client.post(
+            reverse("job-bulk-approve"),
+            {
+                "decisions": [
+                    {"slug": str(self.jobs[0].slug), "is_approved": True},
+                    {"slug": str(self.jobs[2].slug), "is_approved": False},
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(
+            [result["result"] for result in response.data["results"]],
+            ["claimed", "rejected"],
+        )
+        self.assertFalse(Job.objects.get(pk=self.jobs[0].pk).is_approved)
+        response = self.client.post(
+            reverse("job-approve", kwargs={"slug": self.jobs[0].slug}),
+            {"is_approved": True},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Job.objects.get(pk=self.jobs[0].pk).is_approved)
+
+        self.client.force_authenticate(self.moderators[0])
+        response = self.client.post(
+            reverse("job-approve", kwargs={"slug": self.jobs[0].slug}),
+            {"is_approved": True},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        job = Job.objects.get(pk=self.jobs[0].pk)
+        self.assertEqual((job.is_approved, job.claimed_by_id), (True, None))
+
+    def test_rejected_jobs_are_not_claimed_again(self):
+        self.claim(self.moderators[0], 2)
+        self.client.post(
+            reverse("job-bulk-approve"),
+            {"decisions": [{"slug": str(self.jobs[0].slug), "is_approved": False}]},
+            format="json",
+        )
+        self.client.post(
+            reverse("job-approve", kwargs={"slug": self.jobs[1].slug}),
+            {"is_approved": False},
+            format="json",
+        )
+        self.assertEqual(
+            self.claim(self.moderators[1], 10), ["job 2", "job 3", "job 4"]
+        )
+
+    def test_edited_revisions_return_to_the_queue(self):
+        self.claim(self.moderators[0], 2)
+        self.client.post(
+            reverse("job-approve", kwargs={"slug": self.jobs[0].slug}),
+            {"is_approved": False},
+            format="json",
+        )
+        for job in self.jobs[:2]:
+            serializer = JobSerializer(
+                Job.objects.get(pk=job.pk),
+                data={
+                    "job_title": f"{job.job_title} edited",
+                    "company_name": "Tech Inc",
+                    "job_skills": [
+                        {"skill": {"name": "python"}, "skill_level": "Advanced"}
+                    ],
+                },
+                partial=True,
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+        self.assertEqual(
+            self.claim(self.moderators[1], 10),
+            ["job 2", "job 3", "job 4", "job 0 edited", "job 1 edited"],
+        )
+
+    def test_queue_is_admin_only(self):
+        self.client.force_authenticate(self.poster)
+        self.assertEqual(self.client.post(self.claim_path).status_code, 403)
+
+
+class CompiledJobSerializerTestCase(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            email="compiled.poster@gmail.com", password="password123", is_test_user=True
+        )
+        original = create_job(self.user, title="backend engineer", salary=None)
+        self.jobs = [
+            create_job(
+                self.user,
+                title="senior backend engineer",
+                original_job=original,
+                duplicate_of=original,
+                salary=150,
+                status=JobStatus.PUBLISHED,
+                published_at=timezone.now(),
+                application_deadline=timezone.now() + timedelta(days=30),
+            ),
+            create_job(self.user, title="go developer", skills={}, salary=-5),
+            create_job(
+                self.user, title="django developer", skills={"django": "Advanced"}
+            ),
+        ]
+        self.jobs[2].tags.add("remote", "lagos")
+        Job.objects.filter(pk=original.pk).update(is_current=False)
+
+    def render_both(self, queryset, query=None):
+        request = Request(APIRequestFactory().get("/", query))
+        view = JobViewset(
+            request=request, action="job_list", format_kwarg=None, kwargs={}
+        )
+        queryset = view.get_queryset().filter(is_current=True) & queryset
+        expected = JobSerializer(
+            queryset.order_by("id"), many=True, context={"request": request}
+        ).data
+        serializer = CompiledJobSerializer(context=view.get_serializer_context())
+        compiled = serializer.render_many(serializer.values(queryset.order_by("id")))
+        return JSONRenderer().render(expected), JSONRenderer().render(compiled)
+
+    def test_output_is_byte_identical(self):
+        with timezone.override("Africa/Lagos"):
+            expected, compiled = self.render_both(Job.objects.all())
+        self.assertEqual(compiled, expected)
+        self.assertIn(b'"salary":"1.50"', compiled)
+        self.assertIn(b'"salary":"-0.05"', compiled)
+
+        expected, compiled = self.render_both(Job.objects.all(), {"format": "json"})
+        self.assertEqual(compiled, expected)
+        self.assertIn(b"?format=json", compiled)
+
+    def test_views_render_with_the_compiled_serializer(self):
+        request = Request(APIRequestFactory().get("/"))
+        job = Job.objects.get(pk=self.jobs[0].pk)
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse("job-detail", kwargs={"slug": job.slug}))
+        self.assertEqual(
+            response.content,
+            JSONRenderer().render(
+                JobSerializer(job, context={"request": request}).data
+            ),
+        )
+
+        response = self.client.get(reverse("job-job-list"), {"ordering": "salary"})
+        self.assertEqual(
+            [result["job_title"] for result in response.data["results"]],
+            ["go developer", "senior backend engineer", "django developer"],
+        )
+        self.assertIsNone(
+            self.client.get(
+                reverse("job-job-list"), {"ordering": "salary", "page_size": 1}
+            ).data["previous"]
+        )
+
+    def test_unsupported_fields_are_refused(self):
+        class ExtendedJobSerializer(JobSerializer):
+            summary = serializers.SerializerMethodField()
+
+            def get_summary(self, instance):
+                return instance.job_title
+
+        with self.assertRaises(ImproperlyConfigured):
+            compile_plan(ExtendedJobSerializer)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("benchmark_job_serializer", rows=10, repeat=1, stdout=out)
+        self.assertIn("Rendered 3 jobs", out.getvalue())
+        self.assertIn("Identical output", out.getvalue())
@@ -1,4 +1,4 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
 from rest_framework_simplejwt.views import TokenObtainPairView
@@ -8,6 +8,7 @@ from job_listing_api.views import (
     BookmarkViewset,
     JobApproveView,
     JobViewset,
+    serve_feed,
 )
 
 router = DefaultRouter()
@@ -20,5 +21,10 @@ router.register(r"bookmark-folders", BookmarkFolderViewset)
 urlpatterns = [
     path("", include(router.urls)),
     path("job/approve/<slug:slug>/", JobApproveView.as_view(), name="job-approve"),
-    path("login/", TokenObtainPairView.as_view())
+    path("login/", TokenObtainPairView.as_view()),
+    re_path(
+        r"^feeds/(?P<name>jobs\.(?:rss|atom|json)|sitemap(?:-\d+)?\.xml)$",
+        serve_feed,
+        name="job-feed",
+    ),
 ]
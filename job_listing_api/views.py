@@ -1,29 +1,60 @@
-from django.db.models import Q
+import codecs
+import os
+
+from django.db.models import F, Prefetch
 from django.db.transaction import atomic
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
 from django.utils import timezone
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets
 from rest_framework.authentication import SessionAuthentication
 from rest_framework.decorators import action
-from rest_framework.exceptions import MethodNotAllowed
-from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.exceptions import MethodNotAllowed, ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from common.filterset import JobFilterset
 from common.helper import Helper
+from common.pagination import KeysetPagination
 
+from .bookmark_stats import bookmark_counters
+from .cache import job_facets_cache, job_list_cache
+from .compiled import CompiledJobSerializer
+from .counters import job_view_counter
 from .email import JobNotificationEmail
-from .models import Bookmark, BookmarkFolder, Job
+from .export import JobExporter, parse_since
+from .facets import compute_facets
+from .feeds import feed_writer
+from .importer import JobImporter
+from .models import Bookmark, BookmarkFolder, Job, JobSkill
+from .moderation import moderation_queue
 from .permissions import IsJobPoster, HasObjectPermission
+from .recommend import skill_matrix
+from .search import get_search_backend
 from .serializers import (
+    BookmarkBulkSerializer,
     BookmarkFolderSerializer,
     BookmarkSerializer,
     JobApproveSerializer,
+    JobBulkApproveSerializer,
+    JobClaimSerializer,
+    JobReleaseSerializer,
     JobSerializer,
 )
+from .suggest import suggester
 
 # Create your views here.
 
@@ -33,28 +64,43 @@ class JobViewset(viewsets.ModelViewSet, Helper):
     serializer_class = JobSerializer
     authentication_classes = [SessionAuthentication, JWTAuthentication]
     permission_classes = [IsJobPoster]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    search_fields = [
-        "job_title",
-        "employment_type",
-        "tags__name",
-    ]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    pagination_class = KeysetPagination
     ordering_fields = [
+        "created_at",
         "job_title",
         "employment_type",
-        "tags__name",
         "salary",
     ]
-    ordering = ["job_title"]
+    ordering = ["-created_at"]
     filterset_class = JobFilterset
     lookup_field = "slug"
 
+    def get_queryset(self):
+        """
+        Load every relation JobSerializer renders up front so that listing and
+        retrieving jobs costs a fixed number of queries regardless of page size.
+
+        Listings only see the current revision of each job. Older revisions
+        stay reachable by slug so a job's history can still be followed.
+        """
+        queryset = super().get_queryset()
+        if self.action in ("list", "job_list", "facets"):
+            queryset = queryset.filter(is_current=True)
+        return queryset.select_related(
+            "posted_by", "company", "original_job", "duplicate_of"
+        ).prefetch_related(
+            Prefetch("job_skills", queryset=JobSkill.objects.select_related("skill")),
+            "tags",
+        )
+
     def list(self, request, *args, **kwargs):
         raise MethodNotAllowed(method="get")
 
     def filter_queryset(self, queryset):
         """
-        Apply additional search filters while maintaining queryset ordering.
+        Apply the full-text search, then the filterset and ordering. Searches
+        are ranked by relevance unless an explicit ordering is requested.
         """
         search_param = self.request.query_params.get("search")
 
@@ -62,17 +108,15 @@ class JobViewset(viewsets.ModelViewSet, Helper):
             search_terms = [
                 term.strip().lower() for term in search_param.split(",") if term.strip()
             ]
-            skill_filter = Q()
-            for term in search_terms:
-                skill_filter |= (
-                    Q(job_title__icontains=term)
-                    | Q(employment_type__icontains=term)
-                    | Q(tags__name__icontains=term)
-                    | Q(job_skills__skill_level__icontains=term)
-                )
-            queryset = queryset.filter(skill_filter).distinct()
+            queryset = get_search_backend().filter(queryset, search_terms)
 
-        return super().filter_queryset(queryset)
+        queryset = super().filter_queryset(queryset)
+
+        if search_param and not self.request.query_params.get(
+            api_settings.ORDERING_PARAM
+        ):
+            queryset = queryset.order_by("-search_rank", "-created_at")
+        return queryset
 
     @atomic()
     def create(self, request, *args, **kwargs):
@@ -102,20 +146,229 @@ class JobViewset(viewsets.ModelViewSet, Helper):
         url_name="job-list",
     )
     def job_list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
+        cache_key = job_list_cache.get_key(request)
+        data = job_list_cache.get(cache_key)
+        if data is not None:
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        serializer = CompiledJobSerializer(context=self.get_serializer_context())
+        rows = serializer.values(self.filter_queryset(self.get_queryset()))
 
-        page = self.paginate_queryset(queryset)
+        page = self.paginate_queryset(rows)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            response = self.get_paginated_response(serializer.render_many(page))
+        else:
+            response = Response(serializer.render_many(rows))
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        job_list_cache.set(cache_key, response.data)
+        response["X-Cache"] = "MISS"
+        return response
+
+    @action(methods=["get"], detail=False, url_path="facets", url_name="facets")
+    def facets(self, request, *args, **kwargs):
+        """
+        Facet counts for the jobs matching the same filters as job_list.
+        """
+        cache_key = job_facets_cache.get_key(request)
+        data = job_facets_cache.get(cache_key)
+        if data is not None:
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        data = compute_facets(self.filter_queryset(self.get_queryset()))
+        job_facets_cache.set(cache_key, data)
+        return Response(data, headers={"X-Cache": "MISS"})
+
+    @action(methods=["get"], detail=False, url_path="suggest", url_name="suggest")
+    def suggest(self, request, *args, **kwargs):
+        """
+        Skill, tag and company names starting with `q`, most used first.
+        """
+        try:
+            limit = min(int(request.query_params.get("limit", 10)), 50)
+        except ValueError:
+            raise ValidationError({"limit": "A valid integer is required."})
+        return Response(
+            {"results": suggester.suggest(request.query_params.get("q", ""), limit)}
+        )
+
+    @action(
+        methods=["get"],
+        detail=False,
+        url_path="recommended",
+        url_name="recommended",
+        permission_classes=[IsAuthenticated],
+    )
+    def recommended(self, request, *args, **kwargs):
+        """
+        Published jobs ranked by how well their skills match the jobs the
+        user bookmarked.
+        """
+        try:
+            limit = min(int(request.query_params.get("limit", 10)), 50)
+        except ValueError:
+            raise ValidationError({"limit": "A valid integer is required."})
+        scores = dict(skill_matrix.recommend(request.user, limit))
+        jobs = sorted(
+            self.get_queryset().filter(id__in=scores),
+            key=lambda job: (scores[job.id], job.id),
+            reverse=True,
+        )
+        results = self.get_serializer(jobs, many=True).data
+        for job, data in zip(jobs, results):
+            data["score"] = round(scores[job.id], 4)
+        return Response({"results": results})
+
+    @action(
+        methods=["get"],
+        detail=False,
+        url_path="cache-stats",
+        url_name="cache-stats",
+        permission_classes=[IsAdminUser],
+    )
+    def cache_stats(self, request, *args, **kwargs):
+        return Response(job_list_cache.stats())
+
+    @action(
+        methods=["post"],
+        detail=False,
+        url_path="bulk-import",
+        url_name="bulk-import",
+        permission_classes=[IsAdminUser],
+        parser_classes=[MultiPartParser],
+    )
+    def bulk_import(self, request, *args, **kwargs):
+        """
+        Import a CSV or NDJSON `file` of jobs. Not atomic on purpose: every
+        chunk of rows is committed on its own, see JobImporter.
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": "This field is required."})
+        file_format = request.data.get("format") or JobImporter.guess_format(
+            upload.name
+        )
+        if file_format not in JobImporter.formats:
+            raise ValidationError(
+                {"format": f"Must be one of: {', '.join(JobImporter.formats)}."}
+            )
+
+        report = JobImporter(posted_by=request.user, format=file_format).run(
+            codecs.iterdecode(upload, "utf-8-sig")
+        )
+        return Response(report.as_dict())
+
+    @action(
+        methods=["post"],
+        detail=False,
+        url_path="bulk-approve",
+        url_name="bulk-approve",
+        permission_classes=[IsAdminUser],
+    )
+    def bulk_approve(self, request, *args, **kwargs):
+        """
+        Approve or reject many jobs at once. Posters get one email covering
+        all of their decided jobs.
+        """
+        serializer = JobBulkApproveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({"results": serializer.save(user=request.user)})
+
+    @action(
+        methods=["post"],
+        detail=False,
+        url_path="moderation/claim",
+        url_name="moderation-claim",
+        permission_classes=[IsAdminUser],
+    )
+    def moderation_claim(self, request, *args, **kwargs):
+        """
+        Claim the next `batch_size` unapproved jobs no other moderator holds,
+        for JOB_MODERATION_LEASE seconds.
+        """
+        serializer = JobClaimSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        jobs = moderation_queue.claim(
+            request.user, serializer.validated_data["batch_size"]
+        ).values(
+            "slug",
+            "job_title",
+            "company_name",
+            "created_at",
+            "claimed_until",
+            duplicate_of_slug=F("duplicate_of__slug"),
+        )
+        return Response({"results": list(jobs)})
+
+    @action(
+        methods=["post"],
+        detail=False,
+        url_path="moderation/release",
+        url_name="moderation-release",
+        permission_classes=[IsAdminUser],
+    )
+    def moderation_release(self, request, *args, **kwargs):
+        """
+        Give claimed jobs back to the moderation queue, by default all of them.
+        """
+        serializer = JobReleaseSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        released = moderation_queue.release(
+            request.user, serializer.validated_data.get("slugs")
+        )
+        return Response({"released": released})
+
+    @action(
+        methods=["get"],
+        detail=False,
+        url_path="export",
+        url_name="export",
+        permission_classes=[IsAuthenticated],
+    )
+    def export(self, request, *args, **kwargs):
+        """
+        Stream every published job as NDJSON (`output=ndjson`, the default)
+        or CSV (`output=csv`), optionally only those changed `since` an ISO
+        8601 date or time, see JobExporter.
+        """
+        output = request.query_params.get("output", "ndjson")
+        if output not in JobExporter.formats:
+            raise ValidationError(
+                {"output": f"Must be one of: {', '.join(JobExporter.formats)}."}
+            )
+        since = request.query_params.get("since")
+        if since:
+            since = parse_since(since)
+            if since is None:
+                raise ValidationError(
+                    {"since": "A valid ISO 8601 date or time is required."}
+                )
+
+        exporter = JobExporter(format=output, since=since)
+        response = StreamingHttpResponse(
+            exporter.render(), content_type=exporter.content_type
+        )
+        response["Content-Disposition"] = f'attachment; filename="jobs.{output}"'
+        return response
 
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        serializer = CompiledJobSerializer(context=self.get_serializer_context())
+        row = self.get_row(serializer)
+        job_view_counter.record(row["id"])
+        return Response(serializer.render_many([row])[0])
+
+    def get_row(self, serializer):
+        """
+        get_object() for the compiled read path, returning the job as a
+        `.values()` row.
+        """
+        queryset = serializer.values(self.filter_queryset(self.get_queryset()))
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        # Object permissions of safe methods only look at the user
+        self.check_object_permissions(self.request, row)
+        return row
 
     @atomic()
     def update(self, request, *args, **kwargs):
@@ -152,7 +405,7 @@ class JobApproveView(APIView):
         job_instance = Job.objects.get(slug=slug)
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
-        updated_job = serializer.save(job_instance=job_instance)
+        updated_job = serializer.save(job_instance=job_instance, user=request.user)
         status = "approved" if updated_job.is_approved else "rejected"
         message = (
             serializer.data.get("message") if serializer.data.get("message") else None
@@ -178,7 +431,9 @@ class BookmarkFolderViewset(viewsets.ModelViewSet):
 
     def get_queryset(self):
         if self.action == "list" or self.action == "retrieve":
-            return BookmarkFolder.objects.filter(user=self.request.user)
+            return BookmarkFolder.objects.filter(
+                user=self.request.user
+            ).prefetch_related("counters")
         else:
             return self.serializer_class
 
@@ -223,9 +478,10 @@ class BookmarkViewset(viewsets.ModelViewSet):
     queryset = Bookmark.objects.all()
     permission_classes = [HasObjectPermission]
     serializer_class = BookmarkSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        return Bookmark.objects.filter(user=self.request.user)
+        return Bookmark.objects.filter(user=self.request.user).select_related("job")
 
     @atomic()
     def partial_update(self, request, *args, **kwargs):
@@ -267,3 +523,72 @@ class BookmarkViewset(viewsets.ModelViewSet):
             bookmark_instance, context={"request": request}
         ).data
         return Response(response_data)
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request, *args, **kwargs):
+        """
+        Create, move, re-status and delete many bookmarks in one transaction.
+        Responds with a compact result per item instead of full bookmarks.
+        """
+        serializer = BookmarkBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({"results": serializer.save(user=request.user)})
+
+    @action(detail=False, methods=["get"])
+    def summary(self, request, *args, **kwargs):
+        """
+        The user's bookmark pipeline per status, per folder and outside any
+        folder, read from the maintained counters.
+        """
+        return Response(bookmark_counters.summary(request.user))
+
+
+FEED_CONTENT_TYPES = {
+    ".rss": "application/rss+xml; charset=utf-8",
+    ".atom": "application/atom+xml; charset=utf-8",
+    ".json": "application/feed+json; charset=utf-8",
+    ".xml": "application/xml; charset=utf-8",
+}
+
+
+@require_safe
+def serve_feed(request, name):
+    """
+    Serve a pre-rendered feed or sitemap file, gzipped when the client
+    accepts it, answering conditional requests with 304. Never queries the
+    database.
+    """
+    path = feed_writer.path(name)
+    encoding = None
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        compressed = feed_writer.path(f"{name}.gz")
+        if compressed.exists():
+            path, encoding = compressed, "gzip"
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        raise Http404("Feed not found.")
+
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{"-gz" if encoding else ""}"'
+    last_modified = http_date(stat.st_mtime)
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        not_modified = etag in tags or "*" in tags
+    else:
+        since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+        not_modified = since is not None and int(stat.st_mtime) <= since
+    if not_modified:
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(
+            path.open("rb"),
+            content_type=FEED_CONTENT_TYPES[os.path.splitext(name)[1]],
+        )
+        if encoding:
+            response["Content-Encoding"] = encoding
+    response["ETag"] = etag
+    response["Last-Modified"] = last_modified
+    response["Vary"] = "Accept-Encoding"
+    response["Cache-Control"] = "public, max-age=300"
+    return response
@@ -60,6 +60,9 @@ class UserUpload(models.Model):
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["-created_at"]),
+            # Keyset pagination of the published and per-user listings
+            models.Index(fields=["status", "created_at", "id"]),
+            models.Index(fields=["user", "created_at", "id"]),
         ]
 
     published = PublishManager()
@@ -69,6 +72,9 @@ class UserUpload(models.Model):
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["-created_at"]),
+            # Keyset pagination of the published and per-user listings
+            models.Index(fields=["status", "created_at", "id"]),
+            models.Index(fields=["user", "created_at", "id"]),
         ]
 
     def __str__(self):
@@ -5,6 +5,8 @@ from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from common.pagination import KeysetPagination
+
 from .models import UserUpload
 from .permissions import CustomPermission
 from .serializers import UserUploadSerializer
@@ -39,6 +41,7 @@ class PublishedUploadsListAPIView(generics.ListAPIView):
     queryset = UserUpload.published.all()
     serializer_class = UserUploadSerializer
     permission_classes = [CustomPermission]
+    pagination_class = KeysetPagination
 
 
 class UpdateUploadStatusAPIView(APIView):
@@ -59,6 +62,7 @@ class UpdateUploadStatusAPIView(APIView):
 class UserUploadsListAPIView(generics.ListAPIView):
     serializer_class = UserUploadSerializer
     permission_classes = [CustomPermission]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return UserUpload.objects.filter(user=self.request.user)
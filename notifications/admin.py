@@ -0,0 +1,11 @@
+from django.contrib.admin import ModelAdmin, register
+
+from .models import OutboxMessage
+
+
+# Register your models here.
+@register(OutboxMessage)
+class OutboxMessageAdmin(ModelAdmin):
+    list_display = ("subject", "status", "attempts", "available_at", "sent_at")
+    list_filter = ("status",)
+    readonly_fields = ["created_at", "sent_at", "locked_by", "locked_until"]
@@ -0,0 +1,99 @@
+"""
+Batched email delivery.
+
+`BatchMailer` keeps a single backend connection open and hands messages to
+it in chunks with `send_messages`, instead of opening a connection per
+email like `send_mail` does. `render_personalized` renders a template once
+and personalizes the result for each recipient.
+"""
+
+import contextlib
+import time
+from dataclasses import dataclass, field
+
+from django.core.mail import get_connection
+from django.template.loader import render_to_string
+from django.utils.html import escape, strip_tags
+
+RECIPIENT_PLACEHOLDER = "__recipient_user_name__"
+
+
+@dataclass
+class DeliveryReport:
+    sent: int = 0
+    failed: dict = field(default_factory=dict)  # message index -> error
+    elapsed: float = 0.0
+
+    @property
+    def rate(self):
+        """
+        Messages sent per second.
+        """
+        return self.sent / self.elapsed if self.elapsed else float(self.sent)
+
+
+class BatchMailer:
+    def __init__(self, connection=None, batch_size=100):
+        self.connection = connection
+        self.batch_size = batch_size
+
+    def send(self, email_messages):
+        """
+        Send `email_messages` over one connection, `batch_size` at a time.
+
+        When a batch fails the backend cannot tell which of its messages went
+        out, so that batch is retried one message at a time to isolate the
+        failures. Delivery is therefore at least once. When the connection
+        cannot be opened every message is reported as failed.
+        """
+        report = DeliveryReport()
+        started = time.perf_counter()
+        connection = None
+        try:
+            connection = self.connection or get_connection()
+            connection.open()
+        except Exception as e:
+            if connection is not None:
+                with contextlib.suppress(Exception):
+                    connection.close()
+            # Nothing went out; every message is left for a retry
+            report.failed = dict.fromkeys(range(len(email_messages)), str(e))
+        else:
+            try:
+                self._send_batches(connection, email_messages, report)
+            finally:
+                connection.close()
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    def _send_batches(self, connection, email_messages, report):
+        for start in range(0, len(email_messages), self.batch_size):
+            batch = email_messages[start : start + self.batch_size]
+            try:
+                report.sent += connection.send_messages(batch) or 0
+                continue
+            except Exception:
+                pass
+            for index, message in enumerate(batch, start=start):
+                try:
+                    report.sent += connection.send_messages([message]) or 0
+                except Exception as e:
+                    report.failed[index] = str(e)
+
+
+def render_personalized(template_name, context, user_names):
+    """
+    Render `template_name` once and return an (html, plain text) pair per
+    entry of `user_names`, with the recipient's name in `user_name`.
+    """
+    html_message = render_to_string(
+        template_name, {**context, "user_name": RECIPIENT_PLACEHOLDER}
+    )
+    plain_message = strip_tags(html_message)
+    return [
+        (
+            html_message.replace(RECIPIENT_PLACEHOLDER, escape(user_name)),
+            plain_message.replace(RECIPIENT_PLACEHOLDER, user_name),
+        )
+        for user_name in user_names
+    ]
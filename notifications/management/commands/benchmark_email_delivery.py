@@ -0,0 +1,60 @@
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.management.base import BaseCommand
+
+from notifications.delivery import BatchMailer, render_personalized
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure email throughput of BatchMailer against one connection per "
+        "message, using the locmem backend by default."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1000)
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--backend",
+            default="django.core.mail.backends.locmem.EmailBackend",
+            help="Email backend to benchmark against.",
+        )
+
+    def handle(self, *args, **options):
+        recipients = [f"user{index}@example.com" for index in range(options["count"])]
+        messages = render_personalized(
+            "email.html",
+            {"email_title": "Benchmark", "email_message": "Throughput benchmark"},
+            recipients,
+        )
+
+        def build_emails():
+            emails = []
+            for recipient, (html_message, plain_message) in zip(recipients, messages):
+                email = EmailMultiAlternatives(
+                    subject="Benchmark", body=plain_message, to=[recipient]
+                )
+                email.attach_alternative(html_message, "text/html")
+                emails.append(email)
+            return emails
+
+        pooled = BatchMailer(
+            connection=get_connection(options["backend"]),
+            batch_size=options["batch_size"],
+        ).send(build_emails())
+
+        single = BatchMailer(batch_size=1)
+        naive_sent, naive_elapsed = 0, 0.0
+        for email in build_emails():
+            single.connection = get_connection(options["backend"])
+            report = single.send([email])
+            naive_sent += report.sent
+            naive_elapsed += report.elapsed
+
+        self.stdout.write(
+            f"pooled:      {pooled.sent} messages in {pooled.elapsed:.3f}s "
+            f"({pooled.rate:.0f} msg/s)"
+        )
+        self.stdout.write(
+            f"per-message: {naive_sent} messages in {naive_elapsed:.3f}s "
+            f"({naive_sent / naive_elapsed if naive_elapsed else naive_sent:.0f} msg/s)"
+        )
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import OutboxWorker
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver pending outbox emails. Several workers can run at once, each "
+        "claims its own batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--lease",
+            type=int,
+            default=300,
+            help="Seconds a claimed batch stays reserved for this worker.",
+        )
+        parser.add_argument("--max-attempts", type=int, default=5)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to sleep when the outbox is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the outbox once and exit instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        worker = OutboxWorker(
+            batch_size=options["batch_size"],
+            lease_seconds=options["lease"],
+            max_attempts=options["max_attempts"],
+        )
+        self.stdout.write(f"Outbox worker {worker.worker_id} started.")
+        try:
+            worker.run(interval=options["interval"], once=options["once"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(
+            self.style.SUCCESS(f"Outbox worker {worker.worker_id} stopped.")
+        )
@@ -0,0 +1,208 @@
+"""
+Transactional email outbox.
+
+Callers write messages with `enqueue_email` inside their own transaction, so
+a message exists if and only if the change that produced it committed, and
+no request ever waits on the mail server. `OutboxWorker` (run through the
+`process_outbox` command) claims due messages in batches under a lease,
+delivers them and retries failures with exponential backoff. Several
+workers can run side by side: a message is only ever claimed by one of them
+until its lease expires.
+"""
+
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .delivery import BatchMailer
+from .models import OutboxMessage, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(subject, body, recipients, html_body=None, from_email=None):
+    """
+    Store an email in the outbox. With EMAIL_OUTBOX_EAGER enabled the message
+    is also delivered right after the surrounding transaction commits, on a
+    best effort basis: failures are left to `process_outbox`.
+    """
+    return enqueue_emails(
+        [
+            {
+                "subject": subject,
+                "body": body,
+                "recipients": recipients,
+                "html_body": html_body,
+                "from_email": from_email,
+            }
+        ]
+    )[0]
+
+
+def enqueue_emails(emails):
+    """
+    Store several emails, given as dicts of `enqueue_email` arguments, with a
+    single INSERT.
+    """
+    messages = OutboxMessage.objects.bulk_create(
+        OutboxMessage(
+            subject=email["subject"],
+            body=email["body"],
+            html_body=email.get("html_body"),
+            from_email=email.get("from_email"),
+            recipients=list(email["recipients"]),
+        )
+        for email in emails
+    )
+    if settings.EMAIL_OUTBOX_EAGER:
+        transaction.on_commit(
+            lambda: deliver_eagerly([message.pk for message in messages])
+        )
+    return messages
+
+
+def deliver_eagerly(ids):
+    """
+    Deliver freshly committed messages without letting a failure reach the
+    code that committed them. Messages that could not be delivered stay
+    pending, or leased until the lease expires, for `process_outbox`.
+    """
+    try:
+        OutboxWorker().drain(ids=ids)
+    except Exception:
+        logger.exception("Eager delivery of outbox messages %s failed", ids)
+
+
+class OutboxWorker:
+    def __init__(
+        self,
+        batch_size=50,
+        lease_seconds=300,
+        max_attempts=5,
+        backoff_seconds=30,
+        max_backoff_seconds=3600,
+        worker_id=None,
+    ):
+        self.batch_size = batch_size
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+
+    def claim(self, ids=None):
+        """
+        Lease up to `batch_size` due messages to this worker and return them.
+        """
+        now = timezone.now()
+        due = OutboxMessage.objects.filter(
+            Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+            status=OutboxStatus.PENDING,
+            available_at__lte=now,
+        )
+        if ids is not None:
+            due = due.filter(id__in=ids)
+        token = f"{self.worker_id}:{uuid.uuid4().hex}"[:64]
+
+        with transaction.atomic():
+            candidates = due.order_by("available_at", "id")
+            if connection.features.has_select_for_update_skip_locked:
+                candidates = candidates.select_for_update(skip_locked=True)
+            candidate_ids = list(
+                candidates.values_list("id", flat=True)[: self.batch_size]
+            )
+            # Re-checking the lease in the UPDATE keeps concurrent workers
+            # from claiming the same rows on databases without SKIP LOCKED.
+            due.filter(id__in=candidate_ids).update(
+                locked_by=token, locked_until=now + self.lease
+            )
+        return list(OutboxMessage.objects.filter(locked_by=token).order_by("id"))
+
+    def build_email(self, message):
+        email = EmailMultiAlternatives(
+            subject=message.subject,
+            body=message.body,
+            from_email=message.from_email,
+            to=message.recipients,
+        )
+        if message.html_body:
+            email.attach_alternative(message.html_body, "text/html")
+        return email
+
+    def deliver(self, messages):
+        """
+        Send `messages` over one backend connection and record the outcome.
+        Returns the DeliveryReport of the batch.
+        """
+        report = BatchMailer(batch_size=self.batch_size).send(
+            [self.build_email(message) for message in messages]
+        )
+        OutboxMessage.objects.filter(
+            id__in=[
+                message.pk
+                for index, message in enumerate(messages)
+                if index not in report.failed
+            ]
+        ).update(
+            status=OutboxStatus.SENT,
+            sent_at=timezone.now(),
+            locked_by=None,
+            locked_until=None,
+        )
+        for index, error in report.failed.items():
+            logger.warning("Outbox message %s failed: %s", messages[index].pk, error)
+            self.retry_later(messages[index], error)
+        logger.info(
+            "Sent %s outbox messages in %.3fs (%.1f/s)",
+            report.sent,
+            report.elapsed,
+            report.rate,
+        )
+        return report
+
+    def retry_later(self, message, error):
+        attempts = message.attempts + 1
+        delay = min(
+            self.backoff_seconds * 2 ** (attempts - 1), self.max_backoff_seconds
+        )
+        OutboxMessage.objects.filter(id=message.pk).update(
+            attempts=attempts,
+            last_error=error,
+            status=(
+                OutboxStatus.FAILED
+                if attempts >= self.max_attempts
+                else OutboxStatus.PENDING
+            ),
+            available_at=timezone.now() + timedelta(seconds=delay),
+            locked_by=None,
+            locked_until=None,
+        )
+
+    def process(self, ids=None):
+        """
+        Claim and deliver one batch. Returns the number of messages claimed.
+        """
+        messages = self.claim(ids=ids)
+        if messages:
+            self.deliver(messages)
+        return len(messages)
+
+    def drain(self, ids=None):
+        while self.process(ids=ids):
+            pass
+
+    def run(self, interval=5, once=False):
+        while True:
+            self.drain()
+            if once:
+                return
+            time.sleep(interval)
@@ -0,0 +1,203 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends import locmem
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .delivery import BatchMailer, render_personalized
+from .models import OutboxMessage, OutboxStatus
+from .outbox import OutboxWorker, enqueue_email
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError("SMTP server unavailable")
+
+
+class UnreachableEmailBackend(BaseEmailBackend):
+    def open(self):
+        raise ConnectionRefusedError("Connection refused")
+
+    def send_messages(self, email_messages):
+        raise AssertionError("Messages sent without a connection")
+
+
+class CountingEmailBackend(locmem.EmailBackend):
+    """
+    Locmem backend that records connection opens and rejects one address.
+    """
+
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        if any("reject@gmail.com" in message.to for message in messages):
+            raise ConnectionError("Recipient rejected")
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_OUTBOX_EAGER=False,
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+class OutboxTestCase(TransactionTestCase):
+    def enqueue(self, count=1):
+        return [
+            enqueue_email(
+                subject=f"Subject {index}",
+                body="Plain body",
+                html_body="<p>Html body</p>",
+                from_email="noreply@pynigeria.org",
+                recipients=[f"user{index}@gmail.com"],
+            )
+            for index in range(count)
+        ]
+
+    def test_messages_are_only_sent_by_the_worker(self):
+        self.enqueue(3)
+        self.assertEqual(len(mail.outbox), 0)
+
+        OutboxWorker(batch_size=2).run(once=True)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].alternatives[0][0], "<p>Html body</p>")
+        self.assertFalse(
+            OutboxMessage.objects.exclude(status=OutboxStatus.SENT).exists()
+        )
+
+    def test_rolled_back_messages_are_never_sent(self):
+        try:
+            with transaction.atomic():
+                self.enqueue()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(OutboxWorker().process(), 0)
+
+    def test_workers_claim_disjoint_batches(self):
+        self.enqueue(5)
+        first = OutboxWorker(batch_size=3, worker_id="first").claim()
+        second = OutboxWorker(batch_size=3, worker_id="second").claim()
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse({m.pk for m in first} & {m.pk for m in second})
+        self.assertEqual(OutboxWorker(worker_id="third").claim(), [])
+
+    def test_expired_leases_are_reclaimed(self):
+        self.enqueue()
+        OutboxWorker(worker_id="crashed").claim()
+        OutboxMessage.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(OutboxWorker(worker_id="next").process(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(EMAIL_BACKEND="notifications.tests.FailingEmailBackend")
+    def test_failures_back_off_then_give_up(self):
+        (message,) = self.enqueue()
+        worker = OutboxWorker(max_attempts=2, backoff_seconds=60)
+
+        self.assertEqual(worker.process(), 1)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (OutboxStatus.PENDING, 1))
+        self.assertGreater(message.available_at, timezone.now() + timedelta(seconds=50))
+        self.assertIn("SMTP server unavailable", message.last_error)
+        self.assertEqual(worker.process(), 0)
+
+        OutboxMessage.objects.update(available_at=timezone.now())
+        worker.process()
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (OutboxStatus.FAILED, 2))
+
+    def test_command_drains_outbox(self):
+        self.enqueue(2)
+        call_command("process_outbox", "--once", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+
+    @override_settings(EMAIL_OUTBOX_EAGER=True)
+    def test_eager_mode_sends_on_commit(self):
+        with transaction.atomic():
+            self.enqueue()
+            self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(
+        EMAIL_OUTBOX_EAGER=True,
+        EMAIL_BACKEND="notifications.tests.UnreachableEmailBackend",
+    )
+    def test_eager_failures_are_left_to_the_worker(self):
+        with transaction.atomic():
+            (message,) = self.enqueue()
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (OutboxStatus.PENDING, 1))
+        self.assertIn("Connection refused", message.last_error)
+
+        OutboxMessage.objects.update(available_at=timezone.now())
+        with self.settings(
+            EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend"
+        ):
+            self.assertEqual(OutboxWorker().process(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(EMAIL_OUTBOX_EAGER=True)
+    def test_eager_errors_do_not_reach_the_committer(self):
+        with mock.patch.object(
+            OutboxWorker, "deliver", side_effect=RuntimeError("Worker crashed")
+        ):
+            with self.assertLogs("notifications.outbox", "ERROR"):
+                with transaction.atomic():
+                    (message,) = self.enqueue()
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxStatus.PENDING)
+        self.assertIsNotNone(message.locked_until)
+
+        OutboxMessage.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(OutboxWorker().process(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+@override_settings(EMAIL_BACKEND="notifications.tests.CountingEmailBackend")
+class BatchMailerTestCase(TransactionTestCase):
+    def setUp(self):
+        CountingEmailBackend.opened = 0
+
+    def test_batches_share_one_connection_and_isolate_failures(self):
+        recipients = [f"user{index}@gmail.com" for index in range(7)]
+        recipients[4] = "reject@gmail.com"
+        emails = [EmailMessage("Subject", "Body", to=[email]) for email in recipients]
+
+        report = BatchMailer(batch_size=3).send(emails)
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertEqual(report.sent, 6)
+        self.assertEqual(list(report.failed), [4])
+        self.assertEqual(len(mail.outbox), 6)
+        self.assertGreater(report.rate, 0)
+
+    @override_settings(EMAIL_BACKEND="notifications.tests.UnreachableEmailBackend")
+    def test_connection_failures_fail_every_message(self):
+        emails = [EmailMessage("Subject", "Body", to=["user@gmail.com"])] * 3
+
+        report = BatchMailer(batch_size=2).send(emails)
+        self.assertEqual(report.sent, 0)
+        self.assertEqual(list(report.failed), [0, 1, 2])
+        self.assertIn("Connection refused", report.failed[0])
+
+    def test_template_is_personalized_per_recipient(self):
+        messages = render_personalized(
+            "email.html", {"email_title": "Title"}, ["Ada", "<b>Bob</b>"]
+        )
+        self.assertIn("Hello, Ada!", messages[0][0])
+        self.assertIn("Hello, &lt;b&gt;Bob&lt;/b&gt;!", messages[1][0])
+        self.assertIn("Hello, <b>Bob</b>!", messages[1][1])
+
+    def test_benchmark_command_reports_throughput(self):
+        out = StringIO()
+        call_command("benchmark_email_delivery", "--count", "20", stdout=out)
+        self.assertIn("pooled:      20 messages", out.getvalue())
@@ -19,7 +19,9 @@ SECRET_KEY = os.getenv("SECRET_KEY_VALUE", default="default")
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.getenv("DEBUG_VALUE", "true").lower() == "true"
 
-ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS_VALUE", "127.0.0.1").split(",")  # Use commas to seperate muliple host values
+ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS_VALUE", "127.0.0.1").split(
+    ","
+)  # Use commas to seperate muliple host values
 
 # CSRF_TRUSTED_ORIGINS = os.getenv(
 #     "CSRF_TRUSTED_ORIGINS_VALUE", "http://127.0.0.1"
@@ -28,8 +30,8 @@ ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS_VALUE", "127.0.0.1").split(",")  # Use
 # )  # Same comma-value-seperation as above
 
 # SECURITY WARNING: don't run with debug turned on in production!
-CSRF_COOKIE_SAMESITE = 'None'
-CSRF_TRUSTED_ORIGINS = ['http://localhost:3000']
+CSRF_COOKIE_SAMESITE = "None"
+CSRF_TRUSTED_ORIGINS = ["http://localhost:3000"]
 CSRF_COOKIE_HTTPONLY = False
 DEBUG = True
 
@@ -57,6 +59,7 @@ INSTALLED_APPS = [
     "job_listing_api",
     "knowledge_base_api",
     "tracking",
+    "notifications",
     # For social auth
     "oauth2_provider",
     "social_django",
@@ -146,8 +149,8 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
-MEDIA_URL = 'media/'
-MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_URL = "media/"
+MEDIA_ROOT = BASE_DIR / "media"
 
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
@@ -194,9 +197,47 @@ EMAIL_PORT = os.getenv("EMAIL_PORT_VALUE")
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER_VALUE")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD_VALUE")
+# Emails are written to the notifications outbox and sent by `manage.py process_outbox`.
+# Set to true to also send them as soon as their transaction commits.
+EMAIL_OUTBOX_EAGER = os.getenv("EMAIL_OUTBOX_EAGER_VALUE", "false").lower() == "true"
+
+# Cache settings
+# Use a shared backend (e.g. Redis or Memcached) in production so cache
+# generations and hit/miss counters are shared between workers.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND_VALUE", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION_VALUE", ""),
+    }
+}
+JOB_LIST_CACHE_TIMEOUT = int(os.getenv("JOB_LIST_CACHE_TIMEOUT_VALUE", 300))
+
+# Job views are buffered in each worker and written in batches
+JOB_VIEW_COUNT_FLUSH_INTERVAL = float(
+    os.getenv("JOB_VIEW_COUNT_FLUSH_INTERVAL_VALUE", 10)
+)
+JOB_VIEW_COUNT_MAX_PENDING = int(os.getenv("JOB_VIEW_COUNT_MAX_PENDING_VALUE", 1000))
+
+# Build the search suggestion index when a worker starts serving requests
+JOB_SUGGEST_BUILD_ON_START = (
+    os.getenv("JOB_SUGGEST_BUILD_ON_START_VALUE", "true").lower() == "true"
+)
+
+# Pre-rendered job feeds and sitemap, see job_listing_api.feeds
+JOB_FEED_ROOT = os.getenv("JOB_FEED_ROOT_VALUE", BASE_DIR / "feeds")
+JOB_FEED_BASE_URL = os.getenv(
+    "JOB_FEED_BASE_URL_VALUE", CURRENT_ORIGIN or "http://localhost:8000"
+)
+
+# What to do with a new job that near-duplicates a current one: "flag" or "reject"
+JOB_DUPLICATE_POLICY = os.getenv("JOB_DUPLICATE_POLICY_VALUE", "flag")
+
+# Seconds a moderator keeps the jobs claimed from the moderation queue
+JOB_MODERATION_LEASE = int(os.getenv("JOB_MODERATION_LEASE_VALUE", 900))
 
 # 2FA TOTP settings
 OTP_TOTP_ISSUER = "pynigeria"
 TAGGIT_CASE_INSENSITIVE = True
 CORS_ALLOW_ALL_ORIGINS = True
-